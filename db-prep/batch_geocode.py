@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Batch geocoding stage for the db-prep import scripts.
+
+Rows whose coordinates are missing are grouped by (normalized) address so
+each distinct address is geocoded at most once. Answers, including "no
+result" misses, are kept in a local JSON cache so re-running an import never
+asks the geocoder for the same address twice. Failed lookups (timeouts, rate
+limiting, network errors) are not cached and are retried on the next run. Lookups run on a small thread pool
+behind a shared rate limiter, which keeps us within the Nominatim usage
+policy of one request per second.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Unit designators confuse Nominatim and never change the building location.
+UNIT_PATTERN = re.compile(
+    r"[,\-]?\s*\b(\d+(st|nd|rd|th)\s+floor|floor\s+\w+|suite\s+\w+|room\s+\w+|unit\s+\w+)\b",
+    re.IGNORECASE,
+)
+
+
+def normalize_address(address):
+    if address is None or pd.isna(address):
+        return None
+    address = UNIT_PATTERN.sub("", str(address))
+    address = re.sub(r"\s+", " ", address).strip(" ,-")
+    return address.lower() or None
+
+
+class NominatimBackend:
+    """Geocoder backed by OpenStreetMap Nominatim (same as ServiceForm)."""
+
+    persistent = True
+
+    def __init__(self, user_agent="public_service_finder", timeout=10):
+        from geopy import Nominatim
+
+        self.geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, address):
+        location = self.geolocator.geocode(address)
+        if location is None:
+            return None
+        return location.latitude, location.longitude
+
+
+class StubBackend:
+    """Offline geocoder for tests and dry runs.
+
+    Answers from a fixed address -> (lat, lon) mapping and records every
+    address it was asked about, so callers can assert on deduplication.
+    Its answers say nothing about the real addresses, so they must never be
+    persisted to a cache file a real backend reads.
+    """
+
+    persistent = False
+
+    def __init__(self, coordinates=None):
+        self.coordinates = {
+            normalize_address(address): coords
+            for address, coords in (coordinates or {}).items()
+        }
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def geocode(self, address):
+        with self._lock:
+            self.calls.append(address)
+        return self.coordinates.get(address)
+
+
+BACKENDS = {
+    "nominatim": NominatimBackend,
+    "stub": StubBackend,
+}
+
+
+class GeocodeCache:
+    """JSON file cache of normalized address -> [lat, lon] (or null for misses)."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path) as cache_file:
+                self.entries = json.load(cache_file)
+
+    def __contains__(self, address):
+        return address in self.entries
+
+    def get(self, address):
+        coords = self.entries.get(address)
+        return tuple(coords) if coords else None
+
+    def set(self, address, coords):
+        self.entries[address] = list(coords) if coords else None
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as cache_file:
+            json.dump(self.entries, cache_file, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across all threads."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def batch_geocode(addresses, backend, cache=None, max_workers=2, rate=1.0):
+    """Geocode an iterable of addresses, returning {normalized address: coords}.
+
+    Each distinct address is resolved once: cache hits are returned directly
+    and only the remaining addresses are sent to the backend. Addresses whose
+    lookup raised map to None but are left out of the cache.
+    """
+    cache = cache if cache is not None else GeocodeCache()
+    unique = {normalize_address(address) for address in addresses}
+    unique.discard(None)
+
+    pending = sorted(address for address in unique if address not in cache)
+    limiter = RateLimiter(rate)
+
+    def lookup(address):
+        limiter.wait()
+        try:
+            return address, backend.geocode(address), True
+        except Exception as e:
+            print(f"Failed to geocode '{address}': {e}")
+            return address, None, False
+
+    failed = 0
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for address, coords, answered in executor.map(lookup, pending):
+                if answered:
+                    cache.set(address, coords)
+                else:
+                    failed += 1
+        cache.save()
+    if failed:
+        print(f"{failed} addresses failed and will be retried on the next run")
+
+    return {address: cache.get(address) for address in unique}
+
+
+def fill_missing_coordinates(
+    df,
+    backend,
+    cache=None,
+    address_column="Address",
+    lat_column="Latitude",
+    lon_column="Longitude",
+    max_workers=2,
+    rate=1.0,
+):
+    """Write geocoded coordinates back into rows missing lat/lon.
+
+    Returns the number of rows that were recovered.
+    """
+    missing = df[lat_column].isna() | df[lon_column].isna()
+    if not missing.any():
+        return 0
+
+    results = batch_geocode(
+        df.loc[missing, address_column],
+        backend,
+        cache=cache,
+        max_workers=max_workers,
+        rate=rate,
+    )
+
+    recovered = 0
+    for index in df.index[missing]:
+        coords = results.get(normalize_address(df.at[index, address_column]))
+        if coords:
+            df.at[index, lat_column], df.at[index, lon_column] = coords
+            recovered += 1
+
+    print(f"Geocoded {recovered} of {int(missing.sum())} rows missing coordinates")
+    return recovered
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python3 batch_geocode.py /path/to/csv [cache.json]")
+        exit(1)
+
+    csv_file = sys.argv[1]
+    cache_file = sys.argv[2] if len(sys.argv) == 3 else f"{csv_file}.geocache.json"
+
+    df = pd.read_csv(csv_file)
+    lon_column = "longitude" if "longitude" in df.columns else "Longitude"
+    lat_column = "latitude" if "latitude" in df.columns else "Latitude"
+    fill_missing_coordinates(
+        df,
+        NominatimBackend(),
+        cache=GeocodeCache(cache_file),
+        lat_column=lat_column,
+        lon_column=lon_column,
+    )
+    df.to_csv(csv_file, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ from decimal import Decimal
 import uuid
 import math
 
+from batch_geocode import BACKENDS, GeocodeCache, fill_missing_coordinates
+
 
 class DecimalEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -67,9 +69,24 @@ def insert_food_data_to_dynamodb(df, table, name):
     print(f"Successfully inserted all records into {name}")
 
 
+def geocode_missing_rows(df, csv_file, backend_name):
+    # Recover rows that have an address but no coordinates before inserting
+    backend = BACKENDS[backend_name]()
+    # The stub's answers stay in memory, away from the real backend's cache
+    cache = GeocodeCache(f"{csv_file}.geocache.json" if backend.persistent else None)
+    fill_missing_coordinates(
+        df, backend, cache=cache, lat_column="Latitude", lon_column="longitude"
+    )
+
+
 def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 db-foods.py /path/to/csv <dynamoDB table name>")
+    if len(sys.argv) not in (3, 4) or (
+        len(sys.argv) == 4 and sys.argv[3].split("=")[0] != "--geocode"
+    ):
+        print(
+            "Usage: python3 db-foods.py /path/to/csv <dynamoDB table name> "
+            "[--geocode[=nominatim|stub]]"
+        )
         exit(1)
 
     foods_file = sys.argv[1]
@@ -80,6 +97,9 @@ def main():
     table = dynamodb.Table(table_name)
 
     df = pd.read_csv(foods_file)
+    if len(sys.argv) == 4:
+        backend_name = sys.argv[3].partition("=")[2] or "nominatim"
+        geocode_missing_rows(df, foods_file, backend_name)
     insert_food_data_to_dynamodb(df, table, table_name)
 
 
@@ -1,9 +1,41 @@
 #!/usr/bin/env python3
 
 import sys
+import time
 import boto3
 from botocore.exceptions import ClientError
 
+THROUGHPUT = {"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+
+# Reviews of a service, and of a user, newest first (see home/repositories.py)
+TIMESTAMP_INDEXES = [
+    {
+        "IndexName": "ServiceTimestampIndex",
+        "KeySchema": [
+            {"AttributeName": "ServiceId", "KeyType": "HASH"},
+            {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+        "ProvisionedThroughput": THROUGHPUT,
+    },
+    {
+        "IndexName": "UserTimestampIndex",
+        "KeySchema": [
+            {"AttributeName": "UserId", "KeyType": "HASH"},
+            {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+        "ProvisionedThroughput": THROUGHPUT,
+    },
+]
+
+ATTRIBUTE_DEFINITIONS = [
+    {"AttributeName": "ReviewId", "AttributeType": "S"},  # 'S' for string
+    {"AttributeName": "ServiceId", "AttributeType": "S"},
+    {"AttributeName": "UserId", "AttributeType": "S"},
+    {"AttributeName": "Timestamp", "AttributeType": "S"},
+]
+
 
 def create_reviews_table(dynamodb, table_name):
     try:
@@ -15,10 +47,17 @@ def create_reviews_table(dynamodb, table_name):
                     "KeyType": "HASH",  # Partition key
                 }
             ],
-            AttributeDefinitions=[
-                {"AttributeName": "ReviewId", "AttributeType": "S"}  # 'S' for string
+            AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": "ServiceIdIndex",
+                    "KeySchema": [{"AttributeName": "ServiceId", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                    "ProvisionedThroughput": THROUGHPUT,
+                },
+                *TIMESTAMP_INDEXES,
             ],
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5},
+            ProvisionedThroughput=THROUGHPUT,
         )
 
         # Wait until the table exists.
@@ -31,11 +70,49 @@ def create_reviews_table(dynamodb, table_name):
         sys.exit(1)
 
 
+def index_statuses(client, table_name):
+    table = client.describe_table(TableName=table_name)["Table"]
+    return {
+        index["IndexName"]: index["IndexStatus"]
+        for index in table.get("GlobalSecondaryIndexes", [])
+    }
+
+
+def add_timestamp_indexes(dynamodb, table_name):
+    """
+    Add the timestamp indexes to an existing reviews table. DynamoDB builds
+    one new index at a time, so each is created once the previous is ACTIVE.
+    """
+    client = dynamodb.meta.client
+    for index in TIMESTAMP_INDEXES:
+        name = index["IndexName"]
+        if name in index_statuses(client, table_name):
+            print(f"Index '{name}' already exists.")
+            continue
+        try:
+            client.update_table(
+                TableName=table_name,
+                AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+                GlobalSecondaryIndexUpdates=[{"Create": index}],
+            )
+        except ClientError as e:
+            print(f"Failed to add index: {e.response['Error']['Message']}")
+            sys.exit(1)
+
+        print(f"Building index '{name}'...")
+        while index_statuses(client, table_name).get(name) != "ACTIVE":
+            time.sleep(20)
+        print(f"Index '{name}' is active.")
+
+
 def main():
     dynamodb = boto3.resource(
         "dynamodb", region_name="us-east-1"
     )  # Replace with your region
-    create_reviews_table(dynamodb, "reviews")
+    if sys.argv[1:] == ["--add-indexes"]:
+        add_timestamp_indexes(dynamodb, "reviews")
+    else:
+        create_reviews_table(dynamodb, "reviews")
 
 
 if __name__ == "__main__":
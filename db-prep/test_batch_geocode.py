@@ -0,0 +1,176 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import batch_geocode
+from batch_geocode import (
+    GeocodeCache,
+    RateLimiter,
+    StubBackend,
+    batch_geocode as geocode,
+    fill_missing_coordinates,
+    normalize_address,
+)
+
+
+class FakeClock:
+    """Stands in for the time module: sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def monotonic(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+class FlakyBackend(StubBackend):
+    """Raises for the given addresses, as Nominatim does on timeouts or 429s."""
+
+    def __init__(self, coordinates=None, failing=()):
+        super().__init__(coordinates)
+        self.failing = {normalize_address(address) for address in failing}
+
+    def geocode(self, address):
+        super().geocode(address)
+        if address in self.failing:
+            raise TimeoutError("timed out")
+        return self.coordinates.get(address)
+
+
+class NormalizeAddressTest(unittest.TestCase):
+    def test_strips_units_and_case(self):
+        self.assertEqual(
+            normalize_address("  123 Main St, Suite 4B  "),
+            normalize_address("123 MAIN ST"),
+        )
+        self.assertEqual(normalize_address("5 Elm St 2nd Floor"), "5 elm st")
+
+    def test_missing_addresses(self):
+        self.assertIsNone(normalize_address(None))
+        self.assertIsNone(normalize_address(float("nan")))
+        self.assertIsNone(normalize_address(" , "))
+
+
+class BatchGeocodeTest(unittest.TestCase):
+    def setUp(self):
+        clock = FakeClock()
+        patcher = mock.patch.object(batch_geocode, "time", clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_each_distinct_address_is_geocoded_once(self):
+        backend = StubBackend({"1 Main St": (40.7, -74.0)})
+
+        results = geocode(
+            ["1 Main St", "1 main st, Suite 2", "1 MAIN ST", "2 Side St", None],
+            backend,
+        )
+
+        self.assertEqual(sorted(backend.calls), ["1 main st", "2 side st"])
+        self.assertEqual(results, {"1 main st": (40.7, -74.0), "2 side st": None})
+
+    def test_cached_answers_and_misses_are_not_looked_up_again(self):
+        cache = GeocodeCache()
+        geocode(["1 Main St", "2 Side St"], StubBackend({"1 Main St": (1, 2)}), cache)
+
+        backend = StubBackend()
+        results = geocode(["1 Main St", "2 Side St"], backend, cache)
+
+        self.assertEqual(backend.calls, [])
+        self.assertEqual(results, {"1 main st": (1, 2), "2 side st": None})
+
+    def test_failed_lookups_are_not_cached(self):
+        cache = GeocodeCache()
+        backend = FlakyBackend({"1 Main St": (1, 2)}, failing=["1 Main St"])
+
+        results = geocode(["1 Main St", "2 Side St"], backend, cache)
+
+        self.assertEqual(results, {"1 main st": None, "2 side st": None})
+        self.assertNotIn("1 main st", cache)
+        self.assertIn("2 side st", cache)
+
+        # The next run retries only the address that failed
+        retry = StubBackend({"1 Main St": (1, 2)})
+        results = geocode(["1 Main St", "2 Side St"], retry, cache)
+        self.assertEqual(retry.calls, ["1 main st"])
+        self.assertEqual(results["1 main st"], (1, 2))
+
+    def test_cache_round_trips_through_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "foods.csv.geocache.json")
+            backend = FlakyBackend({"1 Main St": (1.5, 2.5)}, failing=["3 Broken Rd"])
+            geocode(
+                ["1 Main St", "2 Side St", "3 Broken Rd"],
+                backend,
+                GeocodeCache(path),
+            )
+
+            with open(path) as cache_file:
+                self.assertEqual(
+                    json.load(cache_file),
+                    {"1 main st": [1.5, 2.5], "2 side st": None},
+                )
+            cache = GeocodeCache(path)
+            self.assertEqual(cache.get("1 main st"), (1.5, 2.5))
+            self.assertIn("2 side st", cache)
+            self.assertNotIn("3 broken rd", cache)
+
+    def test_fill_missing_coordinates(self):
+        df = pd.DataFrame(
+            {
+                "Address": ["1 Main St", "1 Main St, Room 5", "2 Side St", "3 Far Rd"],
+                "Latitude": [None, None, None, 10.0],
+                "longitude": [None, None, None, 20.0],
+            }
+        )
+        backend = StubBackend({"1 Main St": (1.0, 2.0)})
+
+        recovered = fill_missing_coordinates(
+            df, backend, lat_column="Latitude", lon_column="longitude"
+        )
+
+        self.assertEqual(recovered, 2)
+        self.assertEqual(backend.calls.count("1 main st"), 1)
+        self.assertNotIn("3 far rd", backend.calls)
+        self.assertEqual(df["Latitude"].tolist()[:2], [1.0, 1.0])
+        self.assertTrue(pd.isna(df.at[2, "Latitude"]))
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(batch_geocode, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_spaces_calls_by_the_rate(self):
+        limiter = RateLimiter(2)
+
+        for _ in range(4):
+            limiter.wait()
+
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5, 0.5])
+        self.assertEqual(self.clock.now, 1.5)
+
+    def test_no_rate_means_no_waiting(self):
+        limiter = RateLimiter(None)
+        for _ in range(3):
+            limiter.wait()
+        self.assertEqual(self.clock.sleeps, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,12 @@
+import io
 from unittest.mock import patch
 
+from botocore.exceptions import ClientError
 from django.contrib.auth import authenticate, get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase, Client, RequestFactory
 from django.urls import reverse
+from PIL import Image
 
 from accounts.backends import EmailOrUsernameBackend
 from accounts.forms import ServiceProviderLoginForm, UserLoginForm, UserRegisterForm
@@ -96,6 +100,37 @@ class RegisterViewTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn("Enter a valid email address.", form.errors["email"])
 
+    @patch("accounts.views.upload_image")
+    def test_register_view_reports_failed_image_upload(self, mock_upload):
+        mock_upload.side_effect = ClientError(
+            {"Error": {"Code": "500", "Message": "S3 unavailable"}}, "PutObject"
+        )
+        image = io.BytesIO()
+        Image.new("RGB", (1, 1)).save(image, "PNG")
+
+        response = self.client.post(
+            reverse("register"),
+            {
+                "username": "testuser",
+                "email": "testuser@example.com",
+                "first_name": "test",
+                "last_name": "user",
+                "password1": "Testpassword123!",
+                "password2": "Testpassword123!",
+                "user_type": "user",
+                "profile_image": SimpleUploadedFile(
+                    "photo.png", image.getvalue(), "image/png"
+                ),
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            "Failed to upload image. Please try again.",
+            response.context["form"].errors["profile_image"],
+        )
+        self.assertFalse(CustomUser.objects.filter(username="testuser").exists())
+
 
 class UserLoginViewTest(TestCase):
     def setUp(self):
@@ -7,20 +7,21 @@ from django.conf import settings
 from django.contrib.auth.views import LoginView, LogoutView
 from django.core.exceptions import PermissionDenied
 from django.db import models
+from django.db.models import Count
 from django.shortcuts import get_object_or_404, render, redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.decorators import login_required
 from dateutil.parser import parse as parse_date
-import uuid
-import boto3
 from botocore.exceptions import ClientError
 from django.contrib.auth import login
 
 from accounts.models import CustomUser
 from forum.models import Post
 from home.repositories import HomeRepository
+from public_service_finder.utils.pagination import KeysetPaginator
+from services.images import upload_image
 
 from .forms import (
     ServiceSeekerForm,
@@ -42,27 +43,10 @@ def register(request):
             user.last_name = form.cleaned_data.get("last_name")
             profile_image = form.cleaned_data.get("profile_image")
             if profile_image:
-                # Generate a unique filename
-                image_extension = profile_image.name.split(".")[-1]
-                unique_filename = f"{uuid.uuid4()}.{image_extension}"
-                s3_key = f"images/{unique_filename}"
-
-                # Upload to S3
-                s3_client = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
-
                 try:
-                    s3_client.upload_fileobj(
-                        profile_image,
-                        settings.AWS_STORAGE_BUCKET_NAME,
-                        s3_key,
-                        ExtraArgs={"ContentType": profile_image.content_type},
-                    )
-                    # Construct the image URL
-                    image_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
-                    user.profile_image_url = image_url
+                    user.profile_image_url = upload_image(profile_image, "images")
                 except ClientError as e:
                     print(f"Failed to upload image to S3: {e}")
-                    # Optionally, add an error message to the form
                     form.add_error(
                         "profile_image", "Failed to upload image. Please try again."
                     )
@@ -92,13 +76,25 @@ def convert_decimals(obj):
         return obj
 
 
+def _user_posts_page(request, user):
+    posts = (
+        Post.objects.filter(author=user)
+        .select_related("category")
+        .annotate(comment_count=Count("comments"))
+    )
+    paginator = KeysetPaginator(
+        posts, 10, count_cache_key=f"profile:post-count:{user.id}"
+    )
+    return paginator.page(request.GET.get("cursor"))
+
+
 @login_required
 def profile_view(request):
     user = request.user
 
     if user.user_type == "service_provider":
         service_provider = get_object_or_404(CustomUser, email=user.email)
-        user_posts = Post.objects.filter(author=user).order_by("-created_at")
+        user_posts = _user_posts_page(request, user)
 
         if request.method == "POST":
             form = ServiceProviderForm(
@@ -110,27 +106,10 @@ def profile_view(request):
                 if remove_image:
                     service_provider.profile_image_url = None
                 if profile_image:
-                    # Generate a unique filename
-                    image_extension = profile_image.name.split(".")[-1]
-                    unique_filename = f"{uuid.uuid4()}.{image_extension}"
-                    s3_key = f"images/{unique_filename}"
-
-                    # Upload to S3
-                    s3_client = boto3.client(
-                        "s3",
-                        region_name=settings.AWS_S3_REGION_NAME,
-                    )
-
                     try:
-                        s3_client.upload_fileobj(
-                            profile_image,
-                            settings.AWS_STORAGE_BUCKET_NAME,
-                            s3_key,
-                            ExtraArgs={"ContentType": profile_image.content_type},
+                        service_provider.profile_image_url = upload_image(
+                            profile_image, "images"
                         )
-                        # Construct the image URL
-                        image_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
-                        service_provider.profile_image_url = image_url
                     except ClientError as e:
                         print(f"Failed to upload image to S3: {e}")
 
@@ -192,7 +171,7 @@ def profile_view(request):
                 pass
 
         # Fetch user's posts
-        user_posts = Post.objects.filter(author=user).order_by("-created_at")
+        user_posts = _user_posts_page(request, user)
 
         # Get active tab
         active_tab = "posts"
@@ -207,26 +186,10 @@ def profile_view(request):
                 if remove_image:
                     service_seeker.profile_image_url = None
                 if profile_image:
-                    # Generate a unique filename
-                    image_extension = profile_image.name.split(".")[-1]
-                    unique_filename = f"{uuid.uuid4()}.{image_extension}"
-                    s3_key = f"images/{unique_filename}"
-                    # Upload to S3
-                    s3_client = boto3.client(
-                        "s3",
-                        region_name=settings.AWS_S3_REGION_NAME,
-                    )
-
                     try:
-                        s3_client.upload_fileobj(
-                            profile_image,
-                            settings.AWS_STORAGE_BUCKET_NAME,
-                            s3_key,
-                            ExtraArgs={"ContentType": profile_image.content_type},
+                        service_seeker.profile_image_url = upload_image(
+                            profile_image, "images"
                         )
-                        # Construct the image URL
-                        image_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
-                        service_seeker.profile_image_url = image_url
                     except ClientError as e:
                         print(f"Failed to upload image to S3: {e}")
                 form.save()
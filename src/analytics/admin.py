@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import DailyRollup
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("date", "metric", "category", "borough", "count", "stars")
+    list_filter = ("metric", "category", "borough")
+    date_hierarchy = "date"
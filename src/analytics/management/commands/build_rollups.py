@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import build_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Aggregate the reviews, bookmarks and services tables into daily "
+        "platform rollups for the admin analytics page. Run it periodically, "
+        "e.g. hourly from cron with --days 2."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            help="Rebuild only the last DAYS days, today included (default: all)",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days is not None and days < 1:
+            raise CommandError("--days must be at least 1")
+        rows = build_rollups(days=days)
+        if rows is None:
+            self.stdout.write("Another build holds the lock; skipped")
+        else:
+            self.stdout.write(f"Wrote {rows} rollups")
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("reviews", "Reviews"),
+                            ("bookmarks", "Bookmarks"),
+                            ("services", "New services"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("category", models.CharField(max_length=50)),
+                ("borough", models.CharField(max_length=50)),
+                ("count", models.IntegerField(default=0)),
+                ("stars", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("metric", "date", "category", "borough"),
+                        name="analytics_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import models
+
+
+class DailyRollup(models.Model):
+    """
+    One day of a platform metric for one service category and borough,
+    built from the DynamoDB tables by analytics/rollups.py.
+    """
+
+    REVIEWS = "reviews"
+    BOOKMARKS = "bookmarks"
+    SERVICES = "services"
+    METRICS = [
+        (REVIEWS, "Reviews"),
+        (BOOKMARKS, "Bookmarks"),
+        (SERVICES, "New services"),
+    ]
+
+    date = models.DateField()
+    metric = models.CharField(max_length=20, choices=METRICS)
+    category = models.CharField(max_length=50)
+    borough = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+    # Sum of the review stars, so averages can be taken over any grouping
+    stars = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["metric", "date", "category", "borough"],
+                name="analytics_rollup_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} on {self.date}: {self.category}, {self.borough}"
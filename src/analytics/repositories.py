@@ -0,0 +1,72 @@
+import boto3
+from boto3.dynamodb.conditions import Attr
+from django.conf import settings
+
+
+class AnalyticsRepository:
+    """Full-table reads of the DynamoDB tables, for building rollups only."""
+
+    def __init__(self):
+        self.dynamodb = boto3.resource("dynamodb", region_name=settings.AWS_REGION)
+        self.services_table = self.dynamodb.Table(settings.DYNAMODB_TABLE_SERVICES)
+        self.reviews_table = self.dynamodb.Table(settings.DYNAMODB_TABLE_REVIEWS)
+        self.bookmarks_table = self.dynamodb.Table(settings.DYNAMODB_TABLE_BOOKMARKS)
+
+    @staticmethod
+    def _scan(table, **kwargs):
+        while True:
+            response = table.scan(**kwargs)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def scan_services(self):
+        """Every service's Id, Category, Description.Borough and CreatedTimestamp."""
+        return self._scan(
+            self.services_table,
+            ProjectionExpression="#id, #category, #description.#borough, #created",
+            ExpressionAttributeNames={
+                "#id": "Id",
+                "#category": "Category",
+                "#description": "Description",
+                "#borough": "Borough",
+                "#created": "CreatedTimestamp",
+            },
+        )
+
+    def scan_reviews(self, since=None):
+        """
+        The ServiceId, Timestamp and RatingStars of every review, or of those
+        written on or after since (an ISO date). since is a FilterExpression,
+        applied after the read: the scan still reads, and is billed for, the
+        whole table.
+        """
+        kwargs = {
+            "ProjectionExpression": "#service, #timestamp, #stars",
+            "ExpressionAttributeNames": {
+                "#service": "ServiceId",
+                "#timestamp": "Timestamp",
+                "#stars": "RatingStars",
+            },
+        }
+        if since:
+            kwargs["FilterExpression"] = Attr("Timestamp").gte(since)
+        return self._scan(self.reviews_table, **kwargs)
+
+    def scan_bookmarks(self, since=None):
+        """
+        The ServiceId and timestamp of every bookmark, or of those made on or
+        after since (an ISO date). As in scan_reviews, since only filters
+        what is returned; the whole table is read and billed.
+        """
+        kwargs = {
+            "ProjectionExpression": "#service, #timestamp",
+            "ExpressionAttributeNames": {
+                "#service": "ServiceId",
+                "#timestamp": "timestamp",
+            },
+        }
+        if since:
+            kwargs["FilterExpression"] = Attr("timestamp").gte(since)
+        return self._scan(self.bookmarks_table, **kwargs)
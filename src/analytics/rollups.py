@@ -0,0 +1,203 @@
+"""
+Platform-wide daily rollups.
+
+Platform metrics (reviews per category, busiest boroughs, bookmark growth)
+would otherwise scan the reviews and bookmarks tables on every page load.
+build_rollups scans them once per run, typically from cron through
+`manage.py build_rollups`, and stores one DailyRollup row per day, metric,
+service category and borough. platform_summary, behind the admin analytics
+page, reads only those rows: a few thousand for a 90-day window however
+many reviews there are.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import DailyRollup
+from .repositories import AnalyticsRepository
+
+BATCH_SIZE = 500
+UNKNOWN = "Unknown"
+# pg_try_advisory_xact_lock key held by the running build
+BUILD_LOCK_ID = 4927301
+
+
+def _lock_build():
+    """
+    Whether this transaction may build. Cron runs build_rollups on every
+    instance, and two builds deleting and re-inserting the same window at
+    once would collide on analytics_rollup_unique, so on PostgreSQL only the
+    one that takes the advisory lock builds; the lock goes with the
+    transaction, so it also holds through a transaction-mode pooler. SQLite
+    allows one writer at a time anyway.
+    """
+    if connection.vendor != "postgresql":
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s)", [BUILD_LOCK_ID])
+        return cursor.fetchone()[0]
+
+
+def _date(timestamp):
+    # Dates as written in the ISO timestamps, as the provider analytics use
+    try:
+        return date.fromisoformat(str(timestamp)[:10])
+    except ValueError:
+        return None
+
+
+def _stars(review):
+    try:
+        return int(review.get("RatingStars"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _borough(service):
+    borough = (service.get("Description") or {}).get("Borough")
+    return str(borough).strip().title() if borough else UNKNOWN
+
+
+def build_rollups(days=None, today=None, repo=None):
+    """
+    Rebuild the rollups of the last days days, today included, or all of
+    them when days is None. Returns the number of rows written, or None when
+    another build holds the lock.
+
+    The window only limits what is aggregated and replaced: reviews and
+    bookmarks are filtered with a Scan FilterExpression, so DynamoDB still
+    reads, and bills, every item of both tables on each run. Services are
+    read in full too, as they map reviews and bookmarks to a category and
+    borough.
+    """
+    # Lock before scanning, so the instances that lose skip the scans too
+    with transaction.atomic():
+        if not _lock_build():
+            return None
+        repo = repo or AnalyticsRepository()
+        today = today or timezone.now().date()
+        since = today - timedelta(days=days - 1) if days else None
+
+        # (metric, date, category, borough) -> [count, stars]
+        rollups = defaultdict(lambda: [0, 0])
+
+        def add(metric, day, service, stars=0):
+            if day is None or (since and day < since):
+                return
+            row = rollups[(metric, day, *service)]
+            row[0] += 1
+            row[1] += stars
+
+        services = {}
+        for item in repo.scan_services():
+            service = (item.get("Category") or UNKNOWN, _borough(item))
+            services[item["Id"]] = service
+            add(DailyRollup.SERVICES, _date(item.get("CreatedTimestamp")), service)
+
+        unknown = (UNKNOWN, UNKNOWN)
+        since_iso = since.isoformat() if since else None
+        for review in repo.scan_reviews(since_iso):
+            add(
+                DailyRollup.REVIEWS,
+                _date(review.get("Timestamp")),
+                services.get(review.get("ServiceId"), unknown),
+                _stars(review),
+            )
+        for bookmark in repo.scan_bookmarks(since_iso):
+            add(
+                DailyRollup.BOOKMARKS,
+                _date(bookmark.get("timestamp")),
+                services.get(bookmark.get("ServiceId"), unknown),
+            )
+
+        stale = DailyRollup.objects.all()
+        if since:
+            stale = stale.filter(date__gte=since)
+        stale.delete()
+        DailyRollup.objects.bulk_create(
+            (
+                DailyRollup(
+                    metric=metric,
+                    date=day,
+                    category=category,
+                    borough=borough,
+                    count=count,
+                    stars=stars,
+                )
+                for (metric, day, category, borough), (count, stars) in rollups.items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        return len(rollups)
+
+
+def platform_summary(days=30, today=None):
+    """
+    Platform metrics over the last days days from the rollups: reviews per
+    category per day, boroughs by review count, and bookmark growth.
+    """
+    today = today or timezone.now().date()
+    since = today - timedelta(days=days - 1)
+    dates = [since + timedelta(days=n) for n in range(days)]
+    rows = DailyRollup.objects.filter(date__gte=since, date__lte=today).order_by()
+
+    categories = defaultdict(lambda: [0] * days)
+    for category, day, count in (
+        rows.filter(metric=DailyRollup.REVIEWS)
+        .values("category", "date")
+        .annotate(total=Sum("count"))
+        .values_list("category", "date", "total")
+    ):
+        categories[category][(day - since).days] = count
+
+    boroughs = (
+        rows.values("borough")
+        .annotate(
+            reviews=Sum("count", filter=Q(metric=DailyRollup.REVIEWS), default=0),
+            stars=Sum("stars", filter=Q(metric=DailyRollup.REVIEWS), default=0),
+            bookmarks=Sum("count", filter=Q(metric=DailyRollup.BOOKMARKS), default=0),
+            new_services=Sum("count", filter=Q(metric=DailyRollup.SERVICES), default=0),
+        )
+        .order_by("-reviews", "-bookmarks", "borough")
+    )
+
+    new_bookmarks = [0] * days
+    for day, count in (
+        rows.filter(metric=DailyRollup.BOOKMARKS)
+        .values("date")
+        .annotate(total=Sum("count"))
+        .values_list("date", "total")
+    ):
+        new_bookmarks[(day - since).days] = count
+    total = DailyRollup.objects.filter(
+        metric=DailyRollup.BOOKMARKS, date__lt=since
+    ).aggregate(total=Sum("count", default=0))["total"]
+    bookmark_growth = []
+    for day, count in zip(dates, new_bookmarks):
+        total += count
+        bookmark_growth.append({"date": day.isoformat(), "new": count, "total": total})
+
+    return {
+        "dates": [day.isoformat() for day in dates],
+        "categories": sorted(
+            (
+                {"category": category, "counts": counts, "total": sum(counts)}
+                for category, counts in categories.items()
+            ),
+            key=lambda row: (-row["total"], row["category"]),
+        ),
+        "boroughs": [
+            {
+                **row,
+                "average_rating": (
+                    round(row["stars"] / row["reviews"], 2) if row["reviews"] else None
+                ),
+            }
+            for row in boroughs
+        ],
+        "bookmark_growth": bookmark_growth,
+    }
@@ -0,0 +1,155 @@
+from datetime import date
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from .models import DailyRollup
+from .rollups import build_rollups, platform_summary
+
+TODAY = date(2024, 10, 13)
+
+
+class FakeAnalyticsRepository:
+    def __init__(self, services, reviews, bookmarks):
+        self.services = services
+        self.reviews = reviews
+        self.bookmarks = bookmarks
+        self.since = []
+
+    def scan_services(self):
+        return iter(self.services)
+
+    def scan_reviews(self, since=None):
+        self.since.append(since)
+        return (r for r in self.reviews if not since or r["Timestamp"] >= since)
+
+    def scan_bookmarks(self, since=None):
+        return (b for b in self.bookmarks if not since or b["timestamp"] >= since)
+
+
+def review(service_id, timestamp, stars):
+    return {"ServiceId": service_id, "Timestamp": timestamp, "RatingStars": stars}
+
+
+def bookmark(service_id, timestamp):
+    return {"ServiceId": service_id, "timestamp": timestamp}
+
+
+class RollupTest(TestCase):
+    def setUp(self):
+        self.repo = FakeAnalyticsRepository(
+            services=[
+                {
+                    "Id": "food-1",
+                    "Category": "FOOD",
+                    "Description": {"Borough": "BROOKLYN"},
+                    "CreatedTimestamp": "2024-10-01T09:00:00",
+                },
+                {
+                    "Id": "shelter-1",
+                    "Category": "SHELTER",
+                    "Description": {"Borough": "Bronx"},
+                    "CreatedTimestamp": "NONE",
+                },
+            ],
+            reviews=[
+                review("food-1", "2024-10-12T10:00:00", "5"),
+                review("food-1", "2024-10-12T18:00:00Z", "3"),
+                review("shelter-1", "2024-10-13T08:00:00", 4),
+                review("deleted-service", "2024-10-13T08:00:00", 1),
+                review("shelter-1", "2024-09-01T08:00:00", 2),
+            ],
+            bookmarks=[
+                bookmark("food-1", "2024-09-01T00:00:00"),
+                bookmark("food-1", "2024-10-12T00:00:00"),
+                bookmark("shelter-1", "2024-10-13T00:00:00"),
+            ],
+        )
+
+    def rows(self, metric):
+        return set(
+            DailyRollup.objects.filter(metric=metric).values_list(
+                "date", "category", "borough", "count", "stars"
+            )
+        )
+
+    def test_build_rolls_up_per_day_category_and_borough(self):
+        self.assertEqual(build_rollups(today=TODAY, repo=self.repo), 8)
+
+        self.assertEqual(
+            self.rows(DailyRollup.REVIEWS),
+            {
+                (date(2024, 10, 12), "FOOD", "Brooklyn", 2, 8),
+                (date(2024, 10, 13), "SHELTER", "Bronx", 1, 4),
+                (date(2024, 10, 13), "Unknown", "Unknown", 1, 1),
+                (date(2024, 9, 1), "SHELTER", "Bronx", 1, 2),
+            },
+        )
+        # Services without a creation date count nowhere
+        self.assertEqual(
+            self.rows(DailyRollup.SERVICES),
+            {(date(2024, 10, 1), "FOOD", "Brooklyn", 1, 0)},
+        )
+        self.assertEqual(len(self.rows(DailyRollup.BOOKMARKS)), 3)
+
+    def test_window_rebuild_keeps_older_rollups(self):
+        build_rollups(today=TODAY, repo=self.repo)
+        self.repo.reviews.append(review("food-1", "2024-10-13T20:00:00", 1))
+        self.repo.reviews.append(review("food-1", "2024-09-02T20:00:00", 1))
+
+        build_rollups(days=2, today=TODAY, repo=self.repo)
+
+        self.assertEqual(self.repo.since[-1], "2024-10-12")
+        reviews = self.rows(DailyRollup.REVIEWS)
+        self.assertIn((date(2024, 10, 13), "FOOD", "Brooklyn", 1, 1), reviews)
+        self.assertIn((date(2024, 9, 1), "SHELTER", "Bronx", 1, 2), reviews)
+        # Outside the window, so not picked up until a full rebuild
+        self.assertNotIn((date(2024, 9, 2), "FOOD", "Brooklyn", 1, 1), reviews)
+        self.assertEqual(
+            self.rows(DailyRollup.SERVICES),
+            {(date(2024, 10, 1), "FOOD", "Brooklyn", 1, 0)},
+        )
+
+    def test_build_skips_while_another_holds_the_lock(self):
+        build_rollups(today=TODAY, repo=self.repo)
+        before = set(DailyRollup.objects.values_list())
+        self.repo.reviews.append(review("food-1", "2024-10-13T20:00:00", 1))
+
+        with patch("analytics.rollups._lock_build", return_value=False):
+            self.assertIsNone(build_rollups(days=2, today=TODAY, repo=self.repo))
+
+        self.assertEqual(self.repo.since, [None])
+        self.assertEqual(set(DailyRollup.objects.values_list()), before)
+
+    def test_platform_summary_reads_the_window(self):
+        build_rollups(today=TODAY, repo=self.repo)
+
+        with self.assertNumQueries(4):
+            summary = platform_summary(days=7, today=TODAY)
+
+        self.assertEqual(summary["dates"][0], "2024-10-07")
+        self.assertEqual(summary["dates"][-1], "2024-10-13")
+        self.assertEqual(
+            summary["categories"],
+            [
+                {"category": "FOOD", "counts": [0] * 5 + [2, 0], "total": 2},
+                {"category": "SHELTER", "counts": [0] * 6 + [1], "total": 1},
+                {"category": "Unknown", "counts": [0] * 6 + [1], "total": 1},
+            ],
+        )
+        self.assertEqual(
+            [
+                (row["borough"], row["reviews"], row["average_rating"])
+                for row in summary["boroughs"]
+            ],
+            [("Brooklyn", 2, 4.0), ("Bronx", 1, 4.0), ("Unknown", 1, 1.0)],
+        )
+        # The September bookmark is counted in the starting total
+        self.assertEqual(summary["bookmark_growth"][0]["total"], 1)
+        self.assertEqual(
+            summary["bookmark_growth"][-2:],
+            [
+                {"date": "2024-10-12", "new": 1, "total": 2},
+                {"date": "2024-10-13", "new": 1, "total": 3},
+            ],
+        )
@@ -0,0 +1,105 @@
+"""
+Memory and construction time of the service and review DTOs.
+
+Services and reviews shaped like the DynamoDB items come from the synthetic
+data generator, in memory only, so no store is involved. Each DTO class
+builds all of them with from_dynamodb_items, timed over repeat runs, and the
+memory it holds is traced per item. The same is measured for a copy of the
+class without __slots__, built by the same from_dynamodb_item code, so a
+single run shows what the slots save.
+"""
+
+import gc
+import statistics
+import time
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+from types import SimpleNamespace
+
+from services.models import ReviewDTO, ServiceDTO
+
+from .generator import Generator, Scale, Zipf
+
+
+def dynamodb_items(services, seed=0):
+    """services service items and their reviews, at the generator's ratios."""
+    scale = Scale()
+    generator = Generator(scale.scaled(services / scale.services), seed=seed)
+    # The generator only needs the users' pk and username
+    users = [
+        SimpleNamespace(pk=pk, username=f"user{pk}")
+        for pk in range(1, generator.scale.users + 1)
+    ]
+    service_items = generator.services(Zipf(generator.rng, users))
+    review_items = generator.reviews(
+        Zipf(generator.rng, service_items), Zipf(generator.rng, users)
+    )
+    return service_items, review_items
+
+
+def without_slots(cls):
+    """A plain dataclass with the fields of cls, and its from_dynamodb_items."""
+    plain = make_dataclass(
+        f"{cls.__name__}WithoutSlots",
+        [
+            (
+                (f.name, f.type)
+                if f.default is MISSING
+                else (f.name, f.type, field(default=f.default))
+            )
+            for f in fields(cls)
+        ],
+    )
+    from_item = cls.from_dynamodb_item.__func__
+    return plain, lambda items: [from_item(plain, item) for item in items]
+
+
+def measure(build, items, repeat=5):
+    durations = []
+    # As timeit does: collections triggered by the allocations would
+    # dominate the timings otherwise
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build(items)
+            durations.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+
+    tracemalloc.start()
+    try:
+        built = build(items)
+        held, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del built
+
+    median = statistics.median(durations)
+    return {
+        "items": len(items),
+        "median_ms": round(median * 1000, 2),
+        "items_per_second": round(len(items) / median) if median else None,
+        "bytes_per_item": round(held / len(items), 1) if items else None,
+    }
+
+
+def run_dto_benchmark(services=10000, seed=0, repeat=5):
+    """Measurements per DTO class, with slots and without."""
+    service_items, review_items = dynamodb_items(services, seed=seed)
+    results = {}
+    for cls, items in [(ServiceDTO, service_items), (ReviewDTO, review_items)]:
+        _, build_without_slots = without_slots(cls)
+        slots = measure(cls.from_dynamodb_items, items, repeat=repeat)
+        plain = measure(build_without_slots, items, repeat=repeat)
+        results[cls.__name__] = {
+            "slots": slots,
+            "without_slots": plain,
+            "memory_saved": (
+                round(1 - slots["bytes_per_item"] / plain["bytes_per_item"], 3)
+                if plain["bytes_per_item"]
+                else None
+            ),
+        }
+    return results
@@ -0,0 +1,516 @@
+"""
+Deterministic synthetic data at NYC scale.
+
+generate() builds users, services, reviews, bookmarks, forum posts,
+comments, notifications and flags from a Scale and a seed, and writes them
+through the same bulk paths the application uses: batch_writer for
+DynamoDB, bulk_create (plus index_posts for forum search and
+rebuild_review_terms for the review word cloud) for the database.
+
+The data is shaped like production rather than uniform:
+
+- services sit in Gaussian clusters around NYC neighbourhoods, with the
+  categories in roughly the proportions of the db-prep CSVs
+- popularity follows a Zipf distribution, so a few services collect most of
+  the reviews and bookmarks, a few users write most of the reviews and
+  posts, and a few providers own most of the services
+- timestamps are spread over the year before today (midnight UTC), so
+  windowed reads such as the analytics rollups see recent data; pass now
+  to pin them
+
+The same Scale, seed and now always produce the same data. Ids the database
+assigns (users, posts, comments) depend on what is already there, so
+generate() expects empty stores.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from itertools import accumulate
+
+import boto3
+from allauth.socialaccount.models import SocialApp
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.sites.models import Site
+
+from accounts.models import CustomUser
+from forum.models import Category, Comment, Notification, Post
+from forum.search import index_posts
+from moderation.models import Flag
+from services.forms import ServiceForm
+from services.terms import rebuild_review_terms
+
+BATCH_SIZE = 500
+ZIPF_EXPONENT = 1.1
+PASSWORD = "generated-password"
+
+# (name, borough, latitude, longitude)
+NEIGHBOURHOODS = [
+    ("Midtown", "Manhattan", 40.7549, -73.9840),
+    ("Lower East Side", "Manhattan", 40.7150, -73.9843),
+    ("Harlem", "Manhattan", 40.8116, -73.9465),
+    ("Washington Heights", "Manhattan", 40.8417, -73.9394),
+    ("Downtown Brooklyn", "Brooklyn", 40.6925, -73.9904),
+    ("Bushwick", "Brooklyn", 40.6944, -73.9213),
+    ("Flatbush", "Brooklyn", 40.6409, -73.9624),
+    ("Coney Island", "Brooklyn", 40.5755, -73.9707),
+    ("Jamaica", "Queens", 40.7027, -73.7890),
+    ("Flushing", "Queens", 40.7675, -73.8331),
+    ("Astoria", "Queens", 40.7644, -73.9235),
+    ("Fordham", "Bronx", 40.8615, -73.8904),
+    ("Mott Haven", "Bronx", 40.8091, -73.9229),
+    ("St. George", "Staten Island", 40.6437, -74.0736),
+]
+CLUSTER_SPREAD = 0.012  # degrees, about a kilometre
+NYC_LAT = (40.4774, 40.9176)
+NYC_LON = (-74.2591, -73.7004)
+
+# Stored category codes, as ServiceForm and the db-prep loaders write them
+CATEGORY_CODES = ServiceForm.CATEGORY_TRANSLATION
+CATEGORIES = [
+    (CATEGORY_CODES["Food Pantry"], 40),
+    (CATEGORY_CODES["Restroom"], 30),
+    (CATEGORY_CODES["Homeless Shelter"], 18),
+    (CATEGORY_CODES["Mental Health Center"], 12),
+]
+NAME_WORDS = {
+    "FOOD": ["Food Pantry", "Community Kitchen", "Food Bank", "Soup Kitchen"],
+    "RESTROOM": ["Public Restroom", "Park Comfort Station", "Restroom"],
+    "SHELTER": ["Shelter", "Drop-In Center", "Safe Haven", "Family Shelter"],
+    "MENTAL": ["Counseling Center", "Mental Health Clinic", "Wellness"],
+}
+STREETS = ["Broadway", "Main St", "Atlantic Ave", "Grand St", "Park Ave", "1st Ave"]
+REVIEW_PHRASES = {
+    1: ["closed when it should be open", "staff were rude", "dirty and unsafe"],
+    2: ["long wait", "ran out of food early", "hard to find the entrance"],
+    3: ["okay overall", "crowded but fine", "hours could be longer"],
+    4: ["helpful staff", "clean and quick", "easy to get to"],
+    5: ["life saver", "friendly and welcoming", "highly recommend"],
+}
+STAR_WEIGHTS = [8, 7, 15, 30, 40]  # reviews skew positive
+FORUM_CATEGORIES = ["General", "Food Assistance", "Housing", "Mental Health", "Tips"]
+POST_TOPICS = [
+    "Where to find a hot meal near {place}",
+    "Shelter intake process in {place}",
+    "Clean restrooms around {place}?",
+    "Free counseling in {place}",
+    "Volunteering opportunities in {place}",
+]
+COMMENT_PHRASES = [
+    "Thanks, this helped a lot.",
+    "I went last week and it was open.",
+    "Call ahead, the hours changed.",
+    "Same experience here.",
+    "There is another one two blocks away.",
+]
+
+
+@dataclass(frozen=True)
+class Scale:
+    """How much of everything to generate. scaled() multiplies it all."""
+
+    services: int = 1000
+    providers: int = 50
+    users: int = 1000
+    admins: int = 3
+    reviews: int = 3000
+    bookmarks: int = 2000
+    posts: int = 300
+    comments: int = 1200
+    notifications: int = 1000
+    flags: int = 60
+
+    def scaled(self, factor):
+        # There are only ever a handful of admins
+        return replace(
+            self,
+            **{
+                f.name: max(1, round(getattr(self, f.name) * factor))
+                for f in fields(self)
+                if f.name != "admins"
+            },
+        )
+
+
+@dataclass
+class Dataset:
+    """The generated users and the keys of the busiest content."""
+
+    users: list
+    providers: list
+    admins: list
+    service_ids: list  # most popular first
+    counts: dict = field(default_factory=dict)
+    now: datetime = None  # the newest possible timestamp
+
+
+class Zipf:
+    """Draws items with probability proportional to 1 / rank ** exponent."""
+
+    def __init__(self, rng, items, exponent=ZIPF_EXPONENT):
+        self.rng = rng
+        self.items = list(items)
+        self.cum_weights = list(
+            accumulate(1 / rank**exponent for rank in range(1, len(self.items) + 1))
+        )
+
+    def draw(self, k=1):
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.draw()[0]
+
+
+class Generator:
+    def __init__(self, scale=Scale(), seed=0, now=None):
+        self.scale = scale
+        self.rng = random.Random(seed)
+        self.now = now or datetime.now(timezone.utc).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+    def uuid(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def timestamp(self, days=365):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+
+    def coordinate(self, centre, bounds):
+        value = self.rng.gauss(centre, CLUSTER_SPREAD)
+        return Decimal(str(round(min(max(value, bounds[0]), bounds[1]), 6)))
+
+    # Database
+
+    def users(self):
+        password = make_password(PASSWORD)
+        users = [
+            CustomUser(
+                username=f"{kind}{i}",
+                email=f"{kind}{i}@example.com",
+                first_name=kind.title(),
+                last_name=str(i),
+                user_type=user_type,
+                is_superuser=kind == "admin",
+                is_staff=kind == "admin",
+                password=password,
+            )
+            for kind, user_type, count in [
+                ("user", "user", self.scale.users),
+                ("provider", "service_provider", self.scale.providers),
+                ("admin", "user", self.scale.admins),
+            ]
+            for i in range(count)
+        ]
+        CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        seekers = users[: self.scale.users]
+        providers = users[self.scale.users : self.scale.users + self.scale.providers]
+        admins = users[self.scale.users + self.scale.providers :]
+        return seekers, providers, admins
+
+    def social_app(self):
+        """
+        The login templates link to Google login, which needs a SocialApp
+        for the current site; a placeholder lets them render locally.
+        """
+        site, _ = Site.objects.get_or_create(
+            id=settings.SITE_ID, defaults={"domain": "localhost", "name": "localhost"}
+        )
+        app, _ = SocialApp.objects.get_or_create(
+            provider="google",
+            defaults={"name": "Google", "client_id": "generated", "secret": ""},
+        )
+        app.sites.add(site)
+
+    def forum(self, authors):
+        categories = Category.objects.bulk_create(
+            Category(name=name, description=f"{name} discussions")
+            for name in FORUM_CATEGORIES
+        )
+        neighbourhoods = [name for name, *_ in NEIGHBOURHOODS]
+
+        posts = [
+            Post(
+                title=self.rng.choice(POST_TOPICS).format(
+                    place=self.rng.choice(neighbourhoods)
+                ),
+                content=" ".join(self.rng.choices(COMMENT_PHRASES, k=4)),
+                author=author,
+                category=self.rng.choice(categories),
+                is_closed=self.rng.random() < 0.05,
+            )
+            for author in authors.draw(self.scale.posts)
+        ]
+        Post.objects.bulk_create(posts, batch_size=BATCH_SIZE)
+        index_posts(posts)
+
+        # Busy threads collect most of the comments
+        threads = Zipf(self.rng, posts)
+        comments = [
+            Comment(
+                post=post,
+                author=author,
+                content=self.rng.choice(COMMENT_PHRASES),
+            )
+            for post, author in zip(
+                threads.draw(self.scale.comments), authors.draw(self.scale.comments)
+            )
+        ]
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+
+        # auto_now_add stamps everything with the time of the insert
+        for post in posts:
+            post.created_at = post.updated_at = self.timestamp()
+        for comment in comments:
+            comment.created_at = comment.updated_at = max(
+                comment.post.created_at, self.timestamp()
+            )
+        Post.objects.bulk_update(
+            posts, ["created_at", "updated_at"], batch_size=BATCH_SIZE
+        )
+        Comment.objects.bulk_update(
+            comments, ["created_at", "updated_at"], batch_size=BATCH_SIZE
+        )
+        return posts, comments
+
+    def notifications(self, comments):
+        # The comment notifications forum.views sends to post authors
+        candidates = [c for c in comments if c.author_id != c.post.author_id]
+        chosen = self.rng.sample(
+            candidates, min(self.scale.notifications, len(candidates))
+        )
+        notifications = [
+            Notification(
+                recipient_id=comment.post.author_id,
+                sender_id=comment.author_id,
+                post=comment.post,
+                comment=comment,
+                message=f"{comment.author.username} commented on your post: "
+                f"{comment.post.title}"[:255],
+                notification_type="comment",
+                is_read=self.rng.random() < 0.7,
+            )
+            for comment in chosen
+        ]
+        Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+        for notification, comment in zip(notifications, chosen):
+            notification.created_at = comment.created_at
+        Notification.objects.bulk_update(
+            notifications, ["created_at"], batch_size=BATCH_SIZE
+        )
+        return notifications
+
+    def flags(self, flaggers, posts, comments, reviews, admins):
+        content = (
+            [
+                ("FORUM POST", post.pk, post.title, post.content, post.author.username)
+                for post in posts
+            ]
+            + [
+                (
+                    "FORUM COMMENT",
+                    comment.pk,
+                    "",
+                    comment.content,
+                    comment.author.username,
+                )
+                for comment in comments
+            ]
+            + [
+                (
+                    "REVIEW",
+                    review["ReviewId"],
+                    "",
+                    review["RatingMessage"],
+                    review["Username"],
+                )
+                for review in reviews
+            ]
+        )
+        self.rng.shuffle(content)
+        # Offending content tends to be flagged by several people
+        targets = Zipf(self.rng, content)
+
+        flags = {}
+        for _ in range(self.scale.flags * 3):
+            if len(flags) >= self.scale.flags:
+                break
+            content_type, object_id, title, preview, author = targets.one()
+            flagger = flaggers.one()
+            key = (content_type, str(object_id), flagger.pk)
+            if key in flags:
+                continue
+            status = self.rng.choices(
+                ["PENDING", "DISMISSED", "REVOKED"], weights=[60, 30, 10]
+            )[0]
+            flags[key] = Flag(
+                content_type=content_type,
+                object_id=str(object_id),
+                flagger=flagger,
+                reason=self.rng.choice(Flag.FLAG_REASONS)[0],
+                status=status,
+                reviewed_by=(
+                    self.rng.choice(admins) if status != "PENDING" and admins else None
+                ),
+                reviewed_at=self.now if status != "PENDING" else None,
+                content_title=title,
+                content_preview=preview,
+                content_author=author,
+            )
+        flags = list(flags.values())
+        Flag.objects.bulk_create(flags, batch_size=BATCH_SIZE)
+
+        # One unread flag_admin notification per admin while flags are pending
+        notifications = []
+        if any(flag.status == "PENDING" for flag in flags):
+            notifications = Notification.objects.bulk_create(
+                Notification(
+                    recipient=admin,
+                    sender=flags[0].flagger,
+                    message="New content has been flagged for review",
+                    notification_type="flag_admin",
+                )
+                for admin in admins
+            )
+        return flags, notifications
+
+    # DynamoDB
+
+    def services(self, providers):
+        categories, weights = zip(*CATEGORIES)
+        services = []
+        for _ in range(self.scale.services):
+            name, borough, lat, lon = self.rng.choice(NEIGHBOURHOODS)
+            category = self.rng.choices(categories, weights=weights)[0]
+            status = self.rng.choices(
+                ["APPROVED", "PENDING_APPROVAL", "REJECTED"], weights=[92, 6, 2]
+            )[0]
+            created = self.timestamp(days=730)
+            services.append(
+                {
+                    "Id": self.uuid(),
+                    "Name": f"{name} {self.rng.choice(NAME_WORDS[category])}",
+                    "Address": f"{self.rng.randrange(1, 2000)} "
+                    f"{self.rng.choice(STREETS)}, {borough}, NY",
+                    "Lat": self.coordinate(lat, NYC_LAT),
+                    "Log": self.coordinate(lon, NYC_LON),
+                    "Ratings": Decimal("0"),
+                    "Description": {
+                        "Borough": borough,
+                        "Phone": f"212-555-{self.rng.randrange(10000):04d}",
+                    },
+                    "Category": category,
+                    "ProviderId": str(providers.one().pk),
+                    "ServiceStatus": status,
+                    "CreatedTimestamp": created.isoformat(),
+                    "ApprovedTimestamp": (
+                        (created + timedelta(days=1)).isoformat()
+                        if status == "APPROVED"
+                        else "NONE"
+                    ),
+                    "IsActive": self.rng.random() < 0.95,
+                    "Announcement": "",
+                    "ImageURL": "",
+                }
+            )
+        return services
+
+    def reviews(self, services, reviewers):
+        reviews = []
+        for service in services.draw(self.scale.reviews):
+            user = reviewers.one()
+            stars = self.rng.choices(range(1, 6), weights=STAR_WEIGHTS)[0]
+            review = {
+                "ReviewId": self.uuid(),
+                "ServiceId": service["Id"],
+                "UserId": str(user.pk),
+                "Username": user.username,
+                "RatingStars": str(stars),
+                "RatingMessage": self.rng.choice(REVIEW_PHRASES[stars]),
+                "Timestamp": self.timestamp().isoformat(),
+            }
+            if self.rng.random() < 0.3:
+                review["ResponseText"] = "Thank you for the feedback"
+                review["RespondedAt"] = self.timestamp(days=30).isoformat()
+            reviews.append(review)
+        return reviews
+
+    def bookmarks(self, services, users):
+        bookmarks = {}
+        for _ in range(self.scale.bookmarks * 2):
+            if len(bookmarks) >= self.scale.bookmarks:
+                break
+            key = (str(users.one().pk), services.one()["Id"])
+            if key not in bookmarks:
+                bookmarks[key] = {
+                    "BookmarkId": self.uuid(),
+                    "UserId": key[0],
+                    "ServiceId": key[1],
+                    "timestamp": self.timestamp().isoformat(),
+                }
+        return list(bookmarks.values())
+
+    def generate(self):
+        self.social_app()
+        seekers, providers, admins = self.users()
+        # Zipf ranks follow creation order: user0 is the most active
+        active_users = Zipf(self.rng, seekers)
+        busy_providers = Zipf(self.rng, providers)
+
+        services = self.services(busy_providers)
+        popular_services = Zipf(self.rng, services)
+        reviews = self.reviews(popular_services, active_users)
+        bookmarks = self.bookmarks(popular_services, active_users)
+
+        # Ratings are the mean of a service's reviews, as update_service_rating
+        # keeps them
+        stars = {}
+        for review in reviews:
+            stars.setdefault(review["ServiceId"], []).append(int(review["RatingStars"]))
+        for service in services:
+            ratings = stars.get(service["Id"])
+            if ratings:
+                service["Ratings"] = Decimal(str(round(sum(ratings) / len(ratings), 1)))
+
+        posts, comments = self.forum(active_users)
+        notifications = self.notifications(comments)
+        flags, admin_notifications = self.flags(
+            active_users, posts, comments, reviews, admins
+        )
+
+        dynamodb = boto3.resource("dynamodb", region_name=settings.AWS_REGION)
+        for table_name, items in [
+            (settings.DYNAMODB_TABLE_SERVICES, services),
+            (settings.DYNAMODB_TABLE_REVIEWS, reviews),
+            (settings.DYNAMODB_TABLE_BOOKMARKS, bookmarks),
+        ]:
+            with dynamodb.Table(table_name).batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+        # The word cloud's term counts, as review writes keep them
+        rebuild_review_terms(reviews)
+
+        return Dataset(
+            users=seekers,
+            providers=providers,
+            admins=admins,
+            service_ids=[service["Id"] for service in services],
+            counts={
+                "users": len(seekers) + len(providers) + len(admins),
+                "services": len(services),
+                "reviews": len(reviews),
+                "bookmarks": len(bookmarks),
+                "posts": len(posts),
+                "comments": len(comments),
+                "notifications": len(notifications) + len(admin_notifications),
+                "flags": len(flags),
+            },
+            now=self.now,
+        )
+
+
+def generate(scale=Scale(), seed=0, now=None):
+    """Generate and write a dataset into the (empty) configured stores."""
+    return Generator(scale, seed, now).generate()
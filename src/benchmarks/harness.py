@@ -0,0 +1,166 @@
+"""
+Timing of the hot views against a seeded catalog.
+
+Each scenario is one GET issued through the Django test client, so the whole
+stack (middleware, view, repositories, templates) is measured. The request
+cost middleware's entry for every run supplies the DynamoDB and SQL counts
+next to the wall-clock times. Results are plain dicts keyed by catalog size
+and scenario name, so two JSON files can be compared with compare_results().
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from public_service_finder.utils.request_cost import recent_request_costs
+
+ANALYTICS_VIEWS = [
+    "bookmarks_over_time",
+    "reviews_over_time",
+    "average_rating_over_time",
+    "rating_distribution",
+    "recent_reviews",
+    "response_rate",
+    "review_word_cloud",
+    "service_category_distribution",
+    "user_analytics",
+]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    user: str  # "anonymous", "seeker" or "provider"
+    url: str
+
+
+def scenarios(catalog):
+    home = reverse("home")
+    result = [
+        Scenario("home", "anonymous", home),
+        Scenario("home_search", "anonymous", f"{home}?search=Community"),
+        Scenario("home_category", "anonymous", f"{home}?type=FOOD"),
+        Scenario("home_radius", "anonymous", f"{home}?radius=1"),
+        Scenario("home_sort_rating", "anonymous", f"{home}?sort=rating"),
+        Scenario("home_seeker", "seeker", home),
+        Scenario(
+            "get_reviews",
+            "anonymous",
+            reverse("get_reviews", args=[catalog.busiest_service_id]),
+        ),
+        Scenario("profile_seeker", "seeker", reverse("profile_view")),
+        Scenario("profile_provider", "provider", reverse("profile_view")),
+        Scenario("dashboard", "provider", reverse("services:dashboard")),
+    ]
+    result += [
+        Scenario(f"analytics_{name}", "provider", reverse(f"services:{name}"))
+        for name in ANALYTICS_VIEWS
+    ]
+    return result
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_scenario(client, scenario, repeat=5, warmup=1):
+    """Time repeat GETs of the scenario's URL after warmup untimed ones."""
+    for _ in range(warmup):
+        client.get(scenario.url)
+
+    durations = []
+    cost = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(scenario.url)
+        durations.append((time.perf_counter() - start) * 1000)
+        entries = recent_request_costs.entries()
+        cost = entries[-1] if entries else {}
+
+    return {
+        "url": scenario.url,
+        "user": scenario.user,
+        "status": response.status_code,
+        "runs": repeat,
+        "min_ms": round(min(durations), 2),
+        "median_ms": round(statistics.median(durations), 2),
+        "p95_ms": round(percentile(durations, 95), 2),
+        "mean_ms": round(statistics.fmean(durations), 2),
+        "dynamodb_calls": cost.get("dynamodb_calls", 0),
+        "dynamodb_capacity": cost.get("dynamodb_capacity", 0.0),
+        "sql_queries": cost.get("sql_queries", 0),
+    }
+
+
+def run_scenarios(catalog, repeat=5, warmup=1, only=None):
+    clients = {"anonymous": Client(), "seeker": Client(), "provider": Client()}
+    clients["seeker"].force_login(catalog.seeker)
+    clients["provider"].force_login(catalog.provider)
+
+    results = {}
+    for scenario in scenarios(catalog):
+        if only and scenario.name not in only:
+            continue
+        results[scenario.name] = run_scenario(
+            clients[scenario.user], scenario, repeat=repeat, warmup=warmup
+        )
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def compare_results(baseline, current):
+    """
+    Median time of every (size, scenario) present in both result sets, with
+    the relative change; positive percentages are slowdowns.
+    """
+    rows = []
+    for size, scenarios_now in current["sizes"].items():
+        scenarios_before = baseline["sizes"].get(size, {})
+        for name, now in scenarios_now["scenarios"].items():
+            before = scenarios_before.get("scenarios", {}).get(name)
+            if before is None:
+                continue
+            change = None
+            if before["median_ms"]:
+                change = (now["median_ms"] - before["median_ms"]) / before["median_ms"]
+            rows.append(
+                {
+                    "size": size,
+                    "scenario": name,
+                    "before_ms": before["median_ms"],
+                    "after_ms": now["median_ms"],
+                    "change": change,
+                    "dynamodb_calls": (before["dynamodb_calls"], now["dynamodb_calls"]),
+                    "sql_queries": (before["sql_queries"], now["sql_queries"]),
+                }
+            )
+    return rows
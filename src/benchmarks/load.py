@@ -0,0 +1,262 @@
+"""
+Load tests: weighted user journeys against a running server.
+
+Each virtual user is a thread with its own HTTP session. It repeatedly picks
+a journey by weight, runs its requests and then waits a think time. Every
+request is recorded under an endpoint name, and LoadStats reports the
+throughput and latency percentiles of each endpoint.
+
+The journeys are the real request mixes: anonymous home browsing with
+radius and sort, logged-in bookmark toggling, review submission, provider
+dashboard loads and forum reading. The logins use the users that
+benchmarks.generator creates.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import requests
+
+from .generator import PASSWORD
+from .harness import ANALYTICS_VIEWS, percentile
+
+DEFAULT_MIX = {"browse": 50, "forum": 20, "bookmark": 15, "provider": 10, "review": 5}
+RADII = ["1", "2", "5", "10"]
+SORTS = ["distance", "rating"]
+REVIEW_MESSAGES = ["Helpful staff", "Long wait today", "Clean and quick"]
+
+
+@dataclass
+class Fixtures:
+    """What the journeys need to know about the data behind the server."""
+
+    service_ids: list
+    post_ids: list
+    category_ids: list
+    seekers: list  # usernames
+    providers: list  # emails
+
+
+class LoadStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._durations = defaultdict(list)
+        self._errors = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def record(self, endpoint, duration, ok):
+        with self._lock:
+            self._durations[endpoint].append(duration)
+            if not ok:
+                self._errors[endpoint] += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    def report(self):
+        """Requests, errors, throughput and latency percentiles per endpoint."""
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+            errors = dict(self._errors)
+
+        def row(values, error_count):
+            values_ms = [value * 1000 for value in values]
+            return {
+                "requests": len(values),
+                "errors": error_count,
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": round(percentile(values_ms, 50), 1),
+                "p90_ms": round(percentile(values_ms, 90), 1),
+                "p95_ms": round(percentile(values_ms, 95), 1),
+                "p99_ms": round(percentile(values_ms, 99), 1),
+                "max_ms": round(max(values_ms), 1),
+            }
+
+        endpoints = {
+            name: row(values, errors.get(name, 0))
+            for name, values in sorted(durations.items())
+        }
+        all_values = [value for values in durations.values() for value in values]
+        return {
+            "duration_s": round(elapsed, 1),
+            "endpoints": endpoints,
+            "total": row(all_values, sum(errors.values())) if all_values else None,
+        }
+
+
+class VirtualUser:
+    def __init__(self, host, fixtures, stats, rng, timeout=30):
+        self.host = host.rstrip("/")
+        self.fixtures = fixtures
+        self.stats = stats
+        self.rng = rng
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.logged_in_as = None
+
+    def request(self, endpoint, method, path, **kwargs):
+        headers = kwargs.pop("headers", {})
+        if method != "GET":
+            headers["X-CSRFToken"] = self.session.cookies.get("csrftoken", "")
+            headers["Referer"] = self.host + path
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                self.host + path,
+                headers=headers,
+                timeout=self.timeout,
+                **kwargs,
+            )
+            ok = response.status_code < 400
+        except requests.RequestException:
+            response, ok = None, False
+        self.stats.record(endpoint, time.perf_counter() - start, ok)
+        return response
+
+    def login(self, kind):
+        """Log in as a random generated seeker or provider, once per session."""
+        if self.logged_in_as == kind:
+            return True
+        self.session.cookies.clear()
+        if kind == "seeker":
+            path = "/accounts/login/user/"
+            form = {"username": self.rng.choice(self.fixtures.seekers)}
+        else:
+            path = "/accounts/login/service_provider/"
+            form = {"email": self.rng.choice(self.fixtures.providers)}
+        self.request("login_page", "GET", path)
+        form["password"] = PASSWORD
+        form["csrfmiddlewaretoken"] = self.session.cookies.get("csrftoken", "")
+        response = self.request("login", "POST", path, data=form)
+        # A successful login redirects away from the login page
+        if response is not None and not response.url.endswith(path):
+            self.logged_in_as = kind
+        else:
+            self.logged_in_as = None
+        return self.logged_in_as == kind
+
+    def home_query(self):
+        return {
+            "radius": self.rng.choice(RADII),
+            "sort": self.rng.choice(SORTS),
+            "page": self.rng.choice(["1", "1", "1", "2"]),
+        }
+
+    # Journeys
+
+    def browse(self):
+        if self.logged_in_as:
+            self.session.cookies.clear()
+            self.logged_in_as = None
+        self.request("home", "GET", "/home/", params=self.home_query())
+        for service_id in self.rng.sample(
+            self.fixtures.service_ids, min(2, len(self.fixtures.service_ids))
+        ):
+            self.request("get_reviews", "GET", f"/home/get_reviews/{service_id}/")
+
+    def bookmark(self):
+        if not self.login("seeker"):
+            return
+        self.request("home", "GET", "/home/", params=self.home_query())
+        service_id = self.rng.choice(self.fixtures.service_ids)
+        for action in ("add", "remove"):
+            self.request(
+                "toggle_bookmark",
+                "POST",
+                "/home/toggle_bookmark/",
+                json={"service_id": service_id, "action": action},
+            )
+
+    def review(self):
+        if not self.login("seeker"):
+            return
+        service_id = self.rng.choice(self.fixtures.service_ids)
+        self.request("get_reviews", "GET", f"/home/get_reviews/{service_id}/")
+        self.request(
+            "submit_review",
+            "POST",
+            "/home/submit_review/",
+            json={
+                "service_id": service_id,
+                "rating": self.rng.randint(1, 5),
+                "message": self.rng.choice(REVIEW_MESSAGES),
+            },
+        )
+
+    def provider(self):
+        if not self.login("provider"):
+            return
+        self.request("dashboard", "GET", "/services/dashboard/")
+        for name in ANALYTICS_VIEWS:
+            self.request(f"analytics_{name}", "GET", f"/services/analytics/{name}/")
+
+    def forum(self):
+        self.request("forum_categories", "GET", "/forum/")
+        if self.fixtures.category_ids:
+            category_id = self.rng.choice(self.fixtures.category_ids)
+            self.request("forum_category", "GET", f"/forum/category/{category_id}/")
+        if self.fixtures.post_ids:
+            post_id = self.rng.choice(self.fixtures.post_ids)
+            self.request("forum_post", "GET", f"/forum/post/{post_id}/")
+
+    def run(self, mix, stop_at, think_time):
+        journeys, weights = zip(*mix.items())
+        while time.monotonic() < stop_at:
+            getattr(self, self.rng.choices(journeys, weights=weights)[0])()
+            if think_time:
+                time.sleep(self.rng.uniform(0, 2 * think_time))
+
+
+def parse_mix(value):
+    """Parse "browse=50,forum=20" into a journey -> weight dict."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown journey: {name}")
+        mix[name] = float(weight) if weight else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for {name}")
+    if not any(mix.values()):
+        raise ValueError("At least one journey needs a positive weight")
+    return mix
+
+
+def run_load(
+    host,
+    fixtures,
+    users=10,
+    duration=60,
+    ramp_up=0,
+    think_time=1.0,
+    mix=None,
+    seed=0,
+):
+    """
+    Run users virtual users against host for duration seconds, starting
+    them evenly over ramp_up seconds. Returns LoadStats.report().
+    """
+    mix = mix or DEFAULT_MIX
+    stats = LoadStats()
+    stop_at = time.monotonic() + duration
+    threads = []
+    for i in range(users):
+        user = VirtualUser(host, fixtures, stats, random.Random(seed + i))
+        thread = threading.Thread(
+            target=user.run, args=(mix, stop_at, think_time), daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+        if ramp_up and i < users - 1:
+            time.sleep(ramp_up / users)
+    for thread in threads:
+        thread.join()
+    stats.stop()
+    return stats.report()
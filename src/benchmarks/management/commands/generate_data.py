@@ -0,0 +1,67 @@
+import json
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.generator import Scale, generate
+from benchmarks.stores import create_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the local stores (the SQLite benchmark database and DynamoDB "
+        "Local) with deterministic synthetic data. Existing local data is "
+        "replaced."
+    )
+    # Nothing may build a boto3 client before the endpoint is chosen
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help=f"Multiply every default count by this (1 = {Scale().services} "
+            "services)",
+        )
+        for f in fields(Scale):
+            parser.add_argument(
+                f"--{f.name}", type=int, help=f"Number of {f.name} (overrides --scale)"
+            )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    def handle(self, *args, **options):
+        # settings.LOCAL_STORES points both stores at local stand-ins for
+        # this command; refuse to run if that has been changed
+        if connection.vendor != "sqlite" or not settings.LOCAL_STORES:
+            raise CommandError("generate_data only writes to the local stores")
+        if options["scale"] <= 0:
+            raise CommandError("--scale must be positive")
+        for f in fields(Scale):
+            if options[f.name] is not None and options[f.name] < 1:
+                raise CommandError(f"--{f.name} must be at least 1")
+
+        scale = Scale().scaled(options["scale"])
+        overrides = {
+            f.name: options[f.name]
+            for f in fields(Scale)
+            if options[f.name] is not None
+        }
+        scale = Scale(**{**asdict(scale), **overrides})
+
+        database = Path(settings.DATABASES["default"]["NAME"])
+        self.stderr.write(
+            f"Writing to {settings.LOCAL_DYNAMODB_ENDPOINT} and {database}"
+        )
+        # A new database rather than a flush: the forum search table isn't a
+        # model, so flush would leave stale entries behind
+        connection.close()
+        database.unlink(missing_ok=True)
+        call_command("migrate", interactive=False, verbosity=0)
+        create_tables()
+        dataset = generate(scale, seed=options["seed"])
+        self.stdout.write(json.dumps(dataset.counts, indent=2))
@@ -0,0 +1,137 @@
+import json
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from benchmarks.harness import compare_results, environment, run_scenarios
+from benchmarks.seed import seed_catalog
+from benchmarks.stores import create_tables, local_dynamodb
+from public_service_finder.utils.request_cost import recent_request_costs
+from services.cache import service_cache
+
+
+def _sizes(value):
+    try:
+        sizes = [int(size) for size in value.split(",") if size.strip()]
+    except ValueError:
+        raise CommandError(f"Invalid --sizes: {value}")
+    if not sizes or min(sizes) < 1:
+        raise CommandError(f"Invalid --sizes: {value}")
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views against synthetic catalogs seeded into a local "
+        "DynamoDB stand-in and a throwaway SQLite database."
+    )
+    # The URLconf (and the boto3 clients some views build at import) must not
+    # be loaded before the DynamoDB stand-in is in place
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000",
+            help="Comma-separated catalog sizes, in services (e.g. 1000,10000,100000)",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed for the catalog"
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed requests per scenario"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=1, help="Untimed requests per scenario"
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run this scenario (may be repeated)",
+        )
+        parser.add_argument(
+            "--endpoint-url",
+            help="Use DynamoDB Local at this URL instead of moto",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+        parser.add_argument(
+            "--compare", help="Compare against the JSON results of an earlier run"
+        )
+
+    def handle(self, *args, **options):
+        sizes = _sizes(options["sizes"])
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+
+        results = {
+            "environment": environment(),
+            "options": {
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+                "warmup": options["warmup"],
+                "dynamodb": options["endpoint_url"] or "moto",
+            },
+            "sizes": {},
+        }
+
+        setup_test_environment()
+        try:
+            with local_dynamodb(options["endpoint_url"]):
+                for size in sizes:
+                    results["sizes"][str(size)] = self._run_size(size, options)
+        finally:
+            teardown_test_environment()
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
+
+        if baseline is not None:
+            self._write_comparison(compare_results(baseline, results))
+
+    def _run_size(self, size, options):
+        # Every size starts from a new database and empty tables
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stderr.write(f"Seeding {size} services...")
+            cache.clear()
+            service_cache.clear()
+            recent_request_costs.clear()
+            create_tables()
+            start = time.perf_counter()
+            catalog = seed_catalog(size, seed=options["seed"])
+            seed_seconds = time.perf_counter() - start
+
+            self.stderr.write(f"Timing {size} services...")
+            return {
+                "counts": catalog.counts,
+                "seed_seconds": round(seed_seconds, 1),
+                "scenarios": run_scenarios(
+                    catalog,
+                    repeat=options["repeat"],
+                    warmup=options["warmup"],
+                    only=options["scenarios"],
+                ),
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _write_comparison(self, rows):
+        self.stderr.write(
+            f"{'size':>8} {'scenario':<42} {'before':>10} {'after':>10} {'change':>8}"
+        )
+        for row in rows:
+            change = "n/a" if row["change"] is None else f"{row['change']:+.1%}"
+            self.stderr.write(
+                f"{row['size']:>8} {row['scenario']:<42} "
+                f"{row['before_ms']:>8.1f}ms {row['after_ms']:>8.1f}ms {change:>8}"
+            )
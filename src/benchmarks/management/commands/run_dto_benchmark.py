@@ -0,0 +1,48 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.dtos import run_dto_benchmark
+from benchmarks.harness import environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the memory and construction time of ServiceDTO and ReviewDTO "
+        "over synthetic DynamoDB items, against copies without __slots__."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--services",
+            type=int,
+            default=10000,
+            help="Number of services (reviews scale with it)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Timed runs per measurement"
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file")
+
+    def handle(self, *args, **options):
+        if options["services"] < 1 or options["repeat"] < 1:
+            raise CommandError("--services and --repeat must be at least 1")
+
+        results = {
+            "environment": environment(),
+            "options": {
+                "services": options["services"],
+                "seed": options["seed"],
+                "repeat": options["repeat"],
+            },
+            "dtos": run_dto_benchmark(
+                options["services"], seed=options["seed"], repeat=options["repeat"]
+            ),
+        }
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        else:
+            self.stdout.write(output)
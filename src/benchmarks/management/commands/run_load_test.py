@@ -0,0 +1,132 @@
+import json
+
+import boto3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import CustomUser
+from benchmarks.harness import environment
+from benchmarks.load import Fixtures, parse_mix, run_load
+from forum.models import Category, Post
+
+FIXTURE_LIMIT = 500
+
+
+def load_fixtures():
+    """Ids and logins of the generated data in the local stores."""
+    services = boto3.resource("dynamodb", region_name=settings.AWS_REGION).Table(
+        settings.DYNAMODB_TABLE_SERVICES
+    )
+    response = services.scan(ProjectionExpression="Id", Limit=FIXTURE_LIMIT)
+    users = CustomUser.objects.filter(is_superuser=False)
+    return Fixtures(
+        service_ids=[item["Id"] for item in response.get("Items", [])],
+        post_ids=list(Post.objects.values_list("id", flat=True)[:FIXTURE_LIMIT]),
+        category_ids=list(Category.objects.values_list("id", flat=True)),
+        seekers=list(
+            users.filter(user_type="user").values_list("username", flat=True)[
+                :FIXTURE_LIMIT
+            ]
+        ),
+        providers=list(
+            users.filter(user_type="service_provider").values_list("email", flat=True)[
+                :FIXTURE_LIMIT
+            ]
+        ),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Run weighted user journeys against a server backed by the local "
+        "stores (see generate_data) and report throughput and latency "
+        "percentiles per endpoint."
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--host", default="http://localhost:8080", help="Server to load"
+        )
+        parser.add_argument(
+            "--users", type=int, default=10, help="Concurrent virtual users"
+        )
+        parser.add_argument(
+            "--duration", type=float, default=60, help="Seconds to run for"
+        )
+        parser.add_argument(
+            "--ramp-up",
+            type=float,
+            default=0,
+            help="Seconds over which the virtual users are started",
+        )
+        parser.add_argument(
+            "--think-time",
+            type=float,
+            default=1.0,
+            help="Mean pause in seconds between journeys (0 for none)",
+        )
+        parser.add_argument(
+            "--mix",
+            default="browse=50,forum=20,bookmark=15,provider=10,review=5",
+            help="Journey weights",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if not settings.LOCAL_STORES:
+            raise CommandError("run_load_test only reads the local stores")
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options["users"] < 1 or options["duration"] <= 0:
+            raise CommandError("--users and --duration must be positive")
+
+        fixtures = load_fixtures()
+        if not fixtures.service_ids or not fixtures.seekers:
+            raise CommandError("No generated data found; run generate_data first")
+
+        report = run_load(
+            options["host"],
+            fixtures,
+            users=options["users"],
+            duration=options["duration"],
+            ramp_up=options["ramp_up"],
+            think_time=options["think_time"],
+            mix=mix,
+            seed=options["seed"],
+        )
+        report = {
+            "environment": environment(),
+            "options": {
+                "host": options["host"],
+                "users": options["users"],
+                "duration": options["duration"],
+                "think_time": options["think_time"],
+                "mix": mix,
+            },
+            **report,
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self._write_table(report)
+
+    def _write_table(self, report):
+        self.stdout.write(
+            f"{'endpoint':<42} {'reqs':>6} {'errs':>5} {'rps':>7} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8}"
+        )
+        rows = list(report["endpoints"].items())
+        if report["total"]:
+            rows.append(("TOTAL", report["total"]))
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<42} {row['requests']:>6} {row['errors']:>5} "
+                f"{row['rps']:>7.2f} {row['p50_ms']:>6.1f}ms "
+                f"{row['p95_ms']:>6.1f}ms {row['p99_ms']:>6.1f}ms"
+            )
@@ -0,0 +1,39 @@
+"""
+Catalogs for the benchmarks.
+
+seed_catalog() generates a dataset whose size is given in services (every
+other count grows with it, see benchmarks.generator) and picks the users
+and service the scenarios hit. Because popularity is Zipf-distributed these
+are the heaviest ones: the user with the most bookmarks and reviews, the
+provider with the most services and the most reviewed service.
+"""
+
+from dataclasses import dataclass, field
+
+from accounts.models import CustomUser
+
+from .generator import Scale, generate
+
+
+@dataclass
+class Catalog:
+    """What seed_catalog() created that the scenarios need to refer to."""
+
+    size: int
+    seeker: CustomUser
+    provider: CustomUser
+    busiest_service_id: str
+    counts: dict = field(default_factory=dict)
+
+
+def seed_catalog(size, seed=0):
+    """Seed the (empty) local stores with a catalog of size services."""
+    scale = Scale()
+    dataset = generate(scale.scaled(size / scale.services), seed=seed)
+    return Catalog(
+        size=size,
+        seeker=dataset.users[0],
+        provider=dataset.providers[0],
+        busiest_service_id=dataset.service_ids[0],
+        counts=dataset.counts,
+    )
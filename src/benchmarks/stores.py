@@ -0,0 +1,122 @@
+"""
+Local stand-ins for the production stores.
+
+local_dynamodb() points every boto3 client at either moto's in-process
+DynamoDB (the default) or a DynamoDB Local endpoint, and create_tables()
+builds the three tables with the keys and indexes the repositories query.
+Nothing here ever talks to AWS.
+"""
+
+import os
+from contextlib import contextmanager
+
+import boto3
+from django.conf import settings
+from moto import mock_aws
+
+from public_service_finder.utils.request_cost import install_dynamodb_hooks
+
+# AWS_ENDPOINT_URL and AWS_ENDPOINT_URL_DYNAMODB would send moto's requests
+# somewhere it can't intercept them
+_ENDPOINT_VARIABLES = ("AWS_ENDPOINT_URL", "AWS_ENDPOINT_URL_DYNAMODB")
+
+
+def _table_definitions():
+    return [
+        {
+            "TableName": settings.DYNAMODB_TABLE_SERVICES,
+            "KeySchema": [{"AttributeName": "Id", "KeyType": "HASH"}],
+            "AttributeDefinitions": [{"AttributeName": "Id", "AttributeType": "S"}],
+        },
+        {
+            "TableName": settings.DYNAMODB_TABLE_REVIEWS,
+            "KeySchema": [{"AttributeName": "ReviewId", "KeyType": "HASH"}],
+            "AttributeDefinitions": [
+                {"AttributeName": "ReviewId", "AttributeType": "S"},
+                {"AttributeName": "ServiceId", "AttributeType": "S"},
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "Timestamp", "AttributeType": "S"},
+            ],
+            "GlobalSecondaryIndexes": [
+                {
+                    "IndexName": "ServiceIdIndex",
+                    "KeySchema": [{"AttributeName": "ServiceId", "KeyType": "HASH"}],
+                    "Projection": {"ProjectionType": "ALL"},
+                },
+                {
+                    "IndexName": "ServiceTimestampIndex",
+                    "KeySchema": [
+                        {"AttributeName": "ServiceId", "KeyType": "HASH"},
+                        {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                },
+                {
+                    "IndexName": "UserTimestampIndex",
+                    "KeySchema": [
+                        {"AttributeName": "UserId", "KeyType": "HASH"},
+                        {"AttributeName": "Timestamp", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                },
+            ],
+        },
+        {
+            "TableName": settings.DYNAMODB_TABLE_BOOKMARKS,
+            "KeySchema": [{"AttributeName": "BookmarkId", "KeyType": "HASH"}],
+            "AttributeDefinitions": [
+                {"AttributeName": "BookmarkId", "AttributeType": "S"},
+                {"AttributeName": "UserId", "AttributeType": "S"},
+                {"AttributeName": "ServiceId", "AttributeType": "S"},
+            ],
+            "GlobalSecondaryIndexes": [
+                {
+                    "IndexName": "UserBookmarksIndex",
+                    "KeySchema": [
+                        {"AttributeName": "UserId", "KeyType": "HASH"},
+                        {"AttributeName": "ServiceId", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+            ],
+        },
+    ]
+
+
+@contextmanager
+def local_dynamodb(endpoint_url=None):
+    """
+    Route DynamoDB to moto, or to endpoint_url (e.g. DynamoDB Local) when
+    given, for the duration of the block.
+    """
+    saved = {name: os.environ.get(name) for name in _ENDPOINT_VARIABLES}
+    try:
+        for name in _ENDPOINT_VARIABLES:
+            os.environ.pop(name, None)
+        if endpoint_url:
+            os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = endpoint_url
+            yield
+        else:
+            with mock_aws():
+                # Starting moto swaps out the default boto3 session
+                install_dynamodb_hooks()
+                yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def create_tables():
+    """(Re)create the services, reviews and bookmarks tables, empty."""
+    client = boto3.client("dynamodb", region_name=settings.AWS_REGION)
+    existing = set(client.list_tables()["TableNames"])
+    for definition in _table_definitions():
+        name = definition["TableName"]
+        if name in existing:
+            client.delete_table(TableName=name)
+            client.get_waiter("table_not_exists").wait(TableName=name)
+        client.create_table(BillingMode="PAY_PER_REQUEST", **definition)
+        client.get_waiter("table_exists").wait(TableName=name)
@@ -0,0 +1,306 @@
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+
+import boto3
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import LiveServerTestCase, TestCase
+
+from accounts.models import CustomUser
+from analytics.models import DailyRollup
+from analytics.rollups import build_rollups
+from benchmarks.dtos import run_dto_benchmark
+from benchmarks.generator import NYC_LAT, NYC_LON, Scale, generate
+from benchmarks.harness import compare_results, run_scenarios
+from benchmarks.load import Fixtures, LoadStats, parse_mix, run_load
+from benchmarks.seed import seed_catalog
+from benchmarks.stores import create_tables, local_dynamodb
+from forum.models import Category, Comment, Notification, Post
+from home.repositories import HomeRepository
+from moderation.models import Flag
+from services.forms import ServiceForm
+from services.models import ReviewTerm
+from services.repositories import ServiceRepository
+
+SMALL = Scale(
+    services=60,
+    providers=5,
+    users=40,
+    admins=2,
+    reviews=300,
+    bookmarks=80,
+    posts=20,
+    comments=60,
+    notifications=30,
+    flags=10,
+)
+
+
+def _scan(table_name):
+    table = boto3.resource("dynamodb", region_name=settings.AWS_REGION).Table(
+        table_name
+    )
+    return table.scan()["Items"]
+
+
+class GeneratorTest(TestCase):
+    def test_generates_every_kind_of_data(self):
+        with local_dynamodb():
+            create_tables()
+            dataset = generate(SMALL, seed=3)
+            services = _scan(settings.DYNAMODB_TABLE_SERVICES)
+            reviews = _scan(settings.DYNAMODB_TABLE_REVIEWS)
+            bookmarks = _scan(settings.DYNAMODB_TABLE_BOOKMARKS)
+
+        self.assertEqual(len(services), 60)
+        self.assertEqual(len(reviews), 300)
+        self.assertEqual(len(bookmarks), 80)
+        self.assertEqual(CustomUser.objects.count(), 47)
+        self.assertEqual(CustomUser.objects.filter(is_superuser=True).count(), 2)
+        self.assertEqual(Post.objects.count(), 20)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertEqual(Notification.objects.count(), dataset.counts["notifications"])
+        self.assertEqual(Flag.objects.count(), dataset.counts["flags"])
+        self.assertGreater(Flag.objects.count(), 0)
+
+        # Stored codes, so the home ?type= filter and the rollups match them
+        self.assertEqual(
+            {service["Category"] for service in services},
+            set(ServiceForm.CATEGORY_TRANSLATION.values()),
+        )
+        for service in services:
+            self.assertTrue(NYC_LAT[0] <= service["Lat"] <= NYC_LAT[1])
+            self.assertTrue(NYC_LON[0] <= service["Log"] <= NYC_LON[1])
+        provider_ids = {str(provider.pk) for provider in dataset.providers}
+        self.assertTrue({s["ProviderId"] for s in services} <= provider_ids)
+        user_ids = {str(user.pk) for user in dataset.users}
+        self.assertTrue({r["UserId"] for r in reviews} <= user_ids)
+        # No user bookmarks the same service twice
+        self.assertEqual(len({(b["UserId"], b["ServiceId"]) for b in bookmarks}), 80)
+
+    def test_popularity_is_skewed_towards_the_top_ranks(self):
+        with local_dynamodb():
+            create_tables()
+            dataset = generate(SMALL, seed=3)
+            reviews = _scan(settings.DYNAMODB_TABLE_REVIEWS)
+
+        per_service = Counter(review["ServiceId"] for review in reviews)
+        busiest = per_service[dataset.service_ids[0]]
+        self.assertEqual(busiest, max(per_service.values()))
+        self.assertGreater(busiest, 5 * len(reviews) / len(dataset.service_ids))
+
+    def test_same_seed_generates_the_same_data(self):
+        def service_names():
+            create_tables()
+            CustomUser.objects.all().delete()
+            generate(SMALL, seed=5)
+            return sorted(
+                (s["Id"], s["Name"]) for s in _scan(settings.DYNAMODB_TABLE_SERVICES)
+            )
+
+        with local_dynamodb():
+            first = service_names()
+            second = service_names()
+
+        self.assertEqual(first, second)
+
+    def test_scaled_multiplies_everything_but_admins(self):
+        scale = Scale().scaled(10)
+
+        self.assertEqual(scale.services, Scale().services * 10)
+        self.assertEqual(scale.reviews, Scale().reviews * 10)
+        self.assertEqual(scale.admins, Scale().admins)
+
+
+class SeedCatalogTest(TestCase):
+    def test_picks_the_heaviest_users_and_service(self):
+        with local_dynamodb():
+            create_tables()
+            catalog = seed_catalog(50, seed=7)
+            bookmarks = HomeRepository().get_user_bookmarks(str(catalog.seeker.id))
+            provided = ServiceRepository().get_services_by_provider(catalog.provider.id)
+
+        self.assertEqual(catalog.counts["services"], 50)
+        self.assertEqual(catalog.seeker.user_type, "user")
+        self.assertEqual(catalog.provider.user_type, "service_provider")
+        self.assertGreater(len(bookmarks), 0)
+        self.assertGreater(len(provided), 0)
+
+
+class RunScenariosTest(TestCase):
+    def test_times_views_with_their_request_cost(self):
+        with local_dynamodb():
+            create_tables()
+            catalog = seed_catalog(20)
+            results = run_scenarios(
+                catalog,
+                repeat=2,
+                warmup=0,
+                only=["home_search", "home_category", "get_reviews"],
+            )
+
+        self.assertEqual(set(results), {"home_search", "home_category", "get_reviews"})
+        for result in results.values():
+            self.assertEqual(result["status"], 200)
+            self.assertEqual(result["runs"], 2)
+            self.assertLessEqual(result["min_ms"], result["median_ms"])
+            self.assertGreaterEqual(result["dynamodb_calls"], 1)
+
+
+class CompareResultsTest(TestCase):
+    def _results(self, median_ms):
+        scenario = {"median_ms": median_ms, "dynamodb_calls": 1, "sql_queries": 2}
+        return {"sizes": {"1000": {"scenarios": {"home": scenario}}}}
+
+    def test_reports_relative_change_of_shared_scenarios(self):
+        current = self._results(150.0)
+        current["sizes"]["1000"]["scenarios"]["get_reviews"] = {
+            "median_ms": 5.0,
+            "dynamodb_calls": 1,
+            "sql_queries": 0,
+        }
+
+        rows = compare_results(self._results(100.0), current)
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["scenario"], "home")
+        self.assertAlmostEqual(rows[0]["change"], 0.5)
+        self.assertEqual(rows[0]["sql_queries"], (2, 2))
+
+
+class LoadStatsTest(TestCase):
+    def test_reports_percentiles_and_errors_per_endpoint(self):
+        stats = LoadStats()
+        for i in range(1, 101):
+            stats.record("home", i / 1000, ok=i != 100)
+        stats.record("forum_post", 0.005, ok=True)
+        stats.stop()
+
+        report = stats.report()
+
+        home = report["endpoints"]["home"]
+        self.assertEqual(home["requests"], 100)
+        self.assertEqual(home["errors"], 1)
+        self.assertEqual(home["p50_ms"], 50.0)
+        self.assertEqual(home["p95_ms"], 95.0)
+        self.assertEqual(home["max_ms"], 100.0)
+        self.assertEqual(report["total"]["requests"], 101)
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("browse=3, forum"), {"browse": 3.0, "forum": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("checkout=1")
+        with self.assertRaises(ValueError):
+            parse_mix("browse=0")
+
+
+class RunLoadTest(LiveServerTestCase):
+    def test_journeys_run_against_a_live_server(self):
+        with local_dynamodb():
+            create_tables()
+            dataset = generate(SMALL, seed=1)
+            fixtures = Fixtures(
+                service_ids=dataset.service_ids[:20],
+                post_ids=list(Post.objects.values_list("id", flat=True)),
+                category_ids=list(Category.objects.values_list("id", flat=True)),
+                seekers=[user.username for user in dataset.users[:3]],
+                providers=[provider.email for provider in dataset.providers[:2]],
+            )
+            report = run_load(
+                self.live_server_url,
+                fixtures,
+                users=2,
+                duration=3,
+                think_time=0,
+                mix={"browse": 1, "forum": 1, "bookmark": 1, "review": 1},
+            )
+
+        endpoints = report["endpoints"]
+        for endpoint in ["home", "get_reviews", "forum_post", "login"]:
+            self.assertGreater(endpoints[endpoint]["requests"], 0, endpoint)
+        self.assertEqual(report["total"]["errors"], 0, endpoints)
+
+
+class ReviewIndexTest(TestCase):
+    def test_review_pages_follow_the_timestamp_index(self):
+        with local_dynamodb():
+            create_tables()
+            dataset = generate(SMALL, seed=2)
+            repo = HomeRepository()
+            service_id = dataset.service_ids[0]
+            everything = repo.fetch_reviews_for_service(service_id)
+            paged, start_key = [], None
+            while True:
+                reviews, start_key = repo.fetch_review_page(service_id, 5, start_key)
+                paged += reviews
+                if start_key is None:
+                    break
+            by_user = repo.fetch_reviews_by_user(str(dataset.users[0].id))
+
+        timestamps = [review["Timestamp"] for review in everything]
+        self.assertGreater(len(everything), 5)
+        self.assertEqual(timestamps, sorted(timestamps, reverse=True))
+        self.assertEqual(
+            [r["ReviewId"] for r in paged], [r["ReviewId"] for r in everything]
+        )
+        self.assertTrue(by_user)
+        self.assertEqual({r["UserId"] for r in by_user}, {str(dataset.users[0].id)})
+
+
+class ReviewTermsRebuildTest(TestCase):
+    def test_rebuild_command_matches_generated_counts(self):
+        with local_dynamodb():
+            create_tables()
+            generate(SMALL, seed=3)
+            generated = set(
+                ReviewTerm.objects.values_list("service_id", "term", "count")
+            )
+            ReviewTerm.objects.all().delete()
+            call_command("rebuild_review_terms", stdout=StringIO())
+
+        self.assertTrue(generated)
+        self.assertEqual(
+            set(ReviewTerm.objects.values_list("service_id", "term", "count")),
+            generated,
+        )
+
+
+class RollupBuildTest(TestCase):
+    def test_rollups_count_every_generated_review_and_bookmark(self):
+        with local_dynamodb():
+            create_tables()
+            dataset = generate(SMALL, seed=4)
+            today = dataset.now.date()
+            build_rollups(today=today)
+            full = set(DailyRollup.objects.values_list())
+            # Rebuilding a window scans with a filter and must not change it
+            build_rollups(days=30, today=today)
+            windowed = set(DailyRollup.objects.values_list())
+
+        totals = dict(
+            DailyRollup.objects.values("metric")
+            .annotate(total=Sum("count"))
+            .values_list("metric", "total")
+        )
+        self.assertEqual(totals[DailyRollup.REVIEWS], dataset.counts["reviews"])
+        self.assertEqual(totals[DailyRollup.BOOKMARKS], dataset.counts["bookmarks"])
+        # The window overlaps the generated data, so the check is not vacuous
+        self.assertTrue(
+            DailyRollup.objects.filter(date__gt=today - timedelta(days=30)).exists()
+        )
+        self.assertEqual({row[1:] for row in full}, {row[1:] for row in windowed})
+        self.assertFalse(DailyRollup.objects.filter(category="Unknown").exists())
+
+
+class DtoBenchmarkTest(TestCase):
+    def test_slots_save_memory(self):
+        results = run_dto_benchmark(services=200, repeat=1)
+
+        for name in ["ServiceDTO", "ReviewDTO"]:
+            self.assertEqual(
+                results[name]["slots"]["items"],
+                results[name]["without_slots"]["items"],
+            )
+            self.assertGreater(results[name]["memory_saved"], 0)
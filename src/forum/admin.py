@@ -13,6 +13,7 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ("title", "author", "category", "created_at", "is_closed")
+    list_select_related = ("author", "category")
     list_filter = ("category", "is_closed", "created_at")
     search_fields = ("title", "content", "author__username")
 
@@ -20,6 +21,8 @@ class PostAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("author", "post", "created_at")
+    # Comment.__str__ reads author and post
+    list_select_related = ("author", "post")
     list_filter = ("created_at",)
     search_fields = ("content", "author__username", "post__title")
 
@@ -27,6 +30,7 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("recipient", "sender", "post", "is_read", "created_at")
+    list_select_related = ("recipient", "sender", "post")
     list_filter = ("is_read", "created_at")
     search_fields = (
         "recipient__username",
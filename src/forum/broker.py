@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+log = logging.getLogger(__name__)
+
+_brokers = {}
+
+
+class Subscription:
+    def __init__(self, broker, channel, max_pending):
+        self.broker = broker
+        self.channel = channel
+        self.loop = None
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        self.broker._add(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self)
+
+    def deliver(self, event):
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            log.warning(f"Dropping event for slow subscriber on {self.channel}")
+
+    async def get(self, timeout=None):
+        """Next (event, data) pair, or None if nothing arrived within timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InMemoryBroker:
+    """
+    Pub/sub for notification events within a single process.
+
+    publish() may be called from any thread (sync views, signal handlers);
+    events are handed to each subscriber's event loop. A broker backed by
+    Redis pub/sub only needs the same three methods to replace this one via
+    settings.NOTIFICATION_BROKER.
+    """
+
+    max_pending = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+
+    def subscribe(self, channel):
+        """Async context manager yielding a Subscription to channel."""
+        return Subscription(self, channel, self.max_pending)
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return bool(self._subscriptions.get(channel))
+
+    def publish(self, channel, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver, (event, data)
+                )
+            except RuntimeError:
+                # The subscriber's loop has already shut down
+                self._remove(subscription)
+        return len(subscriptions)
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscriptions[subscription.channel].add(subscription)
+
+    def _remove(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+
+def get_broker():
+    path = settings.NOTIFICATION_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
@@ -1,11 +1,33 @@
+from functools import cache
+
+from django.conf import settings
+
+from .notifications import get_unread_count
+
+
 def notifications_processor(request):
-    if request.user.is_authenticated:
-        notifications = request.user.notifications.order_by("-created_at")[:5]
-        unread_notifications_count = request.user.notifications.filter(
-            is_read=False
-        ).count()
-        return {
-            "notifications": notifications,
-            "unread_notifications_count": unread_notifications_count,
-        }
-    return {}
+    """
+    Expose the navbar's notifications lazily.
+
+    Templates call these the first time they are used, so pages that never
+    render the notifications dropdown issue no queries for them.
+    """
+    user = request.user
+
+    @cache
+    def notifications():
+        if not user.is_authenticated:
+            return []
+        return list(user.notifications.order_by("-created_at")[:5])
+
+    @cache
+    def unread_notifications_count():
+        if not user.is_authenticated:
+            return 0
+        return get_unread_count(user.id)
+
+    return {
+        "notifications": notifications,
+        "unread_notifications_count": unread_notifications_count,
+        "notification_stream_enabled": settings.NOTIFICATION_STREAM_ENABLED,
+    }
@@ -0,0 +1,77 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=["search_vector"], name="forum_post_search_idx"
+)
+FTS_TABLE = "forum_post_fts"
+
+
+def create_search_index(apps, schema_editor):
+    Post = apps.get_model("forum", "Post")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        schema_editor.add_index(Post, SEARCH_INDEX)
+        username = Subquery(
+            User.objects.filter(pk=OuterRef("author_id")).values("username"),
+            output_field=TextField(),
+        )
+        Post.objects.using(schema_editor.connection.alias).update(
+            search_vector=SearchVector("title", weight="A")
+            + SearchVector("content", weight="B")
+            + SearchVector(username, weight="C")
+        )
+    elif vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, content, author, tokenize='porter unicode61')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content, author) "
+            f"SELECT p.id, p.title, p.content, u.username "
+            f"FROM {Post._meta.db_table} p JOIN {User._meta.db_table} u "
+            "ON u.id = p.author_id"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    Post = apps.get_model("forum", "Post")
+    vendor = schema_editor.connection.vendor
+
+    if vendor == "postgresql":
+        schema_editor.remove_index(Post, SEARCH_INDEX)
+    elif vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("forum", "0004_comment_forum_comment_post_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        # The GIN index only exists on Postgres; SQLite gets an FTS5 table
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name="post", index=SEARCH_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+    ]
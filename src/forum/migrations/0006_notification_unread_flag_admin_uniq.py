@@ -0,0 +1,41 @@
+# Generated by Django 5.1.1 on 2026-10-19 13:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def mark_duplicate_flag_admin_read(apps, schema_editor):
+    """Keep only the newest unread flag_admin notification per admin."""
+    Notification = apps.get_model("forum", "Notification")
+    unread = Notification.objects.using(schema_editor.connection.alias).filter(
+        notification_type="flag_admin", is_read=False
+    )
+    newest = (
+        unread.values("recipient_id")
+        .annotate(newest_id=Max("id"))
+        .values_list("newest_id", flat=True)
+    )
+    unread.exclude(id__in=list(newest)).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("forum", "0005_post_search_vector"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_duplicate_flag_admin_read, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="notification",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("is_read", False), ("notification_type", "flag_admin")
+                ),
+                fields=("recipient",),
+                name="forum_notif_unread_flag_admin_uniq",
+            ),
+        ),
+    ]
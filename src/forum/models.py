@@ -1,3 +1,5 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 from accounts.models import CustomUser
@@ -26,6 +28,18 @@ class Post(models.Model):
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
     is_closed = models.BooleanField(default=False)
+    # Maintained by forum.signals; only populated on Postgres (see forum.search)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # category_detail: posts in a category, newest first
+            models.Index(
+                fields=["category", "-created_at"], name="forum_post_category_idx"
+            ),
+            # Created on Postgres only by migration 0005
+            GinIndex(fields=["search_vector"], name="forum_post_search_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -38,6 +52,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # post_detail: comments on a post, newest first
+            models.Index(fields=["post", "-created_at"], name="forum_comment_post_idx"),
+        ]
+
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
@@ -64,6 +84,25 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Unread count and unread lists
+            models.Index(
+                fields=["recipient", "is_read", "-created_at"],
+                name="forum_notif_unread_idx",
+            ),
+            # Navbar dropdown: latest notifications for a user
+            models.Index(
+                fields=["recipient", "-created_at"], name="forum_notif_recent_idx"
+            ),
+        ]
+        constraints = [
+            # At most one unread "new flagged content" notification per admin
+            models.UniqueConstraint(
+                fields=["recipient"],
+                condition=models.Q(notification_type="flag_admin", is_read=False),
+                name="forum_notif_unread_flag_admin_uniq",
+            ),
+        ]
 
     def __str__(self):
         return f"Notification for {self.recipient.username} from {self.sender.username}"
@@ -0,0 +1,144 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+from accounts.models import CustomUser
+from .broker import get_broker
+from .models import Notification
+
+log = logging.getLogger(__name__)
+
+
+def _normalize_recipient_ids(recipient_ids):
+    """Bookmark and review items store user ids as strings; keep the valid ones."""
+    ids = set()
+    for recipient_id in recipient_ids:
+        try:
+            ids.add(int(recipient_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def _unread_count_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def get_unread_count(user_id):
+    """
+    Number of unread notifications for a user, served from the cache.
+
+    A miss falls back to a COUNT query and caches the result; every change to
+    a user's notifications invalidates the entry (see forum.signals).
+    """
+    key = _unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_COUNT_TTL)
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([_unread_count_key(user_id) for user_id in set(user_ids)])
+
+
+def notification_channel(user_id):
+    return f"notifications:{user_id}"
+
+
+def notifications_changed(user_ids, new_notifications=()):
+    """
+    Invalidate cached unread counts and push the change to connected streams.
+
+    Users with an open stream get a "notification" event for a newly created
+    notification, or a "count" event otherwise. Users without one cost nothing
+    beyond the cache invalidation.
+    """
+    user_ids = set(user_ids)
+    invalidate_unread_counts(user_ids)
+
+    broker = get_broker()
+    new_by_recipient = {n.recipient_id: n for n in new_notifications}
+    for user_id in user_ids:
+        channel = notification_channel(user_id)
+        if not broker.has_subscribers(channel):
+            continue
+        data = {"unread_count": get_unread_count(user_id)}
+        notification = new_by_recipient.get(user_id)
+        if notification is None:
+            broker.publish(channel, "count", data)
+        else:
+            data.update(
+                id=notification.id,
+                message=notification.message,
+                notification_type=notification.notification_type,
+            )
+            broker.publish(channel, "notification", data)
+
+
+def fan_out_notifications(
+    recipient_ids,
+    sender,
+    message,
+    notification_type,
+    post_id=None,
+    comment_id=None,
+    chunk_size=None,
+):
+    """
+    Create the same notification for many users.
+
+    Recipients are resolved with a single ``id__in`` query (unknown ids are
+    dropped) and the notifications are inserted with ``bulk_create`` in chunks.
+    Returns the number of notifications created.
+    """
+    chunk_size = chunk_size or settings.NOTIFICATION_FANOUT_CHUNK_SIZE
+    ids = _normalize_recipient_ids(recipient_ids)
+    if not ids:
+        return 0
+
+    recipients = list(
+        CustomUser.objects.filter(id__in=ids).values_list("id", flat=True)
+    )
+    notifications = [
+        Notification(
+            recipient_id=recipient_id,
+            sender=sender,
+            post_id=post_id,
+            comment_id=comment_id,
+            message=message,
+            notification_type=notification_type,
+        )
+        for recipient_id in recipients
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=chunk_size)
+    # bulk_create does not send post_save
+    notifications_changed(recipients, notifications)
+    log.debug(f"Fanned out {len(notifications)} '{notification_type}' notifications")
+    return len(notifications)
+
+
+def dispatch_fan_out(recipient_ids, sender, message, notification_type, **kwargs):
+    """
+    Fan out inline for small audiences; large audiences are handed to a
+    background task worker so the request that triggered them returns
+    immediately.
+    """
+    recipient_ids = list(recipient_ids)
+    if len(recipient_ids) <= settings.NOTIFICATION_FANOUT_BACKGROUND_THRESHOLD:
+        return fan_out_notifications(
+            recipient_ids, sender, message, notification_type, **kwargs
+        )
+
+    from .tasks import fan_out_notifications_task
+
+    fan_out_notifications_task.enqueue(
+        recipient_ids=[str(recipient_id) for recipient_id in recipient_ids],
+        sender_id=sender.id,
+        message=message,
+        notification_type=notification_type,
+        **kwargs,
+    )
+    return None
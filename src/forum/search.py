@@ -0,0 +1,179 @@
+"""
+Full-text search over forum posts.
+
+On Postgres each post keeps a weighted tsvector in Post.search_vector (title A,
+content B, author C), backed by a GIN index. On SQLite the same columns are
+mirrored into the forum_post_fts FTS5 table. Both are kept in sync by the
+signals in forum.signals, and search_posts() gives the same ranked, annotated
+queryset on either backend.
+"""
+
+import re
+
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+FTS_TABLE = "forum_post_fts"
+
+# Control characters can't appear in escaped user text, so they can mark the
+# matched terms in snippets until the snippet is HTML-escaped.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_SNIPPET_WORDS = 30
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _uses_postgres():
+    return connection.vendor == "postgresql"
+
+
+def _search_terms(query):
+    return _TOKEN.findall(query.lower())
+
+
+def post_search_vector(author_username):
+    # Joined fields can't be used in an UPDATE, so the author name is a value
+    return (
+        SearchVector("title", weight="A")
+        + SearchVector("content", weight="B")
+        + SearchVector(Value(author_username, output_field=TextField()), weight="C")
+    )
+
+
+def index_post(post):
+    """Refresh the search index entry for post."""
+    from .models import Post
+
+    if _uses_postgres():
+        Post.objects.filter(pk=post.pk).update(
+            search_vector=post_search_vector(post.author.username)
+        )
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, author) "
+                "VALUES (%s, %s, %s, %s)",
+                [post.pk, post.title, post.content, post.author.username],
+            )
+
+
+def index_posts(posts):
+    """
+    Index newly created posts at once; bulk_create doesn't send post_save,
+    so bulk loaders call this instead.
+    """
+    from accounts.models import CustomUser
+    from .models import Post
+
+    post_ids = [post.pk for post in posts]
+    if _uses_postgres():
+        username = Subquery(
+            CustomUser.objects.filter(pk=OuterRef("author_id")).values("username"),
+            output_field=TextField(),
+        )
+        Post.objects.filter(pk__in=post_ids).update(
+            search_vector=SearchVector("title", weight="A")
+            + SearchVector("content", weight="B")
+            + SearchVector(username, weight="C")
+        )
+    elif connection.vendor == "sqlite":
+        usernames = dict(
+            CustomUser.objects.filter(
+                pk__in={post.author_id for post in posts}
+            ).values_list("pk", "username")
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, author) "
+                "VALUES (%s, %s, %s, %s)",
+                [
+                    [post.pk, post.title, post.content, usernames[post.author_id]]
+                    for post in posts
+                ],
+            )
+
+
+def unindex_post(post_id):
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+
+def search_posts(queryset, query):
+    """
+    Filter a Post queryset to posts matching every word of query (as a prefix,
+    so partially typed words match), best matches first.
+
+    Each post is annotated with ``rank`` (higher is better) and ``snippet``, an
+    excerpt of the content with the matches marked; pass it to highlight().
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return queryset.none()
+
+    if _uses_postgres():
+        search_query = SearchQuery(
+            " & ".join(f"{term}:*" for term in terms), search_type="raw"
+        )
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(
+                # ts_rank() is a float4; as a double it round-trips exactly
+                # through pagination cursors
+                rank=Cast(SearchRank(F("search_vector"), search_query), FloatField()),
+                snippet=SearchHeadline(
+                    "content",
+                    search_query,
+                    start_sel=_MARK_START,
+                    stop_sel=_MARK_END,
+                    max_words=_SNIPPET_WORDS,
+                    min_words=_SNIPPET_WORDS // 2,
+                ),
+            )
+            .order_by("-rank", "-created_at", "-id")
+        )
+
+    match = " ".join(f'"{term}"*' for term in terms)
+    table = queryset.model._meta.db_table
+    match_row = f"{FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = {table}.id"
+    return (
+        queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        )
+        .annotate(
+            # bm25() is lower-is-better; the column weights mirror A/B/C above
+            rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, 10.0, 4.0, 1.0) FROM {FTS_TABLE} WHERE {match_row}",
+                [match],
+                output_field=FloatField(),
+            ),
+            snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, 1, %s, %s, '…', {_SNIPPET_WORDS}) "
+                f"FROM {FTS_TABLE} WHERE {match_row}",
+                [_MARK_START, _MARK_END, match],
+                output_field=TextField(),
+            ),
+        )
+        .order_by("-rank", "-created_at", "-id")
+    )
+
+
+def highlight(snippet):
+    """HTML-escape a search snippet and wrap the matched terms in <mark>."""
+    html = escape(snippet or "")
+    html = html.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    return mark_safe(html)
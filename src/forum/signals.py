@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification, Post
+from .notifications import notifications_changed
+from .search import index_post, unindex_post
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, **kwargs):
+    notifications_changed([instance.recipient_id], [instance] if created else ())
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    notifications_changed([instance.recipient_id])
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    unindex_post(instance.pk)
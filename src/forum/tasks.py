@@ -0,0 +1,18 @@
+from accounts.models import CustomUser
+from tasks.registry import task
+from .notifications import fan_out_notifications
+
+
+@task()
+def fan_out_notifications_task(
+    recipient_ids, sender_id, message, notification_type, post_id=None, comment_id=None
+):
+    sender = CustomUser.objects.get(id=sender_id)
+    fan_out_notifications(
+        recipient_ids,
+        sender,
+        message,
+        notification_type,
+        post_id=post_id,
+        comment_id=comment_id,
+    )
@@ -1,11 +1,26 @@
 # from django.test import TestCase
 
 # Create your tests here.
-from django.test import TestCase, Client
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from .models import Category, Notification, Post, Comment
 from .forms import PostForm, CommentForm
+from .broker import InMemoryBroker, get_broker
+from .context_processors import notifications_processor
+from .search import highlight, index_posts, search_posts
+from .notifications import dispatch_fan_out, fan_out_notifications, get_unread_count
+from moderation.models import Flag
+from public_service_finder.utils.query_plan import QueryPlanAssertions
+from tasks.backends import get_backend
 
 
 class ForumModelsTest(TestCase):
@@ -581,3 +596,509 @@ class ForumProfanityFilterTest(TestCase):
         # Verify profanity was filtered
         self.assertIn("****", comment.content)
         self.assertNotIn("shit", comment.content)
+
+
+class NotificationFanOutTest(TestCase):
+    def setUp(self):
+        self.sender = get_user_model().objects.create_user(
+            username="provider", email="provider@example.com", password="testpass123"
+        )
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"bookmarker{i}",
+                email=f"bookmarker{i}@example.com",
+                password="testpass123",
+            )
+            for i in range(3)
+        ]
+
+    def test_fan_out_creates_one_notification_per_recipient(self):
+        recipient_ids = [str(user.id) for user in self.users]
+        created = fan_out_notifications(
+            recipient_ids,
+            sender=self.sender,
+            message="New announcement",
+            notification_type="announcement",
+        )
+        self.assertEqual(created, 3)
+        for user in self.users:
+            notification = Notification.objects.get(recipient=user)
+            self.assertEqual(notification.message, "New announcement")
+            self.assertEqual(notification.notification_type, "announcement")
+            self.assertEqual(notification.sender, self.sender)
+
+    def test_fan_out_skips_unknown_and_invalid_ids(self):
+        created = fan_out_notifications(
+            [str(self.users[0].id), "999999", "not-a-user", None],
+            sender=self.sender,
+            message="New announcement",
+            notification_type="announcement",
+        )
+        self.assertEqual(created, 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_fan_out_query_count_is_independent_of_audience_size(self):
+        recipient_ids = [user.id for user in self.users]
+        # One recipient lookup plus one INSERT per chunk
+        with self.assertNumQueries(2):
+            fan_out_notifications(
+                recipient_ids,
+                sender=self.sender,
+                message="m",
+                notification_type="announcement",
+            )
+        with self.assertNumQueries(3):
+            fan_out_notifications(
+                recipient_ids,
+                sender=self.sender,
+                message="m",
+                notification_type="announcement",
+                chunk_size=2,
+            )
+
+    def test_fan_out_with_no_recipients_runs_no_queries(self):
+        with self.assertNumQueries(0):
+            created = fan_out_notifications(
+                [], sender=self.sender, message="m", notification_type="announcement"
+            )
+        self.assertEqual(created, 0)
+
+    @override_settings(NOTIFICATION_FANOUT_BACKGROUND_THRESHOLD=10)
+    def test_dispatch_small_audience_runs_inline(self):
+        created = dispatch_fan_out(
+            [user.id for user in self.users],
+            sender=self.sender,
+            message="m",
+            notification_type="announcement",
+        )
+        self.assertEqual(created, 3)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    @override_settings(NOTIFICATION_FANOUT_BACKGROUND_THRESHOLD=2)
+    def test_dispatch_large_audience_runs_in_background(self):
+        backend = get_backend()
+        backend.clear()
+        result = dispatch_fan_out(
+            [user.id for user in self.users],
+            sender=self.sender,
+            message="m",
+            notification_type="announcement",
+        )
+
+        self.assertIsNone(result)
+        self.assertEqual(Notification.objects.count(), 0)
+
+        backend.run_pending()
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(
+            set(Notification.objects.values_list("sender", flat=True)),
+            {self.sender.id},
+        )
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class UnreadNotificationCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.recipient = get_user_model().objects.create_user(
+            username="recipient", email="recipient@example.com", password="testpass123"
+        )
+        self.sender = get_user_model().objects.create_user(
+            username="sender", email="sender@example.com", password="testpass123"
+        )
+        self.notification = self._notify()
+        self.client.login(username="recipient", password="testpass123")
+
+    def _notify(self):
+        return Notification.objects.create(
+            recipient=self.recipient, sender=self.sender, message="Test Notification"
+        )
+
+    def _count(self):
+        return self.client.get(reverse("forum:get_notifications_count")).json()["count"]
+
+    def test_count_is_served_from_cache(self):
+        self.assertEqual(get_unread_count(self.recipient.id), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.recipient.id), 1)
+
+    def test_create_invalidates_count(self):
+        self.assertEqual(self._count(), 1)
+        self._notify()
+        self.assertEqual(self._count(), 2)
+
+    def test_mark_read_invalidates_count(self):
+        self.assertEqual(self._count(), 1)
+        self.client.get(
+            reverse("forum:mark_notification_read", args=[self.notification.id])
+        )
+        self.assertEqual(self._count(), 0)
+
+    def test_mark_all_read_invalidates_count(self):
+        self._notify()
+        self.assertEqual(self._count(), 2)
+        self.client.post(reverse("forum:mark_all_notifications_read"))
+        self.assertEqual(self._count(), 0)
+
+    def test_delete_invalidates_count(self):
+        self.assertEqual(self._count(), 1)
+        self.client.post(
+            reverse("forum:delete_notification", args=[self.notification.id])
+        )
+        self.assertEqual(self._count(), 0)
+
+    def test_fan_out_invalidates_count(self):
+        self.assertEqual(get_unread_count(self.recipient.id), 1)
+        fan_out_notifications(
+            [self.recipient.id],
+            sender=self.sender,
+            message="m",
+            notification_type="announcement",
+        )
+        self.assertEqual(get_unread_count(self.recipient.id), 2)
+
+    def test_context_processor_is_lazy(self):
+        request = RequestFactory().get("/")
+        request.user = self.recipient
+        with self.assertNumQueries(0):
+            context = notifications_processor(request)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(context["unread_notifications_count"](), 1)
+            self.assertEqual(context["unread_notifications_count"](), 1)
+        self.assertEqual(context["notifications"](), [self.notification])
+
+    def test_context_processor_anonymous_user(self):
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        context = notifications_processor(request)
+        with self.assertNumQueries(0):
+            self.assertEqual(context["unread_notifications_count"](), 0)
+            self.assertEqual(context["notifications"](), [])
+
+
+class InMemoryBrokerTest(TestCase):
+    def setUp(self):
+        self.broker = InMemoryBroker()
+
+    def test_publish_without_subscribers_is_a_no_op(self):
+        self.assertFalse(self.broker.has_subscribers("channel"))
+        self.assertEqual(self.broker.publish("channel", "count", {}), 0)
+
+    async def test_subscriber_receives_events_from_other_threads(self):
+        async with self.broker.subscribe("channel") as subscription:
+            self.assertTrue(self.broker.has_subscribers("channel"))
+            delivered = await sync_to_async(
+                self.broker.publish, thread_sensitive=False
+            )("channel", "count", {"unread_count": 3})
+            self.assertEqual(delivered, 1)
+            self.assertEqual(
+                await subscription.get(timeout=1), ("count", {"unread_count": 3})
+            )
+            self.assertIsNone(await subscription.get(timeout=0.01))
+        self.assertFalse(self.broker.has_subscribers("channel"))
+
+    async def test_slow_subscriber_drops_events_beyond_limit(self):
+        self.broker.max_pending = 1
+        async with self.broker.subscribe("channel") as subscription:
+            self.broker.publish("channel", "count", {"unread_count": 1})
+            self.broker.publish("channel", "count", {"unread_count": 2})
+            await asyncio.sleep(0)
+            self.assertEqual(subscription.queue.qsize(), 1)
+
+
+@override_settings(NOTIFICATION_STREAM_ENABLED=True, NOTIFICATION_STREAM_KEEPALIVE=0.05)
+class NotificationStreamTest(TestCase):
+    def setUp(self):
+        self.recipient = get_user_model().objects.create_user(
+            username="recipient", email="recipient@example.com", password="testpass123"
+        )
+        self.sender = get_user_model().objects.create_user(
+            username="sender", email="sender@example.com", password="testpass123"
+        )
+        self.url = reverse("forum:notifications_stream")
+
+    def test_stream_requires_login(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(NOTIFICATION_STREAM_ENABLED=False)
+    async def test_stream_is_not_found_when_disabled(self):
+        await self.async_client.aforce_login(self.recipient)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream_is_not_found_under_wsgi(self):
+        # Each stream would hold a WSGI worker for NOTIFICATION_STREAM_MAX_AGE
+        self.client.force_login(self.recipient)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_stream_pushes_count_and_new_notifications(self):
+        await self.async_client.aforce_login(self.recipient)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b"retry:"))
+        self.assertEqual(
+            await anext(events), b'event: count\ndata: {"unread_count": 0}\n\n'
+        )
+
+        notification = await sync_to_async(Notification.objects.create)(
+            recipient=self.recipient, sender=self.sender, message="Hello"
+        )
+        chunk = await anext(events)
+        self.assertTrue(chunk.startswith(b"event: notification\n"))
+        data = json.loads(chunk.split(b"data: ", 1)[1])
+        self.assertEqual(data["id"], notification.id)
+        self.assertEqual(data["message"], "Hello")
+        self.assertEqual(data["unread_count"], 1)
+
+        await sync_to_async(notification.delete)()
+        self.assertEqual(
+            await anext(events), b'event: count\ndata: {"unread_count": 0}\n\n'
+        )
+        # A client disconnect cancels the pending read, which ends the subscription
+        pending = asyncio.ensure_future(anext(events))
+        await asyncio.sleep(0.01)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertFalse(
+            get_broker().has_subscribers(f"notifications:{self.recipient.id}")
+        )
+
+    @override_settings(NOTIFICATION_STREAM_MAX_AGE=0.12)
+    async def test_stream_sends_keepalives_and_closes_after_max_age(self):
+        await self.async_client.aforce_login(self.recipient)
+        response = await self.async_client.get(self.url)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertIn(b": keepalive\n\n", chunks)
+
+
+class ForumQueryPlanTest(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.category = Category.objects.create(name="Test Category")
+        self.post = Post.objects.create(
+            title="Test Post",
+            content="Test Content",
+            author=self.user,
+            category=self.category,
+        )
+
+    def test_category_posts_use_index(self):
+        self.assertUsesIndex(
+            Post.objects.filter(category=self.category).order_by("-created_at")
+        )
+
+    def test_post_comments_use_index(self):
+        self.assertUsesIndex(self.post.comments.all().order_by("-created_at"))
+
+    def test_unread_notifications_use_index(self):
+        self.assertUsesIndex(
+            Notification.objects.filter(recipient=self.user, is_read=False)
+        )
+
+    def test_recent_notifications_use_index(self):
+        self.assertUsesIndex(self.user.notifications.order_by("-created_at")[:5])
+
+
+class ForumSearchTest(TestCase):
+    def setUp(self):
+        self.alice = get_user_model().objects.create_user(
+            username="alice", email="alice@example.com", password="testpass123"
+        )
+        self.bob = get_user_model().objects.create_user(
+            username="bob", email="bob@example.com", password="testpass123"
+        )
+        self.category = Category.objects.create(name="Housing")
+        self.title_match = Post.objects.create(
+            title="Housing assistance programs",
+            content="Where can I apply?",
+            author=self.alice,
+            category=self.category,
+        )
+        self.content_match = Post.objects.create(
+            title="General question",
+            content="Looking for emergency housing near Brooklyn <b>today</b>",
+            author=self.bob,
+            category=self.category,
+        )
+        self.unrelated = Post.objects.create(
+            title="Food banks",
+            content="Open on weekends",
+            author=self.bob,
+            category=self.category,
+        )
+
+    def _search(self, query):
+        return list(search_posts(Post.objects.all(), query))
+
+    def test_title_matches_rank_above_content_matches(self):
+        self.assertEqual(
+            self._search("housing"), [self.title_match, self.content_match]
+        )
+
+    def test_partial_words_match(self):
+        self.assertEqual(self._search("brookl"), [self.content_match])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self._search("housing brooklyn"), [self.content_match])
+
+    def test_author_is_searchable(self):
+        self.assertEqual(self._search("alice"), [self.title_match])
+
+    def test_query_without_words_matches_nothing(self):
+        self.assertEqual(self._search('"* AND ('), [])
+
+    def test_snippet_is_escaped_and_highlighted(self):
+        post = search_posts(Post.objects.all(), "emergency").get()
+        snippet = highlight(post.snippet)
+        self.assertIn("<mark>emergency</mark>", snippet)
+        self.assertIn("&lt;b&gt;today&lt;/b&gt;", snippet)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.unrelated.content = "Emergency pantry"
+        self.unrelated.save()
+        self.assertIn(self.unrelated, self._search("emergency"))
+
+        self.content_match.delete()
+        self.assertEqual(self._search("emergency"), [self.unrelated])
+
+    def test_bulk_created_posts_are_indexed_by_index_posts(self):
+        posts = Post.objects.bulk_create(
+            Post(
+                title=f"Warming center {i}",
+                content="Open overnight",
+                author=self.alice,
+                category=self.category,
+            )
+            for i in range(3)
+        )
+        self.assertEqual(self._search("overnight"), [])
+
+        index_posts(posts)
+
+        self.assertCountEqual(self._search("overnight"), posts)
+        self.assertCountEqual(self._search("alice warming"), posts)
+
+    def test_category_detail_search(self):
+        response = self.client.get(
+            reverse("forum:category_detail", args=[self.category.id]),
+            {"search": "emergency"},
+        )
+        self.assertEqual(list(response.context["posts"]), [self.content_match])
+        self.assertContains(response, "<mark>emergency</mark>")
+
+
+class ForumQueryCountTest(TestCase):
+    """Page query counts must not grow with the number of rows rendered."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.category = Category.objects.create(name="Test Category")
+        self.client.login(username="testuser", password="testpass123")
+
+    def _add_posts(self, count):
+        for i in range(count):
+            author = get_user_model().objects.create_user(
+                username=f"author{Post.objects.count()}",
+                email=f"author{Post.objects.count()}@example.com",
+                password="testpass123",
+            )
+            post = Post.objects.create(
+                title=f"Post {i}",
+                content="Content",
+                author=author,
+                category=self.category,
+            )
+            Comment.objects.create(post=post, author=self.user, content="Reply")
+
+    def _add_comments(self, post, count):
+        for i in range(count):
+            author = get_user_model().objects.create_user(
+                username=f"commenter{Comment.objects.count()}",
+                email=f"commenter{Comment.objects.count()}@example.com",
+                password="testpass123",
+            )
+            Comment.objects.create(post=post, author=author, content=f"Comment {i}")
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_category_detail_query_count_is_constant(self):
+        url = reverse("forum:category_detail", args=[self.category.id])
+        self._add_posts(1)
+        one_post = self._count_queries(url)
+        self._add_posts(9)
+        self.assertEqual(self._count_queries(url), one_post)
+
+    def test_category_detail_annotations(self):
+        self._add_posts(1)
+        post = Post.objects.get()
+        self._add_comments(post, 2)
+        latest = post.comments.latest("created_at")
+
+        response = self.client.get(
+            reverse("forum:category_detail", args=[self.category.id])
+        )
+        listed = response.context["posts"][0]
+        self.assertEqual(listed.comment_count, 3)
+        self.assertEqual(listed.last_activity, latest.created_at)
+
+    def test_post_detail_query_count_is_constant(self):
+        self._add_posts(1)
+        post = Post.objects.get()
+        url = reverse("forum:post_detail", args=[post.id])
+        one_comment = self._count_queries(url)
+        self._add_comments(post, 4)
+        self.assertEqual(self._count_queries(url), one_comment)
+
+    def test_post_detail_preloads_flag_statuses(self):
+        self._add_posts(1)
+        post = Post.objects.get()
+        comment = post.comments.get()
+        Flag.objects.create(
+            content_type="FORUM COMMENT",
+            object_id=comment.id,
+            flagger=self.user,
+            reason="SPAM",
+            content_preview="Reply",
+        )
+
+        response = self.client.get(reverse("forum:post_detail", args=[post.id]))
+
+        statuses = response.context["flag_statuses"]
+        self.assertEqual(
+            set(statuses), {f"FORUM POST:{post.id}", f"FORUM COMMENT:{comment.id}"}
+        )
+        self.assertTrue(statuses[f"FORUM COMMENT:{comment.id}"]["userHasFlagged"])
+        self.assertContains(response, 'id="flag-statuses"')
+
+    def test_category_detail_pages_with_cursor(self):
+        self._add_posts(12)
+        url = reverse("forum:category_detail", args=[self.category.id])
+        first = self.client.get(url).context["posts"]
+        self.assertEqual(len(first), 10)
+        self.assertTrue(first.has_next())
+
+        second = self.client.get(url, {"cursor": first.next_cursor}).context["posts"]
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        self.assertEqual(
+            {p.id for p in first} | {p.id for p in second},
+            set(Post.objects.values_list("id", flat=True)),
+        )
@@ -26,6 +26,11 @@ urlpatterns = [
         views.get_notifications_count,
         name="get_notifications_count",
     ),
+    path(
+        "notifications/stream/",
+        views.notifications_stream,
+        name="notifications_stream",
+    ),
     path(
         "notifications/mark-all-read/",
         views.mark_all_notifications_read,
@@ -1,9 +1,24 @@
-from django.db.models import Q
-from django.http import HttpResponseForbidden, JsonResponse
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import HttpResponseForbidden, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from .models import Category, Post, Comment, Notification
 from .forms import PostForm, CommentForm
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from .notifications import (
+    get_unread_count,
+    notification_channel,
+    notifications_changed,
+)
+from .broker import get_broker
+from .search import highlight, search_posts
+from moderation.status import flag_statuses
+from public_service_finder.utils.pagination import KeysetPaginator
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import Http404
 
@@ -15,30 +30,50 @@ def category_list(request):
     return render(request, "category_list.html", {"categories": categories})
 
 
+def _with_activity(posts):
+    """
+    Annotate posts with comment_count and last_activity (newest comment, or
+    the post itself) using correlated subqueries, so a page of posts costs a
+    single query and needs no GROUP BY.
+    """
+    comments = Comment.objects.filter(post=OuterRef("pk")).order_by()
+    return posts.select_related("author").annotate(
+        comment_count=Coalesce(
+            Subquery(
+                comments.values("post").annotate(count=Count("id")).values("count")
+            ),
+            0,
+        ),
+        last_activity=Coalesce(
+            Subquery(comments.order_by("-created_at").values("created_at")[:1]),
+            "created_at",
+        ),
+    )
+
+
 def category_detail(request, category_id):
     category = get_object_or_404(Category, id=category_id)
     search_query = request.GET.get("search", "")
 
-    posts = Post.objects.filter(category=category)
+    posts = _with_activity(Post.objects.filter(category=category))
 
     if search_query:
-        posts = posts.filter(
-            Q(title__icontains=search_query)
-            | Q(content__icontains=search_query)
-            | Q(author__username__icontains=search_query)
-        )
+        posts = search_posts(posts, search_query)
+        ordering = ("-rank", "-created_at", "-id")
+    else:
+        ordering = ("-created_at", "-id")
 
-    posts = posts.order_by("-created_at")
+    paginator = KeysetPaginator(
+        posts,
+        10,  # Show 10 posts per page
+        ordering=ordering,
+        count_cache_key=None if search_query else f"forum:post-count:{category.id}",
+    )
+    posts = paginator.page(request.GET.get("cursor"))
 
-    # Pagination for posts
-    paginator = Paginator(posts, 10)  # Show 10 posts per page
-    page = request.GET.get("page")
-    try:
-        posts = paginator.page(page)
-    except PageNotAnInteger:
-        posts = paginator.page(1)
-    except EmptyPage:
-        posts = paginator.page(paginator.num_pages)
+    if search_query:
+        for post in posts:
+            post.snippet = highlight(post.snippet)
 
     return render(
         request,
@@ -49,7 +84,7 @@ def category_detail(request, category_id):
 
 def post_detail(request, post_id):
     try:
-        post = get_object_or_404(Post, id=post_id)
+        post = get_object_or_404(Post.objects.select_related("author"), id=post_id)
     except Http404:
         # First try to get any post with this ID to find its category
         try:
@@ -59,17 +94,9 @@ def post_detail(request, post_id):
             return redirect("forum:category_list")
         return redirect("forum:category_detail", category_id=category.id)
 
-    comments_list = post.comments.all().order_by("-created_at")
-
-    # Pagination for comments
-    paginator = Paginator(comments_list, 5)  # Show 5 comments per page
-    page = request.GET.get("page")
-    try:
-        comments = paginator.page(page)
-    except PageNotAnInteger:
-        comments = paginator.page(1)
-    except EmptyPage:
-        comments = paginator.page(paginator.num_pages)
+    comments_list = post.comments.select_related("author")
+    # Show 5 comments per page
+    comments = KeysetPaginator(comments_list, 5).page(request.GET.get("cursor"))
 
     if request.method == "POST":
         comment_form = CommentForm(request.POST)
@@ -91,6 +118,15 @@ def post_detail(request, post_id):
     else:
         comment_form = CommentForm()
 
+    # Flag icons for everything on the page, so the page needn't ask per item
+    flag_status_map = {}
+    if request.user.is_authenticated:
+        flag_status_map = flag_statuses(
+            request.user,
+            [("FORUM POST", post.id)]
+            + [("FORUM COMMENT", comment.id) for comment in comments],
+        )
+
     return render(
         request,
         "post_detail.html",
@@ -98,6 +134,7 @@ def post_detail(request, post_id):
             "post": post,
             "comments": comments,
             "comment_form": comment_form,
+            "flag_statuses": flag_status_map,
         },
     )
 
@@ -208,8 +245,52 @@ def mark_notification_read(request, notification_id):
 
 @login_required
 def get_notifications_count(request):
-    count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    return JsonResponse({"count": count})
+    return JsonResponse({"count": get_unread_count(request.user.id)})
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _notification_events(user_id):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.NOTIFICATION_STREAM_MAX_AGE
+    async with get_broker().subscribe(notification_channel(user_id)) as subscription:
+        # Subscribe first so nothing published while counting is missed
+        count = await sync_to_async(get_unread_count)(user_id)
+        yield f"retry: {settings.NOTIFICATION_STREAM_RETRY_MS}\n"
+        yield _sse("count", {"unread_count": count})
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(
+                timeout=min(settings.NOTIFICATION_STREAM_KEEPALIVE, remaining)
+            )
+            if message is None:
+                yield ": keepalive\n\n"
+            else:
+                yield _sse(*message)
+
+
+@login_required
+async def notifications_stream(request):
+    """
+    Server-sent events for the navbar: the unread count on connect, then a
+    "notification" or "count" event whenever the user's notifications change.
+
+    The connection is closed after NOTIFICATION_STREAM_MAX_AGE seconds and the
+    browser reconnects on its own. Idle connections only cost a coroutine when
+    served by an ASGI server; under WSGI each would hold a worker for the whole
+    NOTIFICATION_STREAM_MAX_AGE, so the stream is a 404 there and whenever
+    NOTIFICATION_STREAM_ENABLED is off, and the navbar falls back to polling.
+    """
+    if not settings.NOTIFICATION_STREAM_ENABLED or not isinstance(request, ASGIRequest):
+        raise Http404("Notification stream is not enabled")
+    user = await request.auser()
+    response = StreamingHttpResponse(
+        _notification_events(user.id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 @login_required
@@ -218,6 +299,7 @@ def mark_all_notifications_read(request):
         Notification.objects.filter(recipient=request.user, is_read=False).update(
             is_read=True
         )
+        notifications_changed([request.user.id])
         if request.headers.get("X-Requested-With") == "XMLHttpRequest":
             return JsonResponse({"status": "success"})
         return redirect(request.META.get("HTTP_REFERER", "/"))
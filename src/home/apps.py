@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class HomeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "home"
+
+    def ready(self):
+        # The repositories here make most of the DynamoDB calls; hook the
+        # boto3 session before any of them creates a client
+        from public_service_finder.utils.request_cost import install_dynamodb_hooks
+
+        install_dynamodb_hooks()
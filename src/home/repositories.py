@@ -10,6 +10,22 @@ from django.conf import settings
 from botocore.exceptions import ClientError
 from geopy import distance as dist
 
+from services.cache import service_cache
+from services.terms import update_review_terms
+from .review_pages import invalidate_review_pages
+
+# Review indexes with Timestamp as the sort key, so reviews come back newest
+# first from a query (see db-prep/db-reviews.py)
+REVIEWS_BY_SERVICE_INDEX = "ServiceTimestampIndex"
+REVIEWS_BY_USER_INDEX = "UserTimestampIndex"
+# Conditional writes tried by update_service_rating before giving up
+RATING_UPDATE_ATTEMPTS = 5
+
+
+def _review_cursor(review):
+    """The ExclusiveStartKey that continues a service's reviews after review."""
+    return {key: review[key] for key in ("ReviewId", "ServiceId", "Timestamp")}
+
 
 class HomeRepository:
     def __init__(self):
@@ -117,61 +133,133 @@ class HomeRepository:
                     "RespondedAt": None,
                 }
             )
+            invalidate_review_pages(service_id)
+            update_review_terms([(service_id, "", rating_message)])
         except ClientError as e:
             print(f"Failed to add review: {e.response['Error']['Message']}")
             raise e
 
     def update_service_rating(self, service_id, new_rating):
-        try:
-            # Retrieve the current ratings and rating count
-            response = self.services_table.get_item(
-                Key={"Id": service_id}, ProjectionExpression="Ratings, rating_count"
-            )
-            item = response.get("Item", {})
-            current_ratings = float(item.get("Ratings", 0))
-            rating_count = int(item.get("rating_count", 0))
+        """
+        Fold a new rating into the service's average. The write is conditional
+        on the rating_count that was read, so concurrent updates re-read and
+        try again instead of overwriting each other. Once the write is done
+        nothing raises, so a retried task never counts a rating twice.
+        """
+        for attempt in range(1, RATING_UPDATE_ATTEMPTS + 1):
+            try:
+                # Retrieve the current ratings and rating count
+                response = self.services_table.get_item(
+                    Key={"Id": service_id},
+                    ProjectionExpression="Ratings, rating_count",
+                    ConsistentRead=True,
+                )
+                item = response.get("Item", {})
+                current_ratings = float(item.get("Ratings", 0))
+                rating_count = int(item.get("rating_count", 0))
 
-            # Calculate the new ratings
-            updated_ratings = (current_ratings * rating_count + new_rating) / (
-                rating_count + 1
-            )
-            updated_ratings = round(updated_ratings, 2)
-            updated_rating_count = rating_count + 1
+                # Calculate the new ratings
+                updated_ratings = (current_ratings * rating_count + new_rating) / (
+                    rating_count + 1
+                )
+                updated_ratings = round(updated_ratings, 2)
+                updated_rating_count = rating_count + 1
 
-            updated_ratings = Decimal(updated_ratings).quantize(
-                Decimal("0.01"), rounding=ROUND_HALF_UP
-            )
+                updated_ratings = Decimal(updated_ratings).quantize(
+                    Decimal("0.01"), rounding=ROUND_HALF_UP
+                )
 
-            # Update the table
-            self.services_table.update_item(
-                Key={"Id": service_id},
-                UpdateExpression="SET Ratings = :r, rating_count = :c",
-                ExpressionAttributeValues={
-                    ":r": updated_ratings,
-                    ":c": updated_rating_count,
-                },
-            )
-        except ClientError as e:
-            print(f"Failed to update service rating: {e.response['Error']['Message']}")
-            raise e
+                if "rating_count" in item:
+                    unchanged = Attr("rating_count").eq(item["rating_count"])
+                else:
+                    unchanged = Attr("rating_count").not_exists()
+
+                # Update the table
+                self.services_table.update_item(
+                    Key={"Id": service_id},
+                    UpdateExpression="SET Ratings = :r, rating_count = :c",
+                    ConditionExpression=unchanged,
+                    ExpressionAttributeValues={
+                        ":r": updated_ratings,
+                        ":c": updated_rating_count,
+                    },
+                )
+                break
+            except ClientError as e:
+                conflict = (
+                    e.response["Error"].get("Code") == "ConditionalCheckFailedException"
+                )
+                if conflict and attempt < RATING_UPDATE_ATTEMPTS:
+                    # Another rating landed since the read
+                    continue
+                print(
+                    f"Failed to update service rating: {e.response['Error']['Message']}"
+                )
+                raise e
 
-    def fetch_reviews_for_service(self, service_id):
         try:
+            service_cache.invalidate(service_id)
+        except Exception as e:
+            logging.error(f"Failed to invalidate service {service_id}: {e}")
+
+    def _query_reviews(self, index_name, key_condition):
+        """Every review matching key_condition on a timestamp index, newest first."""
+        kwargs = {
+            "IndexName": index_name,
+            "KeyConditionExpression": key_condition,
+            "ScanIndexForward": False,
+        }
+        reviews = []
+        while True:
+            response = self.reviews_table.query(**kwargs)
+            reviews.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return reviews
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def scan_review_messages(self):
+        """Every review's ServiceId and RatingMessage, one scan page at a time."""
+        kwargs = {"ProjectionExpression": "ServiceId, RatingMessage"}
+        while True:
+            response = self.reviews_table.scan(**kwargs)
+            yield from response.get("Items", [])
+            if "LastEvaluatedKey" not in response:
+                return
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
-            # Query to get all reviews with matching ServiceId
-            response = self.reviews_table.scan(
-                FilterExpression=Key("ServiceId").eq(service_id)
+    def fetch_reviews_for_service(self, service_id):
+        try:
+            return self._query_reviews(
+                REVIEWS_BY_SERVICE_INDEX, Key("ServiceId").eq(service_id)
             )
-            reviews = response.get("Items", [])
-
-            # Sort reviews by Timestamp in descending order (latest first)
-            reviews.sort(key=lambda x: x["Timestamp"], reverse=True)
-
-            return reviews
         except ClientError as e:
             print(f"Error fetching reviews: {e.response['Error']['Message']}")
             return []
 
+    def fetch_review_page(self, service_id, limit, start_key=None):
+        """
+        Up to limit of a service's reviews, newest first, starting after
+        start_key. Returns (reviews, next_key); next_key is None on the last
+        page, otherwise it is the start_key of the next one.
+        """
+        kwargs = {
+            "IndexName": REVIEWS_BY_SERVICE_INDEX,
+            "KeyConditionExpression": Key("ServiceId").eq(service_id),
+            "ScanIndexForward": False,
+            # One extra review tells whether there is a next page
+            "Limit": limit + 1,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        try:
+            items = self.reviews_table.query(**kwargs).get("Items", [])
+        except ClientError as e:
+            print(f"Error fetching reviews: {e.response['Error']['Message']}")
+            return [], None
+        reviews = items[:limit]
+        next_key = _review_cursor(reviews[-1]) if len(items) > limit else None
+        return reviews, next_key
+
     def add_bookmark(self, bookmark_id, user_id, service_id):
         try:
             timestamp = datetime.utcnow().isoformat()
@@ -250,14 +338,7 @@ class HomeRepository:
 
     def fetch_reviews_by_user(self, user_id):
         try:
-            # Since 'UserId' is not the primary key, we need to scan with a filter
-            response = self.reviews_table.scan(
-                FilterExpression=Attr("UserId").eq(user_id)
-            )
-            reviews = response.get("Items", [])
-            # Sort reviews by Timestamp in descending order
-            reviews.sort(key=lambda x: x["Timestamp"], reverse=True)
-            return reviews
+            return self._query_reviews(REVIEWS_BY_USER_INDEX, Key("UserId").eq(user_id))
         except ClientError as e:
             print(f"Error fetching reviews: {e.response['Error']['Message']}")
             return []
@@ -387,12 +468,78 @@ class HomeRepository:
 
             # Delete the review from the table
             self.reviews_table.delete_item(Key={"ReviewId": review_id})
+            invalidate_review_pages(review["ServiceId"])
+            update_review_terms(
+                [(review["ServiceId"], review.get("RatingMessage"), "")]
+            )
 
             return review  # Return the review details for further processing
         except ClientError as e:
             print(f"Failed to delete review: {e.response['Error']['Message']}")
             raise e
 
+    def delete_reviews(self, review_ids):
+        """
+        Delete many reviews with BatchWriteItem requests of up to 25 deletes,
+        then invalidate their services' review pages and term counts, as
+        delete_review does. A batch that fails is logged and the remaining
+        batches still go ahead; returns the set of review ids not deleted.
+        """
+        review_ids = list(dict.fromkeys(review_ids))
+        table_name = self.reviews_table.name
+        reviews = {}
+        try:
+            # The deleted items are needed for their ServiceId and message
+            for i in range(0, len(review_ids), 100):
+                request = {
+                    table_name: {
+                        "Keys": [
+                            {"ReviewId": review_id}
+                            for review_id in review_ids[i : i + 100]
+                        ]
+                    }
+                }
+                while request:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get("Responses", {}).get(table_name, []):
+                        reviews[item["ReviewId"]] = item
+                    request = response.get("UnprocessedKeys")
+        except ClientError as e:
+            print(f"Failed to fetch reviews: {e.response['Error']['Message']}")
+            raise e
+
+        failed = set()
+        for i in range(0, len(review_ids), 25):
+            request = {
+                table_name: [
+                    {"DeleteRequest": {"Key": {"ReviewId": review_id}}}
+                    for review_id in review_ids[i : i + 25]
+                ]
+            }
+            try:
+                while request:
+                    response = self.dynamodb.batch_write_item(RequestItems=request)
+                    request = response.get("UnprocessedItems")
+            except ClientError as e:
+                # Whatever is still in the request was not deleted
+                batch = [
+                    item["DeleteRequest"]["Key"]["ReviewId"]
+                    for item in request[table_name]
+                ]
+                logging.error(
+                    f"Failed to delete reviews {batch}: {e.response['Error']['Message']}"
+                )
+                failed.update(batch)
+
+        deleted = [
+            review for review_id, review in reviews.items() if review_id not in failed
+        ]
+        invalidate_review_pages(*(review["ServiceId"] for review in deleted))
+        update_review_terms(
+            (review["ServiceId"], review.get("RatingMessage"), "") for review in deleted
+        )
+        return failed
+
     def edit_review(self, review_id, new_rating, new_message):
         try:
             # Fetch the original review
@@ -412,6 +559,16 @@ class HomeRepository:
                     ":m": new_message,
                 },
             )
+            invalidate_review_pages(original_review["ServiceId"])
+            update_review_terms(
+                [
+                    (
+                        original_review["ServiceId"],
+                        original_review.get("RatingMessage"),
+                        new_message,
+                    )
+                ]
+            )
             return {
                 "success": True,
                 "message": "Review updated successfully.",
@@ -0,0 +1,100 @@
+"""
+Cached pages of a service's reviews for get_reviews.
+
+Pages are read with one small query each on the reviews' timestamp index,
+newest first, continuing from the cursor the previous page left. Page and
+cursor keys include the service's reviews version, so writes invalidate by
+bumping the version (invalidate_review_pages) instead of finding and
+deleting pages; the old pages simply expire. HomeRepository invalidates on
+every review write it makes; callers that change reviews elsewhere
+(responses, bulk moderation deletes) invalidate themselves.
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+REVIEWS_PER_PAGE = 5
+
+
+def _version_key(service_id):
+    return f"reviews:version:{service_id}"
+
+
+def _page_key(service_id, version, page):
+    return f"reviews:page:{service_id}:{version}:{page}"
+
+
+def _cursors_key(service_id, version):
+    return f"reviews:cursors:{service_id}:{version}"
+
+
+def _version(service_id):
+    key = _version_key(service_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # Another process may have set it meanwhile; use theirs
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate_review_pages(*service_ids):
+    """Call after any change to the reviews of these services."""
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(service_id): version for service_id in set(service_ids)}, None
+    )
+
+
+def get_review_page(repo, service_id, page):
+    """
+    One page of a service's reviews as get_reviews returns it: the reviews
+    plus has_next, has_previous and current_page. Pages past the end (and
+    page numbers below 1) get the last page, as Paginator.get_page does.
+
+    A miss queries only that page, starting from the cached cursor of the
+    page before it; pages whose cursor isn't known yet are walked to, and
+    cached, from the furthest known one. Queries go through repo, a
+    HomeRepository.
+    """
+    version = _version(service_id)
+    cached = cache.get(_page_key(service_id, version, page))
+    if cached is not None:
+        return cached
+
+    # cursors[n - 1] is the start key of page n
+    cursors_key = _cursors_key(service_id, version)
+    cursors = cache.get(cursors_key) or [None]
+    target = page if page >= 1 else math.inf
+    number = min(target, len(cursors))
+    pages = {}
+    while True:
+        reviews, next_key = repo.fetch_review_page(
+            service_id, REVIEWS_PER_PAGE, cursors[number - 1]
+        )
+        pages[number] = {
+            "reviews": reviews,
+            "has_next": next_key is not None,
+            "has_previous": number > 1,
+            "current_page": number,
+        }
+        if next_key is None:
+            break
+        if len(cursors) == number:
+            cursors.append(next_key)
+        if number >= target:
+            break
+        number += 1
+
+    cache.set_many(
+        {
+            cursors_key: cursors,
+            **{_page_key(service_id, version, n): data for n, data in pages.items()},
+        },
+        settings.REVIEW_PAGE_CACHE_TTL,
+    )
+    return pages[number]
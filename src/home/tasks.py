@@ -0,0 +1,8 @@
+from tasks.registry import task
+from .repositories import HomeRepository
+
+
+# Retries are safe: update_service_rating only raises before its write lands
+@task(max_attempts=5, retry_delay=5)
+def update_service_rating(service_id, rating):
+    HomeRepository().update_service_rating(service_id=service_id, new_rating=rating)
@@ -1,14 +1,17 @@
 import logging
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 import json
 from better_profanity import profanity
 from accounts.models import CustomUser
 from unittest.mock import patch, MagicMock
 from decimal import Decimal
+from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
 import uuid
 from home.repositories import HomeRepository
+from services.models import ReviewTerm
+from home.review_pages import get_review_page, invalidate_review_pages
 
 
 # tests.py
@@ -485,7 +488,7 @@ class ViewsTest(TestCase):
             {"id": "1", "rating": 5, "message": "Great!"},
             {"id": "2", "rating": 4, "message": "Good!"},
         ]
-        self.mock_repo.fetch_reviews_for_service.return_value = mock_reviews
+        self.mock_repo.fetch_review_page.return_value = (mock_reviews, None)
 
         response = self.client.get(
             reverse("get_reviews", kwargs={"service_id": "123"}), {"page": "1"}
@@ -498,7 +501,7 @@ class ViewsTest(TestCase):
         self.assertIn("has_previous", response_data)
         self.assertEqual(response_data["current_page"], 1)
 
-        self.mock_repo.fetch_reviews_for_service.assert_called_once_with("123")
+        self.mock_repo.fetch_review_page.assert_called_once_with("123", 5, None)
 
     def test_submit_review_unauthenticated(self):
         response = self.client.post(
@@ -520,7 +523,7 @@ class ViewsTest(TestCase):
         self.assertEqual(response.context["page_obj"].number, 1)
 
     def test_get_reviews_no_reviews(self):
-        self.mock_repo.fetch_reviews_for_service.return_value = []
+        self.mock_repo.fetch_review_page.return_value = ([], None)
 
         response = self.client.get(
             reverse("get_reviews", kwargs={"service_id": "123"}), {"page": "1"}
@@ -604,6 +607,14 @@ class HomeRepositoryTests(TestCase):
         )
 
         self.mock_reviews_table.put_item.assert_called_once()
+        self.assertEqual(
+            set(
+                ReviewTerm.objects.filter(
+                    service_id=self.sample_service_id
+                ).values_list("term", "count")
+            ),
+            {("great", 1), ("service", 1)},
+        )
 
     def test_add_review_client_error(self):
         self.mock_reviews_table.put_item.side_effect = ClientError(
@@ -630,6 +641,52 @@ class HomeRepositoryTests(TestCase):
 
         self.mock_services_table.get_item.assert_called_once()
         self.mock_services_table.update_item.assert_called_once()
+        kwargs = self.mock_services_table.update_item.call_args.kwargs
+        self.assertEqual(
+            kwargs["ExpressionAttributeValues"],
+            {":r": Decimal("4.55"), ":c": 11},
+        )
+        self.assertEqual(kwargs["ConditionExpression"], Attr("rating_count").eq(10))
+
+    def test_update_service_rating_rereads_after_a_concurrent_update(self):
+        self.mock_services_table.get_item.side_effect = [
+            {"Item": {"Ratings": Decimal("4"), "rating_count": 1}},
+            {"Item": {"Ratings": Decimal("3"), "rating_count": 2}},
+        ]
+        self.mock_services_table.update_item.side_effect = [
+            ClientError(
+                error_response={
+                    "Error": {
+                        "Code": "ConditionalCheckFailedException",
+                        "Message": "The conditional request failed",
+                    }
+                },
+                operation_name="UpdateItem",
+            ),
+            {},
+        ]
+
+        self.repo.update_service_rating(service_id=self.sample_service_id, new_rating=5)
+
+        self.assertEqual(self.mock_services_table.update_item.call_count, 2)
+        kwargs = self.mock_services_table.update_item.call_args.kwargs
+        self.assertEqual(
+            kwargs["ExpressionAttributeValues"],
+            {":r": Decimal("3.67"), ":c": 3},
+        )
+
+    @patch("home.repositories.service_cache")
+    def test_update_service_rating_does_not_raise_after_the_write(self, mock_cache):
+        # A raise here would make the task retry and count the rating twice
+        mock_cache.invalidate.side_effect = ConnectionError("cache down")
+        self.mock_services_table.get_item.return_value = {"Item": {}}
+
+        self.repo.update_service_rating(service_id=self.sample_service_id, new_rating=5)
+
+        kwargs = self.mock_services_table.update_item.call_args.kwargs
+        self.assertEqual(
+            kwargs["ConditionExpression"], Attr("rating_count").not_exists()
+        )
 
     def test_update_service_rating_client_error(self):
         self.mock_services_table.get_item.side_effect = ClientError(
@@ -652,8 +709,8 @@ class HomeRepositoryTests(TestCase):
         self.assertEqual(result[0]["Address"], "123 Test St")
 
     def test_fetch_reviews_for_service_success(self):
-        # Mock the reviews table scan response
-        self.mock_reviews_table.scan.return_value = {
+        # Mock the reviews index query response
+        self.mock_reviews_table.query.return_value = {
             "Items": [
                 {
                     "ReviewId": "1",
@@ -668,18 +725,68 @@ class HomeRepositoryTests(TestCase):
 
         self.assertEqual(len(result), 1)
         self.assertEqual(result[0]["ReviewId"], "1")
-        self.mock_reviews_table.scan.assert_called_once()
+        kwargs = self.mock_reviews_table.query.call_args.kwargs
+        self.assertEqual(kwargs["IndexName"], "ServiceTimestampIndex")
+        self.assertFalse(kwargs["ScanIndexForward"])
+        self.mock_reviews_table.scan.assert_not_called()
+
+    def test_fetch_reviews_for_service_follows_last_evaluated_key(self):
+        cursor = {"ReviewId": "1", "ServiceId": "s", "Timestamp": "t"}
+        self.mock_reviews_table.query.side_effect = [
+            {"Items": [{"ReviewId": "1"}], "LastEvaluatedKey": cursor},
+            {"Items": [{"ReviewId": "2"}]},
+        ]
+
+        result = self.repo.fetch_reviews_for_service(self.sample_service_id)
+
+        self.assertEqual([review["ReviewId"] for review in result], ["1", "2"])
+        self.assertEqual(
+            self.mock_reviews_table.query.call_args.kwargs["ExclusiveStartKey"], cursor
+        )
+
+    def test_fetch_review_page_limits_the_query(self):
+        items = [
+            {
+                "ReviewId": str(i),
+                "ServiceId": "s",
+                "UserId": "u",
+                "Timestamp": str(9 - i),
+            }
+            for i in range(6)
+        ]
+        self.mock_reviews_table.query.return_value = {"Items": items}
+
+        reviews, next_key = self.repo.fetch_review_page("s", 5, {"ReviewId": "x"})
+
+        self.assertEqual(len(reviews), 5)
+        self.assertEqual(
+            next_key, {"ReviewId": "4", "ServiceId": "s", "Timestamp": "5"}
+        )
+        kwargs = self.mock_reviews_table.query.call_args.kwargs
+        self.assertEqual(kwargs["Limit"], 6)
+        self.assertEqual(kwargs["ExclusiveStartKey"], {"ReviewId": "x"})
+
+    def test_fetch_review_page_last_page(self):
+        self.mock_reviews_table.query.return_value = {"Items": [{"ReviewId": "1"}]}
+
+        reviews, next_key = self.repo.fetch_review_page("s", 5)
+
+        self.assertEqual(len(reviews), 1)
+        self.assertIsNone(next_key)
+        self.assertNotIn(
+            "ExclusiveStartKey", self.mock_reviews_table.query.call_args.kwargs
+        )
 
     def test_fetch_reviews_for_service_client_error(self):
-        self.mock_reviews_table.scan.side_effect = ClientError(
+        self.mock_reviews_table.query.side_effect = ClientError(
             error_response={"Error": {"Message": "DynamoDB Error"}},
-            operation_name="Scan",
+            operation_name="Query",
         )
 
         result = self.repo.fetch_reviews_for_service(self.sample_service_id)
 
         self.assertEqual(result, [])
-        self.mock_reviews_table.scan.assert_called_once()
+        self.mock_reviews_table.query.assert_called_once()
 
     def test_add_bookmark_success(self):
         self.mock_bookmarks_table.put_item.return_value = {}
@@ -743,9 +850,15 @@ class HomeRepositoryTests(TestCase):
         }
         self.mock_reviews_table.delete_item.return_value = {}
 
+        ReviewTerm.objects.create(service_id="service-123", term="great", count=2)
+        ReviewTerm.objects.create(service_id="service-123", term="service", count=1)
+
         result = self.repo.delete_review("review-123")
 
         self.assertEqual(result["ReviewId"], "review-123")
+        self.assertEqual(
+            list(ReviewTerm.objects.values_list("term", "count")), [("great", 1)]
+        )
         self.mock_reviews_table.get_item.assert_called_once_with(
             Key={"ReviewId": "review-123"}
         )
@@ -788,6 +901,67 @@ class HomeRepositoryTests(TestCase):
             Key={"ReviewId": "review-123"}
         )
 
+    @patch("home.repositories.invalidate_review_pages")
+    def test_delete_reviews_in_batches_updates_pages_and_terms(self, mock_invalidate):
+        self.mock_reviews_table.name = "reviews"
+        review_ids = [f"review-{i}" for i in range(30)]
+        self.mock_dynamodb.batch_get_item.return_value = {
+            "Responses": {
+                "reviews": [
+                    {
+                        "ReviewId": review_id,
+                        "ServiceId": "service-123",
+                        "RatingMessage": "Great",
+                    }
+                    for review_id in review_ids
+                ]
+            }
+        }
+        self.mock_dynamodb.batch_write_item.return_value = {}
+        ReviewTerm.objects.create(service_id="service-123", term="great", count=31)
+
+        failed = self.repo.delete_reviews(review_ids + ["review-0"])
+
+        self.assertEqual(failed, set())
+        batches = [
+            call.kwargs["RequestItems"]["reviews"]
+            for call in self.mock_dynamodb.batch_write_item.call_args_list
+        ]
+        self.assertEqual([len(batch) for batch in batches], [25, 5])
+        mock_invalidate.assert_called_once()
+        self.assertEqual(set(mock_invalidate.call_args.args), {"service-123"})
+        self.assertEqual(ReviewTerm.objects.get().count, 1)
+
+    @patch("home.repositories.invalidate_review_pages")
+    def test_delete_reviews_reports_a_failed_batch(self, mock_invalidate):
+        self.mock_reviews_table.name = "reviews"
+        review_ids = [f"review-{i}" for i in range(30)]
+        self.mock_dynamodb.batch_get_item.return_value = {
+            "Responses": {
+                "reviews": [
+                    {"ReviewId": review_id, "ServiceId": f"service-{review_id}"}
+                    for review_id in review_ids
+                ]
+            }
+        }
+        self.mock_dynamodb.batch_write_item.side_effect = [
+            ClientError(
+                error_response={"Error": {"Message": "Throughput exceeded"}},
+                operation_name="BatchWriteItem",
+            ),
+            {},
+        ]
+
+        failed = self.repo.delete_reviews(review_ids)
+
+        # The second batch still goes ahead
+        self.assertEqual(failed, set(review_ids[:25]))
+        self.assertEqual(self.mock_dynamodb.batch_write_item.call_count, 2)
+        self.assertEqual(
+            set(mock_invalidate.call_args.args),
+            {f"service-{review_id}" for review_id in review_ids[25:]},
+        )
+
     def test_edit_review_success(self):
         self.mock_reviews_table.get_item.return_value = {
             "Item": {
@@ -808,6 +982,9 @@ class HomeRepositoryTests(TestCase):
         self.assertTrue(result["success"])
         self.assertEqual(result["message"], "Review updated successfully.")
         self.assertEqual(result["original_review"]["ReviewId"], "review-456")
+        self.assertEqual(
+            list(ReviewTerm.objects.values_list("term", "count")), [("good", 1)]
+        )
         self.mock_reviews_table.get_item.assert_called_once_with(
             Key={"ReviewId": "review-456"}
         )
@@ -991,7 +1168,7 @@ class GetReviewsTests(TestCase):
         self.patcher.stop()
 
     def test_get_reviews_exception(self):
-        self.mock_repo.fetch_reviews_for_service.side_effect = Exception("DB Error")
+        self.mock_repo.fetch_review_page.side_effect = Exception("DB Error")
         response = self.client.get(self.url, {"page": "1"})
         self.assertEqual(response.status_code, 500)
         response_data = json.loads(response.content)
@@ -1002,7 +1179,7 @@ class GetReviewsTests(TestCase):
             {"id": "1", "rating": 5, "message": "Great!"},
             {"id": "2", "rating": 4, "message": "Good!"},
         ]
-        self.mock_repo.fetch_reviews_for_service.return_value = mock_reviews
+        self.mock_repo.fetch_review_page.return_value = (mock_reviews, None)
 
         response = self.client.get(self.url, {"page": "invalid"})
         self.assertEqual(response.status_code, 500)
@@ -1090,7 +1267,7 @@ class HomeRepositoryFetchReviewsByUserTests(TestCase):
 
     def test_fetch_reviews_by_user_success(self):
         user_id = "user-001"
-        self.mock_reviews_table.scan.return_value = {
+        self.mock_reviews_table.query.return_value = {
             "Items": [
                 {
                     "ReviewId": "r1",
@@ -1106,16 +1283,20 @@ class HomeRepositoryFetchReviewsByUserTests(TestCase):
         }
         result = self.repo.fetch_reviews_by_user(user_id)
         self.assertEqual(len(result), 2)
-        self.mock_reviews_table.scan.assert_called_once()
+        self.assertEqual(
+            self.mock_reviews_table.query.call_args.kwargs["IndexName"],
+            "UserTimestampIndex",
+        )
+        self.mock_reviews_table.scan.assert_not_called()
 
     def test_fetch_reviews_by_user_client_error(self):
-        self.mock_reviews_table.scan.side_effect = ClientError(
+        self.mock_reviews_table.query.side_effect = ClientError(
             error_response={"Error": {"Message": "DynamoDB Error"}},
-            operation_name="Scan",
+            operation_name="Query",
         )
         result = self.repo.fetch_reviews_by_user("user-001")
         self.assertEqual(result, [])
-        self.mock_reviews_table.scan.assert_called_once()
+        self.mock_reviews_table.query.assert_called_once()
 
 
 class HomeRepositoryGetServicesByIdsTests(TestCase):
@@ -1507,3 +1688,95 @@ class SubmitReviewProfanityTests(TestCase):
         call_kwargs = self.mock_home_repo.add_review.call_args[1]
         self.assertIn("****", call_kwargs["rating_message"])
         self.assertNotIn("ShIt", call_kwargs["rating_message"])
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class PagedReviews:
+    """Stands in for HomeRepository.fetch_review_page over a list of reviews."""
+
+    def __init__(self, count):
+        self.reviews = [
+            {"ReviewId": f"review-{i}", "ServiceId": "service-1"} for i in range(count)
+        ]
+        self.calls = []
+
+    def fetch_review_page(self, service_id, limit, start_key=None):
+        self.calls.append((service_id, start_key))
+        start = 0 if start_key is None else start_key + 1
+        reviews = self.reviews[start : start + limit]
+        has_next = start + limit < len(self.reviews)
+        return reviews, start + limit - 1 if has_next else None
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ReviewPageCacheTests(TestCase):
+    def setUp(self):
+        self.repo = PagedReviews(12)
+        invalidate_review_pages("service-1", "service-2")
+
+    def test_each_page_is_one_query_from_the_previous_cursor(self):
+        pages = [get_review_page(self.repo, "service-1", page) for page in (1, 2, 3)]
+
+        self.assertEqual(
+            self.repo.calls,
+            [("service-1", None), ("service-1", 4), ("service-1", 9)],
+        )
+        self.assertEqual([len(page["reviews"]) for page in pages], [5, 5, 2])
+        self.assertEqual(pages[1]["reviews"][0]["ReviewId"], "review-5")
+        self.assertTrue(pages[1]["has_previous"])
+        self.assertFalse(pages[2]["has_next"])
+
+    def test_cached_pages_are_not_queried_again(self):
+        get_review_page(self.repo, "service-1", 1)
+        get_review_page(self.repo, "service-1", 1)
+
+        self.assertEqual(len(self.repo.calls), 1)
+
+    def test_jumping_ahead_walks_and_caches_the_pages_between(self):
+        self.assertEqual(get_review_page(self.repo, "service-1", 3)["current_page"], 3)
+        get_review_page(self.repo, "service-1", 2)
+
+        self.assertEqual(len(self.repo.calls), 3)
+
+    def test_out_of_range_pages_get_the_last_page(self):
+        self.assertEqual(get_review_page(self.repo, "service-1", 9)["current_page"], 3)
+        self.assertEqual(get_review_page(self.repo, "service-1", 0)["current_page"], 3)
+
+    def test_no_reviews(self):
+        page = get_review_page(PagedReviews(0), "service-1", 1)
+
+        self.assertEqual(page["reviews"], [])
+        self.assertFalse(page["has_next"])
+
+    def test_invalidation_rebuilds_only_that_service(self):
+        get_review_page(self.repo, "service-1", 1)
+        get_review_page(self.repo, "service-2", 1)
+
+        invalidate_review_pages("service-1")
+        get_review_page(self.repo, "service-1", 1)
+        get_review_page(self.repo, "service-2", 1)
+
+        self.assertEqual(
+            [service_id for service_id, _ in self.repo.calls],
+            ["service-1", "service-2", "service-1"],
+        )
+
+    @patch("home.repositories.boto3.resource")
+    def test_review_writes_invalidate_the_pages(self, mock_boto_resource):
+        home_repo = HomeRepository()
+        home_repo.reviews_table.get_item.return_value = {
+            "Item": {"ReviewId": "review-0", "ServiceId": "service-1"}
+        }
+        writes = [
+            lambda: home_repo.add_review("r", "service-1", "1", 5, "Great", "u"),
+            lambda: home_repo.edit_review("review-0", 4, "Good"),
+            lambda: home_repo.delete_review("review-0"),
+        ]
+        for write in writes:
+            get_review_page(self.repo, "service-1", 1)
+            calls = len(self.repo.calls)
+            write()
+            get_review_page(self.repo, "service-1", 1)
+            self.assertEqual(len(self.repo.calls), calls + 1)
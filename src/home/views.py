@@ -12,8 +12,11 @@ from django.views.decorators.http import require_http_methods
 
 from accounts.models import CustomUser
 from forum.models import Notification
+from moderation.status import flag_statuses
 from services.repositories import ServiceRepository
 from .repositories import HomeRepository
+from .review_pages import get_review_page
+from .tasks import update_service_rating
 
 # TODO These constants are maintained in the JS frontend and here, we'll have to unify them
 DEFAULT_LAT, DEFAULT_LON = 40.7128, -74.0060
@@ -74,8 +77,8 @@ def submit_review(request):
                     username=user.username,
                 )
 
-                # Update the service's rating and rating count
-                repo.update_service_rating(service_id=service_id, new_rating=rating)
+                # Update the service's rating and rating count in the background
+                update_service_rating.enqueue(service_id=service_id, rating=rating)
 
                 # Create notification for service provider
                 Notification.objects.create(
@@ -229,22 +232,24 @@ def get_reviews(request, service_id):
     try:
         page = int(request.GET.get("page", 1))  # Default to page 1
         repo = HomeRepository()
-
-        # Fetch all reviews for the given service ID
-        reviews = repo.fetch_reviews_for_service(service_id)
         user = request.user
 
-        # Paginate the reviews (5 reviews per page)
-        paginator = Paginator(reviews, 5)  # 5 reviews per page
-        page_obj = paginator.get_page(page)
+        # The page of reviews (5 per page, newest first) is shared by all
+        # users; the username and flag statuses are per user
+        page_data = get_review_page(repo, service_id, page)
 
         # Prepare the response
         response_data = {
-            "reviews": list(page_obj.object_list),
-            "has_next": page_obj.has_next(),
-            "has_previous": page_obj.has_previous(),
-            "current_page": page_obj.number,
+            **page_data,
             "username": user.username,
+            "flag_statuses": (
+                flag_statuses(
+                    user,
+                    [("REVIEW", review["ReviewId"]) for review in page_data["reviews"]],
+                )
+                if user.is_authenticated
+                else {}
+            ),
         }
 
         return JsonResponse(response_data, status=200)
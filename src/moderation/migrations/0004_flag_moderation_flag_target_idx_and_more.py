@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 12:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("moderation", "0003_flag_content_author_flag_content_preview_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flag",
+            index=models.Index(
+                fields=["content_type", "object_id", "status"],
+                name="moderation_flag_target_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="flag",
+            index=models.Index(
+                fields=["status", "-created_at"], name="moderation_flag_status_idx"
+            ),
+        ),
+    ]
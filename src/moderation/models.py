@@ -3,7 +3,7 @@ from django.db import models
 from accounts.models import CustomUser
 from forum.models import Post, Comment
 from services.models import ReviewDTO
-from services.repositories import ReviewRepository
+from .resolvers import ContentResolver
 
 
 class Flag(models.Model):
@@ -94,25 +94,24 @@ class Flag(models.Model):
         max_length=255, help_text="Username of the content author"
     )
 
-    def get_content_object(self):
-        try:
-            if self.content_type == "FORUM POST":
-                return Post.objects.get(id=self.object_id)
+    def set_content_object(self, content_object):
+        self._content_object = (
+            (self.content_type, str(self.object_id)),
+            content_object,
+        )
 
-            elif self.content_type == "FORUM COMMENT":
-                return Comment.objects.get(id=self.object_id)
-
-            elif self.content_type == "REVIEW":
-                # Reviews are stored in NoSQL, so we use the repository
-                repo = ReviewRepository()
-                return repo.get_review(self.object_id)
-
-            return None
-
-        except (Post.DoesNotExist, Comment.DoesNotExist, Exception) as e:
-            # Log the error if needed
-            print(f"Error fetching content object: {str(e)}")
-            return None
+    def get_content_object(self, resolver=None):
+        """
+        The flagged post, comment or review, or None if it no longer exists.
+        The result is kept on the flag; pass the request's ContentResolver to
+        share lookups with other flags.
+        """
+        key = (self.content_type, str(self.object_id))
+        cached = getattr(self, "_content_object", None)
+        if cached is None or cached[0] != key:
+            resolver = resolver or ContentResolver()
+            self.set_content_object(resolver.get(*key))
+        return self._content_object[1]
 
     def save(self, *args, **kwargs):
         # Ensure object_id is a string
@@ -151,6 +150,17 @@ class Flag(models.Model):
         unique_together = ["content_type", "object_id", "flagger"]
         # Order flags by creation date, newest first
         ordering = ["-created_at"]
+        indexes = [
+            # Pending flags on a piece of content
+            models.Index(
+                fields=["content_type", "object_id", "status"],
+                name="moderation_flag_target_idx",
+            ),
+            # Moderation queue: pending flags, newest first
+            models.Index(
+                fields=["status", "-created_at"], name="moderation_flag_status_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"Flag by {self.flagger.username} on {self.content_type} ({self.status})"
@@ -0,0 +1,97 @@
+"""
+Batched lookups of the content that flags point at.
+
+A ContentResolver fetches the posts, comments and reviews behind any number
+of flags with one query per content type (in_bulk for the forum models, one
+batch_get_item for reviews) and remembers the results, so asking again for
+the same content is free. Views share one resolver per request through
+get_content_resolver().
+"""
+
+import logging
+
+from forum.models import Comment, Post
+from services.repositories import ReviewRepository
+
+log = logging.getLogger(__name__)
+
+_MODELS = {"FORUM POST": Post, "FORUM COMMENT": Comment}
+
+
+def _int_id(object_id):
+    try:
+        return int(object_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class ContentResolver:
+    def __init__(self):
+        self._objects = {}
+        self._review_repo = None
+
+    @property
+    def review_repo(self):
+        # Only built when a review is needed; creating the boto3 resource
+        # is not free
+        if self._review_repo is None:
+            self._review_repo = ReviewRepository()
+        return self._review_repo
+
+    def resolve(self, keys):
+        """
+        Look up every (content_type, object_id) pair in keys that hasn't been
+        seen yet. Returns a dict of pair -> object (None if it doesn't exist).
+        """
+        keys = {(content_type, str(object_id)) for content_type, object_id in keys}
+        missing = {}
+        for content_type, object_id in keys - self._objects.keys():
+            missing.setdefault(content_type, set()).add(object_id)
+
+        for content_type, object_ids in missing.items():
+            try:
+                found = self._fetch(content_type, object_ids)
+            except Exception as e:
+                log.error(f"Error fetching {content_type} content: {e}")
+                found = {}
+            for object_id in object_ids:
+                self._objects[(content_type, object_id)] = found.get(object_id)
+
+        return {key: self._objects[key] for key in keys}
+
+    def get(self, content_type, object_id):
+        key = (content_type, str(object_id))
+        return self.resolve([key])[key]
+
+    def attach(self, flags):
+        """Resolve the content of many flags at once and cache it on each flag."""
+        flags = list(flags)
+        objects = self.resolve((flag.content_type, flag.object_id) for flag in flags)
+        for flag in flags:
+            flag.set_content_object(objects[(flag.content_type, str(flag.object_id))])
+        return flags
+
+    def _fetch(self, content_type, object_ids):
+        model = _MODELS.get(content_type)
+        if model is not None:
+            ids = {_int_id(object_id) for object_id in object_ids} - {None}
+            objects = model.objects.select_related("author").in_bulk(ids)
+            return {str(pk): obj for pk, obj in objects.items()}
+
+        if content_type == "REVIEW":
+            if len(object_ids) == 1:
+                # A single key is a plain get_item
+                (review_id,) = object_ids
+                review = self.review_repo.get_review(review_id)
+                return {review_id: review} if review else {}
+            return self.review_repo.get_reviews_by_ids(object_ids)
+
+        return {}
+
+
+def get_content_resolver(request):
+    """The ContentResolver shared by everything handling this request."""
+    resolver = getattr(request, "_content_resolver", None)
+    if resolver is None:
+        resolver = request._content_resolver = ContentResolver()
+    return resolver
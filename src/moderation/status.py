@@ -0,0 +1,60 @@
+"""
+Flag status of many pieces of content in one query.
+
+Pages that show flag icons put the statuses of everything they render into
+their context (or their JSON response), so the browser doesn't have to ask
+about each item. Anything rendered later can be looked up in bulk through
+the flag_statuses endpoint.
+"""
+
+from django.db.models import Count, Q
+
+from .models import Flag
+
+MAX_STATUS_ITEMS = 200
+
+
+def status_key(content_type, object_id):
+    return f"{content_type}:{object_id}"
+
+
+def flag_statuses(user, items):
+    """
+    Flag status of each (content_type, object_id) pair in items for a
+    logged-in user, keyed by status_key(). Each status has the same fields
+    check_flag_status returns.
+    """
+    ids_by_type = {}
+    for content_type, object_id in items:
+        ids_by_type.setdefault(content_type, set()).add(str(object_id))
+
+    statuses = {
+        status_key(content_type, object_id): {
+            "userHasFlagged": False,
+            "hasPendingFlags": False,
+            "pendingFlagsCount": 0,
+        }
+        for content_type, object_ids in ids_by_type.items()
+        for object_id in object_ids
+    }
+    if not statuses:
+        return statuses
+
+    matches = Q()
+    for content_type, object_ids in ids_by_type.items():
+        matches |= Q(content_type=content_type, object_id__in=object_ids)
+    rows = (
+        Flag.objects.filter(matches, status="PENDING")
+        .values("content_type", "object_id")
+        .annotate(
+            pending=Count("id"), flagged_by_user=Count("id", filter=Q(flagger=user))
+        )
+        .order_by()
+    )
+    for row in rows:
+        statuses[status_key(row["content_type"], row["object_id"])] = {
+            "userHasFlagged": row["flagged_by_user"] > 0,
+            "hasPendingFlags": True,
+            "pendingFlagsCount": row["pending"],
+        }
+    return statuses
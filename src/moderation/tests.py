@@ -4,15 +4,21 @@ from datetime import datetime
 from unittest.mock import patch, MagicMock
 
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.db import IntegrityError
 
 from accounts.models import CustomUser
 from services.models import ReviewDTO
+from services.repositories import ReviewRepository
 from forum.models import Post, Comment, Category, Notification
 from home.repositories import HomeRepository
 from moderation.models import Flag
+from moderation.resolvers import ContentResolver
+from moderation.status import MAX_STATUS_ITEMS, flag_statuses
+from public_service_finder.utils.query_plan import QueryPlanAssertions
 
 
 class ModerationViewsTest(TestCase):
@@ -853,3 +859,495 @@ class ModerationViewsAdditionalTest(TestCase):
 
         self.assertEqual(response.status_code, 302)  # Redirect to login
         self.assertTrue("/login/" in response.url)
+
+
+class FlagQueryPlanTest(QueryPlanAssertions, TestCase):
+    def test_pending_flags_for_content_use_index(self):
+        self.assertUsesIndex(
+            Flag.objects.filter(
+                content_type="FORUM POST", object_id="1", status="PENDING"
+            ).order_by()
+        )
+
+    def test_moderation_queue_uses_index(self):
+        self.assertUsesIndex(Flag.objects.filter(status="PENDING"))
+
+
+class BulkReviewFlagsTest(TestCase):
+    def setUp(self):
+        self.admin_user = CustomUser.objects.create_user(
+            username="adminuser",
+            email="admin@example.com",
+            password="adminpass",
+            is_superuser=True,
+        )
+        self.author = CustomUser.objects.create_user(
+            username="author", email="author@example.com", password="authorpass"
+        )
+        self.flaggers = [
+            CustomUser.objects.create_user(
+                username=f"flagger{i}", email=f"flagger{i}@example.com", password="x"
+            )
+            for i in range(3)
+        ]
+        category = Category.objects.create(name="General")
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content="Content",
+                author=self.author,
+                category=category,
+            )
+            for i in range(3)
+        ]
+        self.comment = Comment.objects.create(
+            content="Comment", author=self.author, post=self.posts[0]
+        )
+        self.review_id = str(uuid.uuid4())
+        self.client.login(username="adminuser", password="adminpass")
+
+    def flag(self, content_type, object_id, flagger):
+        # A preview is given so saving doesn't look the content up
+        return Flag.objects.create(
+            content_type=content_type,
+            object_id=object_id,
+            flagger=flagger,
+            reason="SPAM",
+            content_preview="preview",
+            content_author="author",
+        )
+
+    def post_bulk(self, action, flags):
+        return self.client.post(
+            reverse("moderation:bulk_review_flags"),
+            {"action": action, "flag_ids": [flag.id for flag in flags]},
+        )
+
+    def test_dismiss_updates_flags_and_notifies(self):
+        flags = [
+            self.flag("FORUM POST", self.posts[0].id, self.flaggers[0]),
+            self.flag("FORUM POST", self.posts[0].id, self.flaggers[1]),
+            self.flag("FORUM COMMENT", self.comment.id, self.flaggers[2]),
+        ]
+
+        response = self.post_bulk("dismiss", flags)
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data["status"], "DISMISSED")
+        self.assertEqual(data["reviewed"], sorted(flag.id for flag in flags))
+        for flag in flags:
+            flag.refresh_from_db()
+            self.assertEqual(flag.status, "DISMISSED")
+            self.assertEqual(flag.reviewed_by, self.admin_user)
+        self.assertEqual(
+            Notification.objects.filter(
+                message="Your flag has been reviewed and dismissed"
+            ).count(),
+            3,
+        )
+        # One notification per piece of content, not per flag
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.author,
+                message="Your flagged content has been dismissed",
+            ).count(),
+            2,
+        )
+        self.assertEqual(Post.objects.count(), 3)
+
+    def test_revoke_deletes_content(self):
+        flags = [
+            self.flag("FORUM POST", self.posts[1].id, self.flaggers[0]),
+            self.flag("FORUM COMMENT", self.comment.id, self.flaggers[1]),
+            self.flag("REVIEW", self.review_id, self.flaggers[2]),
+        ]
+
+        with patch.object(HomeRepository, "__init__", return_value=None), patch.object(
+            HomeRepository, "delete_reviews", return_value=set()
+        ) as mock_delete_reviews:
+            response = self.post_bulk("revoke", flags)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["failed"], [])
+        self.assertFalse(Post.objects.filter(id=self.posts[1].id).exists())
+        self.assertFalse(Comment.objects.filter(id=self.comment.id).exists())
+        mock_delete_reviews.assert_called_once_with({self.review_id})
+        self.assertEqual(
+            set(Flag.objects.values_list("status", flat=True)), {"REVOKED"}
+        )
+        self.assertEqual(
+            Notification.objects.filter(
+                message="Your flag has been reviewed and accepted"
+            ).count(),
+            3,
+        )
+        self.assertFalse(Notification.objects.filter(recipient=self.author).exists())
+
+    def test_flags_on_reviews_not_deleted_stay_pending(self):
+        failed = self.flag("REVIEW", self.review_id, self.flaggers[0])
+        deleted = self.flag("REVIEW", "other-review", self.flaggers[1])
+
+        with patch.object(HomeRepository, "__init__", return_value=None), patch.object(
+            HomeRepository, "delete_reviews", return_value={self.review_id}
+        ):
+            response = self.post_bulk("revoke", [failed, deleted])
+
+        data = json.loads(response.content)
+        self.assertEqual(data["reviewed"], [deleted.id])
+        self.assertEqual(data["failed"], [failed.id])
+        failed.refresh_from_db()
+        deleted.refresh_from_db()
+        self.assertEqual(failed.status, "PENDING")
+        self.assertEqual(deleted.status, "REVOKED")
+        self.assertEqual(
+            list(Notification.objects.values_list("recipient_id", flat=True)),
+            [self.flaggers[1].id],
+        )
+
+    def test_failed_review_delete_rolls_back(self):
+        flag = self.flag("REVIEW", self.review_id, self.flaggers[0])
+
+        with patch.object(HomeRepository, "__init__", return_value=None), patch.object(
+            HomeRepository, "delete_reviews", side_effect=Exception("DynamoDB down")
+        ):
+            response = self.post_bulk("revoke", [flag])
+
+        self.assertEqual(response.status_code, 500)
+        flag.refresh_from_db()
+        self.assertEqual(flag.status, "PENDING")
+        self.assertFalse(Notification.objects.exists())
+
+    def test_already_reviewed_flags_are_skipped(self):
+        pending = self.flag("FORUM POST", self.posts[0].id, self.flaggers[0])
+        dismissed = self.flag("FORUM POST", self.posts[1].id, self.flaggers[1])
+        Flag.objects.filter(id=dismissed.id).update(status="DISMISSED")
+
+        response = self.post_bulk("revoke", [pending, dismissed])
+
+        self.assertEqual(json.loads(response.content)["reviewed"], [pending.id])
+        self.assertTrue(Post.objects.filter(id=self.posts[1].id).exists())
+
+    def test_query_count_does_not_grow_with_flags(self):
+        def queries_for(count):
+            Flag.objects.all().delete()
+            flags = [
+                self.flag("FORUM POST", self.posts[i].id, self.flaggers[i])
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                self.post_bulk("dismiss", flags)
+            return len(queries)
+
+        self.assertEqual(queries_for(1), queries_for(3))
+
+    def test_invalid_requests(self):
+        flag = self.flag("FORUM POST", self.posts[0].id, self.flaggers[0])
+        response = self.post_bulk("delete", [flag])
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse("moderation:bulk_review_flags"), {"action": "dismiss"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_admin_cannot_bulk_review(self):
+        flag = self.flag("FORUM POST", self.posts[0].id, self.flaggers[0])
+        self.client.login(username="author", password="authorpass")
+        response = self.post_bulk("dismiss", [flag])
+        self.assertEqual(response.status_code, 302)
+        flag.refresh_from_db()
+        self.assertEqual(flag.status, "PENDING")
+
+
+class ContentResolverTest(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(
+            username="author", email="author@example.com", password="authorpass"
+        )
+        category = Category.objects.create(name="General")
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content="Content",
+                author=self.author,
+                category=category,
+            )
+            for i in range(3)
+        ]
+        self.comment = Comment.objects.create(
+            content="Comment", author=self.author, post=self.posts[0]
+        )
+
+    def review(self, review_id):
+        return ReviewDTO(
+            review_id=review_id,
+            service_id="service_test",
+            user_id=str(self.author.id),
+            username=self.author.username,
+            rating_stars=4,
+            rating_message="Good service.",
+            timestamp=datetime.now().isoformat(),
+            responseText="",
+            responded_at="",
+        )
+
+    def test_one_query_per_content_type(self):
+        resolver = ContentResolver()
+        keys = [("FORUM POST", post.id) for post in self.posts]
+        keys += [("FORUM COMMENT", self.comment.id), ("FORUM POST", "missing")]
+
+        with self.assertNumQueries(2):
+            objects = resolver.resolve(keys)
+
+        self.assertEqual(objects[("FORUM POST", str(self.posts[1].id))], self.posts[1])
+        self.assertEqual(objects[("FORUM COMMENT", str(self.comment.id))], self.comment)
+        self.assertIsNone(objects[("FORUM POST", "missing")])
+        # Already resolved, including the misses, and authors come along
+        with self.assertNumQueries(0):
+            resolver.resolve(keys)
+            self.assertEqual(
+                resolver.get("FORUM POST", self.posts[0].id).author, self.author
+            )
+
+    @patch.object(ReviewRepository, "__init__", return_value=None)
+    def test_reviews_are_fetched_in_one_batch(self, mock_init):
+        review_ids = [str(uuid.uuid4()) for _ in range(3)]
+        with patch.object(
+            ReviewRepository,
+            "get_reviews_by_ids",
+            return_value={
+                review_id: self.review(review_id) for review_id in review_ids
+            },
+        ) as mock_batch:
+            resolver = ContentResolver()
+            resolver.resolve(("REVIEW", review_id) for review_id in review_ids)
+            review = resolver.get("REVIEW", review_ids[0])
+
+        mock_batch.assert_called_once()
+        self.assertEqual(set(mock_batch.call_args.args[0]), set(review_ids))
+        self.assertEqual(review.review_id, review_ids[0])
+        mock_init.assert_called_once()
+
+    def test_attach_caches_content_on_flags(self):
+        flagger = CustomUser.objects.create_user(
+            username="flagger", email="flagger@example.com", password="x"
+        )
+        for post in self.posts:
+            Flag.objects.create(
+                content_type="FORUM POST",
+                object_id=post.id,
+                flagger=flagger,
+                reason="SPAM",
+                content_preview="preview",
+            )
+
+        flags = ContentResolver().attach(Flag.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                {flag.get_content_object() for flag in flags}, set(self.posts)
+            )
+
+    @patch("services.repositories.ReviewRepository.get_review")
+    def test_review_flag_looks_content_up_once(self, mock_get_review):
+        review_id = str(uuid.uuid4())
+        mock_get_review.return_value = self.review(review_id)
+        CustomUser.objects.create_user(
+            username="adminuser",
+            email="admin@example.com",
+            password="adminpass",
+            is_superuser=True,
+        )
+        self.client.login(username="author", password="authorpass")
+        self.client.post(
+            reverse("moderation:create_flag"),
+            {"content_type": "REVIEW", "object_id": review_id, "reason": "SPAM"},
+        )
+        self.assertEqual(mock_get_review.call_count, 1)
+
+        mock_get_review.reset_mock()
+        self.client.login(username="adminuser", password="adminpass")
+        self.client.post(
+            reverse("moderation:review_flag", args=[Flag.objects.get().id]),
+            {"action": "dismiss"},
+        )
+        self.assertEqual(mock_get_review.call_count, 1)
+
+
+class AdminFlagNotificationTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="flagger", email="flagger@example.com", password="flaggerpass"
+        )
+        category = Category.objects.create(name="General")
+        self.posts = [
+            Post.objects.create(
+                title=f"Post {i}",
+                content="Content",
+                author=self.user,
+                category=category,
+            )
+            for i in range(2)
+        ]
+        self.client.login(username="flagger", password="flaggerpass")
+
+    def create_admins(self, count):
+        return [
+            CustomUser.objects.create_user(
+                username=f"admin{CustomUser.objects.count()}",
+                email=f"admin{CustomUser.objects.count()}@example.com",
+                password="x",
+                is_superuser=True,
+            )
+            for _ in range(count)
+        ]
+
+    def flag_post(self, post):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("moderation:create_flag"),
+                {"content_type": "FORUM POST", "object_id": post.id, "reason": "SPAM"},
+            )
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def unread_flag_admin(self):
+        return Notification.objects.filter(
+            notification_type="flag_admin", is_read=False
+        )
+
+    def test_query_count_does_not_depend_on_admin_count(self):
+        self.create_admins(1)
+        one_admin = self.flag_post(self.posts[0])
+        self.create_admins(5)
+        Notification.objects.all().delete()
+        six_admins = self.flag_post(self.posts[1])
+
+        self.assertEqual(one_admin, six_admins)
+        self.assertEqual(self.unread_flag_admin().count(), 6)
+
+    def test_admins_with_unread_notification_are_skipped(self):
+        notified, read, new = self.create_admins(3)
+        Notification.objects.create(
+            recipient=notified,
+            sender=self.user,
+            message="New flagged content requires review",
+            notification_type="flag_admin",
+        )
+        Notification.objects.create(
+            recipient=read,
+            sender=self.user,
+            message="New flagged content requires review",
+            notification_type="flag_admin",
+            is_read=True,
+        )
+
+        self.flag_post(self.posts[0])
+
+        self.assertEqual(
+            sorted(self.unread_flag_admin().values_list("recipient_id", flat=True)),
+            [notified.id, read.id, new.id],
+        )
+
+    def test_second_unread_flag_admin_notification_is_rejected(self):
+        (admin,) = self.create_admins(1)
+        notification = dict(
+            recipient=admin,
+            sender=self.user,
+            message="New flagged content requires review",
+            notification_type="flag_admin",
+        )
+        Notification.objects.create(**notification)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Notification.objects.create(**notification)
+
+
+class FlagStatusesTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            username="viewer", email="viewer@example.com", password="viewerpass"
+        )
+        self.other = CustomUser.objects.create_user(
+            username="other", email="other@example.com", password="otherpass"
+        )
+        self.review_id = str(uuid.uuid4())
+        for flagger, object_id in (
+            (self.user, "1"),
+            (self.other, "1"),
+            (self.other, "2"),
+        ):
+            self.flag(flagger, "FORUM POST", object_id)
+        self.flag(self.user, "REVIEW", self.review_id)
+        dismissed = self.flag(self.user, "FORUM POST", "3")
+        Flag.objects.filter(id=dismissed.id).update(status="DISMISSED")
+
+    def flag(self, flagger, content_type, object_id):
+        return Flag.objects.create(
+            content_type=content_type,
+            object_id=object_id,
+            flagger=flagger,
+            reason="SPAM",
+            content_preview="preview",
+        )
+
+    def test_statuses_in_one_query(self):
+        items = [("FORUM POST", i) for i in range(1, 5)] + [("REVIEW", self.review_id)]
+        with self.assertNumQueries(1):
+            statuses = flag_statuses(self.user, items)
+
+        self.assertEqual(
+            statuses["FORUM POST:1"],
+            {"userHasFlagged": True, "hasPendingFlags": True, "pendingFlagsCount": 2},
+        )
+        self.assertEqual(
+            statuses["FORUM POST:2"],
+            {"userHasFlagged": False, "hasPendingFlags": True, "pendingFlagsCount": 1},
+        )
+        # Reviewed flags don't count
+        self.assertFalse(statuses["FORUM POST:3"]["hasPendingFlags"])
+        self.assertFalse(statuses["FORUM POST:4"]["hasPendingFlags"])
+        self.assertTrue(statuses[f"REVIEW:{self.review_id}"]["userHasFlagged"])
+
+    def test_matches_check_flag_status(self):
+        self.client.login(username="viewer", password="viewerpass")
+        response = self.client.post(
+            reverse("moderation:flag_statuses"),
+            json.dumps(
+                {
+                    "items": [
+                        {"content_type": "FORUM POST", "object_id": 1},
+                        {"content_type": "REVIEW", "object_id": self.review_id},
+                    ]
+                }
+            ),
+            content_type="application/json",
+        )
+        single = self.client.get(
+            reverse("moderation:check_flag_status", args=["FORUM POST", "1"])
+        )
+
+        statuses = response.json()["statuses"]
+        self.assertEqual(statuses["FORUM POST:1"], single.json())
+        self.assertEqual(len(statuses), 2)
+
+    def test_invalid_and_oversized_requests(self):
+        self.client.login(username="viewer", password="viewerpass")
+        url = reverse("moderation:flag_statuses")
+        response = self.client.post(url, "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        items = [
+            {"content_type": "FORUM POST", "object_id": i}
+            for i in range(MAX_STATUS_ITEMS + 1)
+        ]
+        response = self.client.post(
+            url, json.dumps({"items": items}), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_required(self):
+        response = self.client.post(
+            reverse("moderation:flag_statuses"),
+            json.dumps({"items": []}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 302)
@@ -6,9 +6,11 @@ app_name = "moderation"
 urlpatterns = [
     path("flag/create/", views.create_flag, name="create_flag"),
     path("flag/<int:flag_id>/review/", views.review_flag, name="review_flag"),
+    path("flags/review/", views.bulk_review_flags, name="bulk_review_flags"),
     path(
         "check_flag_status/<str:content_type>/<str:object_id>/",
         views.check_flag_status,
         name="check_flag_status",
     ),
+    path("flag_statuses/", views.flag_statuses_view, name="flag_statuses"),
 ]
@@ -1,5 +1,8 @@
+import json
+
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
@@ -7,10 +10,12 @@ from django.views.decorators.http import require_POST
 
 from accounts.models import CustomUser
 from forum.models import Post, Comment, Notification
+from forum.notifications import notifications_changed
 from home.repositories import HomeRepository
 from services.models import ReviewDTO
-from services.repositories import ReviewRepository
 from .models import Flag
+from .resolvers import get_content_resolver
+from .status import MAX_STATUS_ITEMS, flag_statuses
 
 
 def is_admin(user):
@@ -29,26 +34,13 @@ def create_flag(request):
         if content_type not in dict(Flag.CONTENT_TYPES):
             return JsonResponse({"error": "Invalid content type"}, status=400)
 
-        # Get the flagged object based on content type
-        if content_type == "FORUM POST":
-            try:
-                Post.objects.get(id=object_id)
-            except Post.DoesNotExist:
-                return JsonResponse({"error": "Post not found"}, status=404)
-
-        elif content_type == "FORUM COMMENT":
-            try:
-                Comment.objects.get(id=object_id)
-            except Comment.DoesNotExist:
-                return JsonResponse({"error": "Comment not found"}, status=404)
-
-        elif content_type == "REVIEW":
-            # For NoSQL reviews, verify the review exists
-            repo = ReviewRepository()
-            flagged_object = repo.get_review(object_id)
-            if not flagged_object:
-                return JsonResponse({"error": "Review not found"}, status=404)
-            # Get the review author's user ID from the review data
+        # Get the flagged object; the flag reuses it for its content preview
+        flagged_object = get_content_resolver(request).get(content_type, object_id)
+        if flagged_object is None:
+            return JsonResponse(
+                {"error": f"{dict(Flag.CONTENT_TYPES)[content_type]} not found"},
+                status=404,
+            )
 
         # Check if user has already flagged this content
         if Flag.objects.filter(
@@ -60,27 +52,47 @@ def create_flag(request):
 
         with transaction.atomic():
             # Create the flag with the string content type
-            _ = Flag.objects.create(
+            flag = Flag(
                 content_type=content_type,
                 object_id=str(object_id),
                 flagger=request.user,
                 reason=reason,
                 explanation=explanation,
             )
+            flag.set_content_object(flagged_object)
+            flag.save()
 
-            # Notify admins (only if they haven't been notified about pending flags)
-            admin_users = CustomUser.objects.filter(is_superuser=True)
-            for admin in admin_users:
-                # Check if admin already has an unread flag notification
-                if not Notification.objects.filter(
-                    recipient=admin, notification_type="flag_admin", is_read=False
-                ).exists():
-                    Notification.objects.create(
-                        recipient=admin,
+            # Notify admins who don't already have an unread flag notification.
+            # The unique constraint on unread flag_admin notifications makes
+            # concurrent flags skip admins that were just notified.
+            admin_ids = list(
+                CustomUser.objects.filter(is_superuser=True)
+                .exclude(
+                    Exists(
+                        Notification.objects.filter(
+                            recipient=OuterRef("pk"),
+                            notification_type="flag_admin",
+                            is_read=False,
+                        )
+                    )
+                )
+                .values_list("id", flat=True)
+            )
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        recipient_id=admin_id,
                         sender=request.user,
                         message="New flagged content requires review",
                         notification_type="flag_admin",
                     )
+                    for admin_id in admin_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+        # bulk_create does not send post_save
+        notifications_changed(admin_ids)
 
         return JsonResponse(
             {"success": True, "message": "Content has been flagged for review"}
@@ -112,14 +124,16 @@ def review_flag(request, flag_id):
             flag.reviewed_at = timezone.now()
             flag.save()
 
+            resolver = get_content_resolver(request)
+            flagged_object = flag.get_content_object(resolver)
             if action == "revoke":
-                flagged_object = flag.get_content_object()
-
                 if isinstance(flagged_object, (Post, Comment)):
                     flagged_object.delete()
                 elif isinstance(flagged_object, ReviewDTO):
                     home_repo = HomeRepository()
                     home_repo.delete_review(flagged_object.review_id)
+                # Revoked content is gone, so there is no author to notify
+                flagged_object = None
 
             Notification.objects.create(
                 recipient=flag.flagger,
@@ -132,7 +146,7 @@ def review_flag(request, flag_id):
                 notification_type="flag_reviewed",
             )
 
-            content_author = getattr(flag.get_content_object(), "author", None)
+            content_author = getattr(flagged_object, "author", None)
             if content_author:
                 Notification.objects.create(
                     recipient=content_author,
@@ -147,6 +161,135 @@ def review_flag(request, flag_id):
         return JsonResponse({"error": str(e)}, status=500)
 
 
+MAX_BULK_REVIEW_FLAGS = 500
+
+
+def _int_ids(object_ids):
+    ids = set()
+    for object_id in object_ids:
+        try:
+            ids.add(int(object_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+@require_POST
+@login_required
+@user_passes_test(is_admin)
+def bulk_review_flags(request):
+    """
+    Dismiss or revoke many pending flags in one request.
+
+    Flags are updated with one bulk_update and notifications inserted with
+    one bulk_create, all in a single transaction. On revoke the flagged posts
+    and comments are deleted with one query each and reviews with a batched
+    DynamoDB write; flags on reviews that could not be deleted stay pending
+    and are listed as failed.
+    """
+    action = request.POST.get("action")
+    if action not in ["dismiss", "revoke"]:
+        return JsonResponse({"error": "Invalid action"}, status=400)
+
+    flag_ids = _int_ids(request.POST.getlist("flag_ids"))
+    if not flag_ids:
+        return JsonResponse({"error": "No flags selected"}, status=400)
+    if len(flag_ids) > MAX_BULK_REVIEW_FLAGS:
+        return JsonResponse(
+            {"error": f"At most {MAX_BULK_REVIEW_FLAGS} flags can be reviewed at once"},
+            status=400,
+        )
+
+    status = "DISMISSED" if action == "dismiss" else "REVOKED"
+    try:
+        with transaction.atomic():
+            flags = list(
+                Flag.objects.select_for_update().filter(
+                    id__in=flag_ids, status="PENDING"
+                )
+            )
+            targets = {content_type: set() for content_type, _ in Flag.CONTENT_TYPES}
+            for flag in flags:
+                targets[flag.content_type].add(flag.object_id)
+
+            # Authors of content that stays up are told the flag was dismissed;
+            # revoked content is gone, as in review_flag
+            authors = {}
+            failed = []
+            if action == "revoke":
+                Post.objects.filter(id__in=_int_ids(targets["FORUM POST"])).delete()
+                Comment.objects.filter(
+                    id__in=_int_ids(targets["FORUM COMMENT"])
+                ).delete()
+                if targets["REVIEW"]:
+                    # Flags on reviews that could not be deleted stay pending
+                    not_deleted = HomeRepository().delete_reviews(targets["REVIEW"])
+                    failed = [
+                        flag
+                        for flag in flags
+                        if flag.content_type == "REVIEW"
+                        and flag.object_id in not_deleted
+                    ]
+                    flags = [flag for flag in flags if flag not in failed]
+            else:
+                for model, content_type in (
+                    (Post, "FORUM POST"),
+                    (Comment, "FORUM COMMENT"),
+                ):
+                    for object_id, author_id in model.objects.filter(
+                        id__in=_int_ids(targets[content_type])
+                    ).values_list("id", "author_id"):
+                        authors[(content_type, str(object_id))] = author_id
+
+            notifications = [
+                Notification(
+                    recipient_id=flag.flagger_id,
+                    sender=request.user,
+                    message=(
+                        "Your flag has been reviewed and accepted"
+                        if status == "REVOKED"
+                        else "Your flag has been reviewed and dismissed"
+                    ),
+                    notification_type="flag_reviewed",
+                )
+                for flag in flags
+            ]
+            notifications += [
+                Notification(
+                    recipient_id=author_id,
+                    sender=request.user,
+                    message=f"Your flagged content has been {status.lower()}",
+                    notification_type="flag_reviewed",
+                )
+                for author_id in authors.values()
+            ]
+            Notification.objects.bulk_create(notifications)
+
+            reviewed_at = timezone.now()
+            for flag in flags:
+                flag.status = status
+                flag.reviewed_by = request.user
+                flag.reviewed_at = reviewed_at
+            Flag.objects.bulk_update(flags, ["status", "reviewed_by", "reviewed_at"])
+
+        # bulk_create does not send post_save
+        notifications_changed(
+            [notification.recipient_id for notification in notifications],
+            notifications,
+        )
+        return JsonResponse(
+            {
+                "success": True,
+                "status": status,
+                "reviewed": sorted(flag.id for flag in flags),
+                "failed": sorted(flag.id for flag in failed),
+            }
+        )
+
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
 @login_required
 def check_flag_status(request, content_type, object_id):
     """
@@ -183,3 +326,28 @@ def check_flag_status(request, content_type, object_id):
         # Log the error for debugging
         print(f"Error checking flag status: {str(e)}")
         return JsonResponse({"error": str(e)}, status=500)
+
+
+@require_POST
+@login_required
+def flag_statuses_view(request):
+    """
+    Flag status of many pieces of content at once.
+
+    Expects a JSON body {"items": [{"content_type": ..., "object_id": ...}]}
+    and returns {"statuses": {"<content_type>:<object_id>": {...}}} with the
+    fields of check_flag_status for every item.
+    """
+    try:
+        items = json.loads(request.body)["items"]
+        pairs = [(item["content_type"], str(item["object_id"])) for item in items]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Invalid request body"}, status=400)
+
+    if len(pairs) > MAX_STATUS_ITEMS:
+        return JsonResponse(
+            {"error": f"At most {MAX_STATUS_ITEMS} items can be checked at once"},
+            status=400,
+        )
+
+    return JsonResponse({"statuses": flag_statuses(request.user, pairs)})
@@ -34,6 +34,80 @@ AWS_REGION = "us-east-1"
 DYNAMODB_TABLE_SERVICES = "services"
 DYNAMODB_TABLE_REVIEWS = "reviews"
 DYNAMODB_TABLE_BOOKMARKS = "bookmark"
+
+# Notification fan-out: bulk_create batch size, and the audience size above
+# which fan-out is moved off the request thread.
+NOTIFICATION_FANOUT_CHUNK_SIZE = 500
+NOTIFICATION_FANOUT_BACKGROUND_THRESHOLD = 200
+# Seconds a user's cached unread-notification count may live; the count is
+# also invalidated whenever one of their notifications changes.
+NOTIFICATION_UNREAD_COUNT_TTL = 300
+# Server-sent notification stream. Enable it when the site is served through
+# asgi.py; under WSGI every open stream would hold a worker thread, so the
+# stream answers 404 there even when enabled and the navbar keeps polling. The in-memory broker only reaches streams in
+# the same process.
+NOTIFICATION_STREAM_ENABLED = config(
+    "NOTIFICATION_STREAM_ENABLED", default=False, cast=bool
+)
+NOTIFICATION_BROKER = "forum.broker.InMemoryBroker"
+NOTIFICATION_STREAM_KEEPALIVE = 15  # seconds between keepalive comments
+NOTIFICATION_STREAM_MAX_AGE = 300  # seconds before the browser must reconnect
+NOTIFICATION_STREAM_RETRY_MS = 3000
+
+# Single-service reads (services.cache): seconds a service, or the absence
+# of one, may be served from the cache; 0 disables it. Writes invalidate it,
+# but other processes keep their local copy until it expires. Set
+# SERVICE_CACHE_SHARED=True to share reads through CACHES as well; that only
+# reaches other processes when CACHE_BACKEND is a shared cache such as Redis.
+# The cache is off unless SERVICE_CACHE_SHARED is set, since the default
+# LocMemCache cannot invalidate other web processes.
+SERVICE_CACHE_SHARED = config("SERVICE_CACHE_SHARED", default=False, cast=bool)
+SERVICE_CACHE_TTL = config(
+    "SERVICE_CACHE_TTL", default=30 if SERVICE_CACHE_SHARED else 0, cast=int
+)
+SERVICE_CACHE_MISSING_TTL = 5
+SERVICE_CACHE_SIZE = 1000  # services kept per process
+# Seconds a page of a service's reviews (home.review_pages) stays cached.
+# Review writes invalidate the pages; the TTL bounds their memory and how
+# long pages read before an eventually consistent index query caught up with
+# a write can be served.
+REVIEW_PAGE_CACHE_TTL = 300
+
+# Review word cloud terms (services/terms.py). Review writes count with the
+# current values; run `manage.py rebuild_review_terms` after changing them.
+REVIEW_TERMS_STOPWORDS = [
+    "the",
+    "and",
+    "is",
+    "in",
+    "it",
+    "of",
+    "to",
+    "a",
+    "i",
+    "for",
+    "this",
+    "that",
+    "with",
+]
+REVIEW_TERMS_BIGRAMS = config("REVIEW_TERMS_BIGRAMS", default=False, cast=bool)
+
+# Background tasks: slow side effects (rating updates, large notification
+# fan-outs) are queued here and run by `manage.py run_tasks`, the worker
+# process in the Procfile.
+TASKS_BACKEND = config("TASKS_BACKEND", default="tasks.backends.DatabaseBackend")
+TASKS_EAGER = False  # InProcessBackend only: run jobs as soon as they are queued
+TASKS_LOCK_TIMEOUT = 600  # seconds before a RUNNING job is considered abandoned
+
+# Request cost instrumentation (DynamoDB calls and capacity, SQL queries).
+# Superusers always get the Server-Timing header; set this to send it to
+# everyone. The admin summary page aggregates the last requests per process.
+REQUEST_COST_SERVER_TIMING = config(
+    "REQUEST_COST_SERVER_TIMING", default=DEBUG, cast=bool
+)
+REQUEST_COST_BUFFER_SIZE = 1000
+REQUEST_COST_LOG_LEVEL = config("REQUEST_COST_LOG_LEVEL", default="INFO")
+
 AWS_STORAGE_BUCKET_NAME = "nycservicefinder-images-s3"  # Replace with your bucket name
 AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
 AWS_S3_SIGNATURE_VERSION = "s3v4"
@@ -76,6 +150,9 @@ INSTALLED_APPS = [
     "accounts",
     "forum",
     "moderation",
+    "tasks",
+    "analytics",
+    "benchmarks",
     "axes",
     "widget_tweaks",
 ]
@@ -141,6 +218,7 @@ AXES_VERBOSE = True
 AXES_USE_PROXY = False
 
 MIDDLEWARE = [
+    "public_service_finder.utils.request_cost.RequestCostMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -191,11 +269,64 @@ DATABASES = {
     }
 }
 
+# LocMemCache is per process; deployments running several web processes
+# should point CACHE_BACKEND at a shared cache (e.g. RedisCache).
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default="public-service-finder"),
+    }
+}
+
 if "test" in sys.argv:
     DATABASES["default"] = {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "test_db.sqlite3",
     }
+    TASKS_BACKEND = "tasks.backends.InProcessBackend"
+    # Test transactions are rolled back but a shared cache is not; tests that
+    # exercise caching switch to LocMemCache with override_settings.
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    SERVICE_CACHE_TTL = 0
+    REQUEST_COST_LOG_LEVEL = "WARNING"
+
+# Benchmarks and generated data live in throwaway local stores (see
+# benchmarks/) and must never touch the real ones: a SQLite file and
+# DynamoDB Local. Set LOCAL_STORES=True to serve the site from them.
+# run_benchmarks brings its own in-process DynamoDB.
+LOCAL_STORES = config("LOCAL_STORES", default=False, cast=bool) or bool(
+    {"run_benchmarks", "generate_data", "run_load_test"} & set(sys.argv)
+)
+LOCAL_DYNAMODB_ENDPOINT = config(
+    "LOCAL_DYNAMODB_ENDPOINT", default="http://localhost:8000"
+)
+if LOCAL_STORES:
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "benchmark_db.sqlite3",
+        # run_benchmarks recreates this one for every catalog size
+        "TEST": {"NAME": BASE_DIR / "benchmark_test_db.sqlite3"},
+    }
+    TASKS_BACKEND = "tasks.backends.InProcessBackend"
+    REQUEST_COST_LOG_LEVEL = "WARNING"
+    if "run_benchmarks" not in sys.argv:
+        os.environ["AWS_ENDPOINT_URL_DYNAMODB"] = LOCAL_DYNAMODB_ENDPOINT
+
+# One JSON line per request with its DynamoDB and SQL cost
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "public_service_finder.utils.request_cost": {
+            "handlers": ["console"],
+            "level": REQUEST_COST_LOG_LEVEL,
+            "propagate": False,
+        },
+    },
+}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -1,13 +1,38 @@
 import uuid
+from datetime import date
 from unittest.mock import patch
-from django.test import TestCase, Client
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError
+from botocore.stub import Stubber
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
 from allauth.socialaccount.models import SocialApp
 from django.contrib.contenttypes.models import ContentType
 
+from analytics.models import DailyRollup
+from forum.models import Category, Post
 from moderation.models import Flag
 from public_service_finder.utils.enums.service_status import ServiceStatus
+from public_service_finder.utils.pagination import (
+    KeysetPaginator,
+    decode_cursor,
+    encode_cursor,
+)
+from public_service_finder.utils.query_plan import sequential_scans, sorts_in_memory
+from public_service_finder.utils.timeseries import TimeBuckets
+from public_service_finder.utils.request_cost import (
+    recent_request_costs,
+    track_request_cost,
+)
 from services.repositories import ServiceRepository
 
 User = get_user_model()
@@ -230,3 +255,604 @@ class AdminUpdateListingTest(TestCase):
         )
         self.assertRedirects(response, reverse("admin_only_view_new_listings"))
         mock_update.assert_called_once()
+
+
+class AdminBulkUpdateListingsTest(TestCase):
+    def setUp(self):
+        self.service_ids = [uuid.uuid4() for _ in range(3)]
+        User.objects.create_superuser(
+            username="adminuser",
+            password="adminpass123",
+            user_type="normal_user",
+            email="adminuser@example.com",
+        )
+        User.objects.create_user(
+            username="regularuser",
+            password="testpass123",
+            user_type="normal_user",
+            email="regularuser@example.com",
+        )
+
+    @patch.object(ServiceRepository, "update_service_statuses")
+    def test_bulk_approve(self, mock_update):
+        self.client.login(username="adminuser", password="adminpass123")
+        response = self.client.post(
+            reverse("admin_bulk_update_listings"),
+            {"status": "approve", "service_ids": self.service_ids + ["not-a-uuid"]},
+        )
+        self.assertRedirects(
+            response,
+            reverse("admin_only_view_new_listings"),
+            fetch_redirect_response=False,
+        )
+        mock_update.assert_called_once_with(
+            self.service_ids, ServiceStatus.APPROVED.value
+        )
+
+    @patch.object(ServiceRepository, "update_service_statuses")
+    def test_reports_services_that_were_not_updated(self, mock_update):
+        mock_update.return_value = [str(self.service_ids[0])]
+        self.client.login(username="adminuser", password="adminpass123")
+        response = self.client.post(
+            reverse("admin_bulk_update_listings"),
+            {"status": "reject", "service_ids": self.service_ids + ["not-a-uuid"]},
+        )
+        reported = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn("Rejected 1 services.", reported)
+        self.assertIn("Skipped 1 invalid service ids.", reported)
+        self.assertTrue(
+            any(
+                str(self.service_ids[1]) in m and str(self.service_ids[2]) in m
+                for m in reported
+            )
+        )
+
+    @patch.object(ServiceRepository, "update_service_statuses")
+    def test_update_failure_is_reported(self, mock_update):
+        mock_update.side_effect = Exception("boom")
+        self.client.login(username="adminuser", password="adminpass123")
+        response = self.client.post(
+            reverse("admin_bulk_update_listings"),
+            {"status": "approve", "service_ids": self.service_ids},
+        )
+        reported = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertEqual(
+            reported,
+            [
+                "3 services were not updated: "
+                + ", ".join(sorted(map(str, self.service_ids)))
+            ],
+        )
+
+    @patch.object(ServiceRepository, "update_service_statuses")
+    def test_invalid_status_or_no_services(self, mock_update):
+        self.client.login(username="adminuser", password="adminpass123")
+        self.client.post(
+            reverse("admin_bulk_update_listings"),
+            {"status": "invalid", "service_ids": self.service_ids},
+        )
+        self.client.post(reverse("admin_bulk_update_listings"), {"status": "reject"})
+        mock_update.assert_not_called()
+
+    @patch.object(ServiceRepository, "update_service_statuses")
+    def test_not_superuser(self, mock_update):
+        self.client.login(username="regularuser", password="testpass123")
+        response = self.client.post(
+            reverse("admin_bulk_update_listings"),
+            {"status": "approve", "service_ids": self.service_ids},
+        )
+        self.assertEqual(response.status_code, 403)
+        mock_update.assert_not_called()
+
+
+@patch("services.repositories.boto3.resource")
+class UpdateServiceStatusesTest(TestCase):
+    def transact(self, mock_resource):
+        repo = ServiceRepository()
+        repo.table.name = "services"
+        return repo, repo.dynamodb.meta.client.transact_write_items
+
+    def test_writes_in_transactions_of_100(self, mock_resource):
+        repo, transact = self.transact(mock_resource)
+        service_ids = [str(uuid.uuid4()) for _ in range(250)]
+
+        updated = repo.update_service_statuses(service_ids, "APPROVED")
+
+        self.assertEqual(updated, service_ids)
+        batches = [c.kwargs["TransactItems"] for c in transact.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 50])
+        item = batches[0][0]["Update"]
+        self.assertEqual(item["Key"], {"Id": service_ids[0]})
+        self.assertEqual(item["ExpressionAttributeValues"], {":new_status": "APPROVED"})
+
+    def test_missing_services_are_dropped_and_batch_retried(self, mock_resource):
+        repo, transact = self.transact(mock_resource)
+        service_ids = [str(uuid.uuid4()) for _ in range(3)]
+        cancelled = ClientError(
+            {
+                "Error": {
+                    "Code": "TransactionCanceledException",
+                    "Message": "Transaction cancelled",
+                },
+                "CancellationReasons": [
+                    {"Code": "None"},
+                    {"Code": "ConditionalCheckFailed"},
+                    {"Code": "None"},
+                ],
+            },
+            "TransactWriteItems",
+        )
+        transact.side_effect = [cancelled, {}]
+
+        updated = repo.update_service_statuses(service_ids, "REJECTED")
+
+        self.assertEqual(updated, [service_ids[0], service_ids[2]])
+        retried = transact.call_args_list[1].kwargs["TransactItems"]
+        self.assertEqual(
+            [item["Update"]["Key"]["Id"] for item in retried],
+            [service_ids[0], service_ids[2]],
+        )
+
+    def test_other_errors_skip_the_batch(self, mock_resource):
+        repo, transact = self.transact(mock_resource)
+        transact.side_effect = ClientError(
+            {"Error": {"Code": "ValidationException", "Message": "bad"}},
+            "TransactWriteItems",
+        )
+
+        self.assertEqual(repo.update_service_statuses([str(uuid.uuid4())], "X"), [])
+        self.assertEqual(transact.call_count, 1)
+
+
+class RequestCostTest(TestCase):
+    def setUp(self):
+        recent_request_costs.clear()
+        self.superuser = User.objects.create_superuser(
+            username="adminuser",
+            password="adminpass123",
+            user_type="normal_user",
+            email="adminuser@example.com",
+        )
+        User.objects.create_user(
+            username="regularuser",
+            password="testpass123",
+            user_type="normal_user",
+            email="regularuser@example.com",
+        )
+
+    def stubbed_dynamodb(self):
+        client = boto3.client(
+            "dynamodb",
+            region_name="us-east-1",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+        )
+        return client, Stubber(client)
+
+    def test_sql_queries_are_counted(self):
+        with track_request_cost() as cost:
+            list(User.objects.all())
+            User.objects.count()
+        self.assertEqual(cost.sql_queries, 2)
+        self.assertGreater(cost.sql_duration, 0)
+
+        # Nothing is recorded once the block has ended
+        User.objects.count()
+        self.assertEqual(cost.sql_queries, 2)
+
+    def test_dynamodb_calls_and_capacity_are_recorded(self):
+        client, stubber = self.stubbed_dynamodb()
+        stubber.add_response(
+            "get_item",
+            {"Item": {}, "ConsumedCapacity": {"TableName": "t", "CapacityUnits": 0.5}},
+            {
+                "TableName": "t",
+                "Key": {"Id": {"S": "1"}},
+                "ReturnConsumedCapacity": "TOTAL",
+            },
+        )
+        stubber.add_response(
+            "batch_get_item",
+            {
+                "Responses": {},
+                "ConsumedCapacity": [
+                    {"TableName": "a", "CapacityUnits": 2.0},
+                    {"TableName": "b", "CapacityUnits": 1.0},
+                ],
+            },
+        )
+        stubber.add_client_error("query", "ValidationException")
+
+        with stubber, track_request_cost() as cost:
+            client.get_item(TableName="t", Key={"Id": {"S": "1"}})
+            client.batch_get_item(RequestItems={"a": {"Keys": [{"Id": {"S": "1"}}]}})
+            with self.assertRaises(ClientError):
+                client.query(TableName="t")
+
+        self.assertEqual(cost.dynamodb_calls, 3)
+        self.assertEqual(cost.dynamodb_capacity, 3.5)
+        operations = cost.as_dict()["dynamodb_operations"]
+        self.assertEqual(operations["GetItem"]["capacity"], 0.5)
+        self.assertEqual(operations["Query"]["errors"], 1)
+        self.assertIn("dynamodb-BatchGetItem;dur=", cost.server_timing())
+
+    def test_connection_errors_are_recorded(self):
+        client = boto3.client(
+            "dynamodb",
+            region_name="us-east-1",
+            endpoint_url="http://127.0.0.1:9",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+            config=Config(retries={"total_max_attempts": 1}),
+        )
+
+        with track_request_cost() as cost:
+            with self.assertRaises(EndpointConnectionError):
+                client.get_item(TableName="t", Key={"Id": {"S": "1"}})
+        # Outside tracking the error still comes through untouched
+        with self.assertRaises(EndpointConnectionError):
+            client.get_item(TableName="t", Key={"Id": {"S": "1"}})
+
+        self.assertEqual(cost.as_dict()["dynamodb_operations"]["GetItem"]["errors"], 1)
+
+    def test_capacity_is_only_requested_while_tracking(self):
+        client, stubber = self.stubbed_dynamodb()
+        stubber.add_response("get_item", {}, {"TableName": "t", "Key": {}})
+        with stubber:
+            client.get_item(TableName="t", Key={})
+
+    def test_middleware_records_requests(self):
+        self.client.login(username="adminuser", password="adminpass123")
+        response = self.client.get(reverse("forum:category_list"))
+
+        self.assertIn("sql;dur=", response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+        (entry,) = [
+            e
+            for e in recent_request_costs.entries()
+            if e["view"] == "forum:category_list"
+        ]
+        self.assertGreater(entry["sql_queries"], 0)
+        self.assertEqual(entry["status"], 200)
+
+    @override_settings(REQUEST_COST_SERVER_TIMING=False)
+    def test_server_timing_only_for_superusers(self):
+        self.client.login(username="regularuser", password="testpass123")
+        response = self.client.get(reverse("forum:category_list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_summary_page(self):
+        self.client.login(username="regularuser", password="testpass123")
+        self.assertEqual(
+            self.client.get(reverse("admin_request_costs")).status_code, 403
+        )
+
+        self.client.login(username="adminuser", password="adminpass123")
+        self.client.get(reverse("forum:category_list"))
+        response = self.client.get(reverse("admin_request_costs"))
+        self.assertEqual(response.status_code, 200)
+        views = [row["view"] for row in response.context["summary"]]
+        self.assertIn("forum:category_list", views)
+
+
+class PlatformAnalyticsViewTest(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(
+            username="adminuser",
+            password="adminpass123",
+            user_type="normal_user",
+            email="adminuser@example.com",
+        )
+        User.objects.create_user(
+            username="regularuser",
+            password="testpass123",
+            user_type="normal_user",
+            email="regularuser@example.com",
+        )
+
+    def test_superusers_only(self):
+        self.client.login(username="regularuser", password="testpass123")
+        response = self.client.get(reverse("admin_platform_analytics"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_reads_only_the_rollups(self):
+        today = timezone.now().date()
+        DailyRollup.objects.create(
+            date=today,
+            metric=DailyRollup.REVIEWS,
+            category="FOOD",
+            borough="Queens",
+            count=3,
+            stars=12,
+        )
+        self.client.login(username="adminuser", password="adminpass123")
+
+        with patch("boto3.resource") as mock_resource:
+            response = self.client.get(
+                reverse("admin_platform_analytics"), {"days": 90}
+            )
+
+        mock_resource.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["days"], 90)
+        summary = response.context["summary"]
+        self.assertEqual(len(summary["dates"]), 90)
+        self.assertEqual(summary["categories"][0]["total"], 3)
+        self.assertEqual(summary["boroughs"][0]["average_rating"], 4.0)
+
+    def test_unknown_window_falls_back_to_default(self):
+        self.client.login(username="adminuser", password="adminpass123")
+        response = self.client.get(reverse("admin_platform_analytics"), {"days": 5})
+        self.assertEqual(response.context["days"], 30)
+
+
+class QueryPlanParsingTest(TestCase):
+    def test_sqlite_full_scan_is_detected(self):
+        plan = "2 0 0 SCAN forum_post\n5 0 0 USE TEMP B-TREE FOR ORDER BY"
+        self.assertEqual(sequential_scans(plan, "sqlite"), ["forum_post"])
+        self.assertTrue(sorts_in_memory(plan, "sqlite"))
+
+    def test_sqlite_index_access_is_not_a_scan(self):
+        plan = (
+            "3 0 0 SEARCH forum_post USING INDEX forum_post_category_idx (category_id=?)\n"
+            "7 0 0 SCAN forum_comment USING INDEX forum_comment_post_idx"
+        )
+        self.assertEqual(sequential_scans(plan, "sqlite"), [])
+        self.assertFalse(sorts_in_memory(plan, "sqlite"))
+
+    def test_postgres_plan(self):
+        plan = (
+            "Limit  (cost=0.15..8.17 rows=1 width=8)\n"
+            "  ->  Sort  (cost=8.16..8.17 rows=1 width=8)\n"
+            "        ->  Seq Scan on forum_notification  (cost=0.00..8.15 rows=1)"
+        )
+        self.assertEqual(sequential_scans(plan, "postgresql"), ["forum_notification"])
+        self.assertTrue(sorts_in_memory(plan, "postgresql"))
+        self.assertEqual(
+            sequential_scans(
+                "Index Scan using forum_notif_unread_idx on forum_notification",
+                "postgresql",
+            ),
+            [],
+        )
+
+
+class KeysetPaginatorTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username="author", password="testpass123", email="author@example.com"
+        )
+        self.category = Category.objects.create(name="General")
+        now = timezone.now()
+        # Pairs of posts share a timestamp so the id tie-breaker matters
+        self.posts = []
+        for i in range(7):
+            post = Post.objects.create(
+                title=f"Post {i}",
+                content="Content",
+                author=self.author,
+                category=self.category,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                created_at=now - timezone.timedelta(minutes=i // 2)
+            )
+            self.posts.append(post)
+        self.expected = list(Post.objects.order_by("-created_at", "-id"))
+
+    def _walk_forward(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append(list(page))
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_forward_walk_visits_every_row_once(self):
+        pages, _ = self._walk_forward(KeysetPaginator(Post.objects.all(), 3))
+        self.assertEqual([len(p) for p in pages], [3, 3, 1])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_backward_walk_returns_previous_pages(self):
+        paginator = KeysetPaginator(Post.objects.all(), 3)
+        pages, last = self._walk_forward(paginator)
+        self.assertFalse(last.has_next())
+
+        previous = paginator.page(last.previous_cursor)
+        self.assertEqual(list(previous), pages[1])
+        self.assertTrue(previous.has_next())
+        first = paginator.page(previous.previous_cursor)
+        self.assertEqual(list(first), pages[0])
+        self.assertFalse(first.has_previous())
+
+    def test_first_page(self):
+        page = KeysetPaginator(Post.objects.all(), 3).page()
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_other_pages())
+        self.assertFalse(decode_cursor(page.next_cursor)[1])
+
+    def test_malformed_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), 3)
+        for cursor in ["garbage", "e30", "eyJ2IjpbMV19"]:
+            self.assertEqual(list(paginator.page(cursor)), self.expected[:3])
+
+    def test_tampered_cursor_values_return_first_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), 3)
+        for values in [
+            ["x", "y"],
+            [{"dt": "garbage"}, 1],
+            [{"dt": "2024-01-01T00:00:00"}, "abc"],
+            [{"dt": "2024-01-01T00:00:00"}, None],
+            [[1], {"a": 1}],
+        ]:
+            cursor = encode_cursor(values)
+            self.assertEqual(list(paginator.page(cursor)), self.expected[:3])
+
+    def test_tampered_cursor_on_an_annotated_ordering(self):
+        paginator = KeysetPaginator(
+            Post.objects.annotate(rank=Value(1.0, output_field=FloatField())),
+            3,
+            ordering=("-rank", "-created_at", "-id"),
+        )
+        cursor = encode_cursor(["high", {"dt": "2024-01-01T00:00:00"}, 1])
+        self.assertEqual(list(paginator.page(cursor)), self.expected[:3])
+
+    def test_stale_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Post.objects.all(), 3)
+        last = self._walk_forward(paginator)[1]
+        cursor = paginator.page().next_cursor
+        Post.objects.filter(pk__in=[p.pk for p in self.expected[3:]]).delete()
+        self.assertEqual(list(paginator.page(cursor)), self.expected[:3])
+        self.assertFalse(last.has_next())
+
+    def test_page_cost_does_not_depend_on_depth(self):
+        paginator = KeysetPaginator(Post.objects.all(), 2)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            list(paginator.page(cursor))
+
+    @override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    )
+    def test_count_is_cached(self):
+        cache.clear()
+        paginator = KeysetPaginator(
+            Post.objects.all(), 3, count_cache_key="test:post-count"
+        )
+        self.assertEqual(paginator.count, 7)
+        Post.objects.first().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 7)
+
+
+@patch.object(ServiceRepository, "get_pending_approval_services", return_value=[])
+class ModerationQueueTest(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="adminuser",
+            password="adminpass123",
+            user_type="normal_user",
+            email="adminuser@example.com",
+        )
+        self.flaggers = [
+            User.objects.create_user(
+                username=f"flagger{i}",
+                password="flagpass",
+                email=f"flagger{i}@example.com",
+            )
+            for i in range(3)
+        ]
+        self.client.login(username="adminuser", password="adminpass123")
+
+    def _flag(self, object_id, flagger, status="PENDING"):
+        return Flag.objects.create(
+            content_type="FORUM POST",
+            object_id=str(object_id),
+            flagger=flagger,
+            reason="SPAM",
+            content_preview=f"Post {object_id}",
+            content_author="author",
+            status=status,
+        )
+
+    def _get(self, **params):
+        response = self.client.get(reverse("admin_only_view_new_listings"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context["flags"]
+
+    def test_groups_are_counted_and_ordered_by_flag_count(self, mock_services):
+        self._flag(1, self.flaggers[0])
+        for flagger in self.flaggers:
+            self._flag(2, flagger)
+        self._flag(3, self.flaggers[0])
+        self._flag(3, self.flaggers[1], status="DISMISSED")
+
+        groups = list(self._get())
+        self.assertEqual(
+            [(g["object_id"], g["flag_count"]) for g in groups],
+            [("2", 3), ("3", 1), ("1", 1)],
+        )
+        top = groups[0]
+        self.assertEqual(top["content_preview"], "Post 2")
+        self.assertEqual(
+            sorted(f["flagger"] for f in top["flags"]),
+            ["flagger0", "flagger1", "flagger2"],
+        )
+        self.assertEqual(top["first_flag_id"], top["flags"][0]["flag_id"])
+        self.assertEqual(len(groups[1]["flags"]), 1)
+
+    def test_queue_is_paginated(self, mock_services):
+        for object_id in range(25):
+            self._flag(object_id, self.flaggers[0])
+
+        first = self._get()
+        self.assertEqual(len(first), 20)
+        self.assertEqual(first.paginator.count, 25)
+        second = self._get(page=2)
+        self.assertEqual(len(second), 5)
+        self.assertFalse(
+            {g["object_id"] for g in first} & {g["object_id"] for g in second}
+        )
+
+    def test_query_count_does_not_grow_with_flags(self, mock_services):
+        self._flag(1, self.flaggers[0])
+        with CaptureQueriesContext(connection) as few:
+            self._get()
+        for object_id in range(2, 15):
+            for flagger in self.flaggers:
+                self._flag(object_id, flagger)
+        with CaptureQueriesContext(connection) as many:
+            self._get()
+        self.assertEqual(len(many), len(few))
+
+
+class TimeBucketsTest(TestCase):
+    END = date(2024, 10, 13)
+
+    def test_daily_buckets_count_by_the_written_date(self):
+        buckets = TimeBuckets(self.END, days=7)
+
+        self.assertEqual(buckets.labels[0], "2024-10-07")
+        self.assertEqual(buckets.labels[-1], "2024-10-13")
+        self.assertEqual(
+            buckets.counts(
+                [
+                    "2024-10-13T23:30:00-05:00",
+                    "2024-10-13T01:00:00Z",
+                    "2024-10-07T12:00:00.123456",
+                    "2024-10-06T23:59:59",
+                    "2024-10-14T00:00:00",
+                ]
+            ),
+            [1, 0, 0, 0, 0, 0, 2],
+        )
+        self.assertEqual(buckets.counts([]), [0] * 7)
+
+    def test_weekly_buckets_end_on_the_last_day(self):
+        buckets = TimeBuckets(self.END, days=30, granularity="week")
+
+        # 30 days in weeks back from the end: a 2-day bucket, then 4 weeks
+        self.assertEqual(
+            buckets.labels,
+            ["2024-09-14", "2024-09-16", "2024-09-23", "2024-09-30", "2024-10-07"],
+        )
+        self.assertEqual(
+            buckets.counts(["2024-09-13", "2024-09-14", "2024-09-16", "2024-10-07"]),
+            [1, 1, 0, 0, 1],
+        )
+
+    def test_means_leave_empty_buckets_none(self):
+        buckets = TimeBuckets(self.END, days=7)
+
+        self.assertEqual(
+            buckets.means(
+                ["2024-10-12T12:00", "2024-10-12T13:00", "2024-10-13"], [5, 4, 3]
+            ),
+            [None] * 5 + [4.5, 3.0],
+        )
+
+    def test_only_offered_windows_and_granularities(self):
+        with self.assertRaises(ValueError):
+            TimeBuckets(self.END, days=365)
+        with self.assertRaises(ValueError):
+            TimeBuckets(self.END, granularity="month")
@@ -3,7 +3,10 @@
 from django.contrib import admin
 from django.urls import path, include
 from .views import (
+    admin_bulk_update_listings,
     admin_only_view_new_listings,
+    admin_platform_analytics,
+    admin_request_costs,
     admin_update_listing,
     root_redirect_view,
 )  # Import the redirect view
@@ -24,6 +27,13 @@ urlpatterns = [
         admin_update_listing,
         name="admin_update_listing",
     ),  # Changed prefix
+    path(
+        "admin-listing/bulk-update/",
+        admin_bulk_update_listings,
+        name="admin_bulk_update_listings",
+    ),
+    path("admin-request-costs/", admin_request_costs, name="admin_request_costs"),
+    path("admin-analytics/", admin_platform_analytics, name="admin_platform_analytics"),
     path("forum/", include("forum.urls", namespace="forum")),
     path("moderation/", include("moderation.urls", namespace="moderation")),
 ]
@@ -0,0 +1,195 @@
+"""
+Cursor (keyset) pagination.
+
+Django's Paginator runs COUNT(*) on every request and pages with OFFSET, so
+deep pages get slower the further in they are. KeysetPaginator instead seeks
+past the last row of the previous page using the ordering columns, which an
+index on those columns serves in constant time for any page.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "dt" in value:
+        return parse_datetime(value["dt"])
+    return value
+
+
+def encode_cursor(values, backwards=False):
+    payload = {"v": [_encode_value(v) for v in values]}
+    if backwards:
+        payload["b"] = 1
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (values, backwards), or None for a missing or malformed cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(v) for v in payload["v"]]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        return None
+    return values, bool(payload.get("b"))
+
+
+class KeysetPage:
+    def __init__(self, paginator, object_list, next_cursor, previous_cursor):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on its ordering columns.
+
+    ordering must end in a unique column (usually "-id") so every row has a
+    distinct position. When count_cache_key is given, ``count`` is the row
+    total cached for count_timeout seconds; it is approximate by design and
+    is only computed when something reads it.
+    """
+
+    def __init__(
+        self,
+        queryset,
+        per_page,
+        ordering=("-created_at", "-id"),
+        count_cache_key=None,
+        count_timeout=300,
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self.count_cache_key = count_cache_key
+        self.count_timeout = count_timeout
+
+    @property
+    def count(self):
+        if self.count_cache_key is None:
+            return self.queryset.count()
+        return cache.get_or_set(
+            self.count_cache_key, self.queryset.count, self.count_timeout
+        )
+
+    def _fields(self):
+        return [(f.lstrip("-"), f.startswith("-")) for f in self.ordering]
+
+    def _seek(self, values, backwards):
+        """Rows strictly after values in the (possibly reversed) ordering."""
+        fields = self._fields()
+        condition = Q()
+        for i, (name, descending) in enumerate(fields):
+            lookup = "lt" if descending != backwards else "gt"
+            equal = {fields[j][0]: values[j] for j in range(i)}
+            condition |= Q(**equal, **{f"{name}__{lookup}": values[i]})
+        # Redundant, but gives the database an index range to start from
+        # instead of filtering every row ahead of the cursor.
+        name, descending = fields[0]
+        bound = "lte" if descending != backwards else "gte"
+        return Q(**{f"{name}__{bound}": values[0]}) & condition
+
+    def _output_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _clean(self, values):
+        """
+        Cursor values converted by their ordering fields, or None when one
+        does not fit its field: a cursor can decode fine and still have been
+        tampered with.
+        """
+        try:
+            values = [
+                self._output_field(name).to_python(value)
+                for (name, _), value in zip(self._fields(), values)
+            ]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        return None if any(value is None for value in values) else values
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name, _ in self._fields()]
+
+    def page(self, cursor=None):
+        decoded = decode_cursor(cursor)
+        if decoded is not None and len(decoded[0]) != len(self.ordering):
+            decoded = None
+        if decoded is not None:
+            values = self._clean(decoded[0])
+            decoded = None if values is None else (values, decoded[1])
+
+        backwards = decoded is not None and decoded[1]
+        ordering = self.ordering
+        if backwards:
+            ordering = [f[1:] if f.startswith("-") else f"-{f}" for f in ordering]
+
+        queryset = self.queryset.order_by(*ordering)
+        if decoded is not None:
+            queryset = queryset.filter(self._seek(decoded[0], backwards))
+
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            # Stale cursor (e.g. the rows around it were deleted)
+            return (
+                self.page() if decoded is not None else KeysetPage(self, [], None, None)
+            )
+
+        if backwards:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, decoded is not None
+        return KeysetPage(
+            self,
+            rows,
+            encode_cursor(self._position(rows[-1])) if has_next else None,
+            (
+                encode_cursor(self._position(rows[0]), backwards=True)
+                if has_previous
+                else None
+            ),
+        )
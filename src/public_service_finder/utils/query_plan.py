@@ -0,0 +1,56 @@
+"""
+Query plan checks for hot ORM queries.
+
+Tests use QueryPlanAssertions to make sure a query keeps using an index as
+models and views change. Tables in the test database are tiny, so on Postgres
+the plan is taken with sequential scans disabled: a "Seq Scan" that still
+shows up means no index can serve the query at all.
+"""
+
+import re
+
+from django.db import connections, transaction
+
+# SQLite: "SCAN forum_post" is a full table scan, while
+# "SCAN forum_post USING INDEX ..." walks an index (e.g. to avoid a sort).
+_SQLITE_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)")
+_SQLITE_SORT = re.compile(r"USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY")
+_POSTGRES_SCAN = re.compile(r"\bSeq Scan on (\w+)")
+_POSTGRES_SORT = re.compile(r"^\s*(?:->\s*)?(?:Incremental )?Sort\b", re.MULTILINE)
+
+
+def explain(queryset):
+    """Return the database's plan for queryset as text."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.explain()
+    with transaction.atomic(using=queryset.db):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+
+def sequential_scans(plan, vendor):
+    """Tables read with a full scan according to plan."""
+    pattern = _POSTGRES_SCAN if vendor == "postgresql" else _SQLITE_SCAN
+    return [match.group(1) for match in pattern.finditer(plan)]
+
+
+def sorts_in_memory(plan, vendor):
+    pattern = _POSTGRES_SORT if vendor == "postgresql" else _SQLITE_SORT
+    return bool(pattern.search(plan))
+
+
+class QueryPlanAssertions:
+    """TestCase mixin for checking that hot queries stay on an index."""
+
+    def assertUsesIndex(self, queryset, allow_sort=False):
+        vendor = connections[queryset.db].vendor
+        plan = explain(queryset)
+        scans = sequential_scans(plan, vendor)
+        if scans:
+            self.fail(
+                f"Sequential scan on {', '.join(scans)}:\n{plan}\n\n{queryset.query}"
+            )
+        if not allow_sort and sorts_in_memory(plan, vendor):
+            self.fail(f"Query sorts in memory instead of using an index:\n{plan}")
@@ -0,0 +1,276 @@
+"""
+Per-request cost accounting for DynamoDB and SQL.
+
+While a request is tracked, botocore event hooks on the default boto3
+session record every DynamoDB call (operation, latency and the consumed
+capacity DynamoDB reports back) and a database execute wrapper records every
+SQL query. RequestCostMiddleware turns the totals into a Server-Timing
+header, one JSON log line per request and an entry in a per-process buffer
+that the admin summary page aggregates by view.
+
+Clients copy the session's event hooks when they are created, so the hooks
+are installed when the app registry is ready (see HomeConfig.ready), before
+any repository builds its boto3 resource.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+import boto3
+from django.conf import settings
+from django.db import connections
+
+log = logging.getLogger(__name__)
+
+_current = ContextVar("request_cost", default=None)
+_hooks_lock = threading.Lock()
+_hooked_session = None
+_START = "request_cost_start"
+
+
+class OperationCost:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.duration = 0.0
+        self.capacity = 0.0
+
+
+class RequestCost:
+    def __init__(self):
+        self.dynamodb = defaultdict(OperationCost)
+        self.sql_queries = 0
+        self.sql_duration = 0.0
+
+    def record_dynamodb(self, operation, duration, capacity=0.0, error=False):
+        cost = self.dynamodb[operation]
+        cost.calls += 1
+        cost.errors += int(error)
+        cost.duration += duration
+        cost.capacity += capacity
+
+    def record_sql(self, duration):
+        self.sql_queries += 1
+        self.sql_duration += duration
+
+    @property
+    def dynamodb_calls(self):
+        return sum(cost.calls for cost in self.dynamodb.values())
+
+    @property
+    def dynamodb_duration(self):
+        return sum(cost.duration for cost in self.dynamodb.values())
+
+    @property
+    def dynamodb_capacity(self):
+        return sum(cost.capacity for cost in self.dynamodb.values())
+
+    def server_timing(self):
+        entries = [
+            f'sql;dur={self.sql_duration * 1000:.1f};desc="{self.sql_queries} queries"',
+            f"dynamodb;dur={self.dynamodb_duration * 1000:.1f};"
+            f'desc="{self.dynamodb_calls} calls, '
+            f'{self.dynamodb_capacity:g} capacity units"',
+        ]
+        for operation, cost in sorted(self.dynamodb.items()):
+            entries.append(
+                f"dynamodb-{operation};dur={cost.duration * 1000:.1f};"
+                f'desc="{cost.calls} calls"'
+            )
+        return ", ".join(entries)
+
+    def as_dict(self):
+        return {
+            "sql_queries": self.sql_queries,
+            "sql_ms": round(self.sql_duration * 1000, 1),
+            "dynamodb_calls": self.dynamodb_calls,
+            "dynamodb_ms": round(self.dynamodb_duration * 1000, 1),
+            "dynamodb_capacity": self.dynamodb_capacity,
+            "dynamodb_operations": {
+                operation: {
+                    "calls": cost.calls,
+                    "errors": cost.errors,
+                    "ms": round(cost.duration * 1000, 1),
+                    "capacity": cost.capacity,
+                }
+                for operation, cost in sorted(self.dynamodb.items())
+            },
+        }
+
+
+def _consumed_capacity(parsed):
+    # A single ConsumedCapacity for item and query operations, one per table
+    # for batch and transaction operations
+    consumed = parsed.get("ConsumedCapacity") or []
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get("CapacityUnits", 0) for entry in consumed))
+
+
+def _start_call(params, model, context, **kwargs):
+    if _current.get() is None:
+        return
+    if model.input_shape and "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+    context[_START] = time.perf_counter()
+
+
+def _after_call(model, parsed, context, **kwargs):
+    cost = _current.get()
+    start = context.pop(_START, None)
+    if cost is None or start is None:
+        return
+    cost.record_dynamodb(
+        model.name,
+        time.perf_counter() - start,
+        _consumed_capacity(parsed),
+        error="Error" in parsed,
+    )
+
+
+def _after_call_error(context, event_name, **kwargs):
+    # Connection failures and the like never reach after-call. This event
+    # doesn't carry the operation model; its name ends with the operation.
+    cost = _current.get()
+    start = context.pop(_START, None)
+    if cost is not None and start is not None:
+        operation = event_name.rsplit(".", 1)[-1]
+        cost.record_dynamodb(operation, time.perf_counter() - start, error=True)
+
+
+def install_dynamodb_hooks():
+    """
+    Register the DynamoDB hooks on the default boto3 session, once per
+    session (moto, for one, replaces the default session when it starts).
+    """
+    global _hooked_session
+    with _hooks_lock:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        if boto3.DEFAULT_SESSION is _hooked_session:
+            return
+        events = boto3.DEFAULT_SESSION.events
+        events.register("provide-client-params.dynamodb", _start_call)
+        events.register("after-call.dynamodb", _after_call)
+        events.register("after-call-error.dynamodb", _after_call_error)
+        _hooked_session = boto3.DEFAULT_SESSION
+
+
+@contextmanager
+def track_request_cost():
+    """Record the DynamoDB and SQL cost of the block; yields the RequestCost."""
+    cost = RequestCost()
+
+    def sql_wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            cost.record_sql(time.perf_counter() - start)
+
+    token = _current.set(cost)
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(sql_wrapper))
+            yield cost
+    finally:
+        _current.reset(token)
+
+
+class RecentRequestCosts:
+    """The costs of the last requests handled by this process."""
+
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=size)
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def summary(self):
+        """Per-view request counts and average/maximum costs, costliest first."""
+        by_view = defaultdict(list)
+        for entry in self.entries():
+            by_view[entry["view"]].append(entry)
+
+        rows = []
+        for view, entries in by_view.items():
+            count = len(entries)
+            operations = defaultdict(int)
+            for entry in entries:
+                for operation, cost in entry["dynamodb_operations"].items():
+                    operations[operation] += cost["calls"]
+            rows.append(
+                {
+                    "view": view,
+                    "requests": count,
+                    "avg_ms": sum(e["duration_ms"] for e in entries) / count,
+                    "max_ms": max(e["duration_ms"] for e in entries),
+                    "avg_sql_queries": sum(e["sql_queries"] for e in entries) / count,
+                    "max_sql_queries": max(e["sql_queries"] for e in entries),
+                    "avg_sql_ms": sum(e["sql_ms"] for e in entries) / count,
+                    "avg_dynamodb_calls": sum(e["dynamodb_calls"] for e in entries)
+                    / count,
+                    "max_dynamodb_calls": max(e["dynamodb_calls"] for e in entries),
+                    "avg_dynamodb_ms": sum(e["dynamodb_ms"] for e in entries) / count,
+                    "avg_dynamodb_capacity": sum(
+                        e["dynamodb_capacity"] for e in entries
+                    )
+                    / count,
+                    "dynamodb_operations": {
+                        operation: calls / count
+                        for operation, calls in sorted(operations.items())
+                    },
+                }
+            )
+        rows.sort(key=lambda row: row["avg_ms"], reverse=True)
+        return rows
+
+
+recent_request_costs = RecentRequestCosts(settings.REQUEST_COST_BUFFER_SIZE)
+
+
+class RequestCostMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_dynamodb_hooks()
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with track_request_cost() as cost:
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, "resolver_match", None)
+        entry = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 1),
+            **cost.as_dict(),
+        }
+        log.info(json.dumps(entry))
+        recent_request_costs.add(entry)
+
+        user = getattr(request, "user", None)
+        if settings.REQUEST_COST_SERVER_TIMING or getattr(user, "is_superuser", False):
+            response["Server-Timing"] = (
+                f"{cost.server_timing()}, total;dur={duration * 1000:.1f}"
+            )
+        return response
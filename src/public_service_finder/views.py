@@ -1,12 +1,23 @@
 # public_service_finder/views.py
+import logging
+import uuid
+
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Count, Max, Min, Q
 from django.shortcuts import redirect
 from django.shortcuts import render
 
+from analytics.rollups import platform_summary
 from moderation.models import Flag
 from public_service_finder.utils.enums.service_status import ServiceStatus
+from public_service_finder.utils.request_cost import recent_request_costs
+from public_service_finder.utils.timeseries import DEFAULT_WINDOW, WINDOWS
 from services.repositories import ServiceRepository
 
+log = logging.getLogger(__name__)
+
 
 def root_redirect_view(request):
     if request.user.is_authenticated:
@@ -19,6 +30,53 @@ def root_redirect_view(request):
         return redirect("home")  # Redirect to user login if not logged in
 
 
+FLAG_GROUPS_PER_PAGE = 20
+
+
+def _flag_group_details(groups):
+    """
+    Attach the individual flags to each group on the current page, fetched
+    in one query. Preview fields come from the most recent flag.
+    """
+    groups = [dict(group) for group in groups]
+    if not groups:
+        return groups
+
+    matches = Q()
+    for group in groups:
+        matches |= Q(content_type=group["content_type"], object_id=group["object_id"])
+    by_content = {}
+    for flag in (
+        Flag.objects.filter(matches, status="PENDING")
+        .select_related("flagger")
+        .order_by("-created_at", "-id")
+    ):
+        by_content.setdefault((flag.content_type, flag.object_id), []).append(flag)
+
+    for group in groups:
+        flags = by_content.get((group["content_type"], group["object_id"]), [])
+        latest = flags[0] if flags else None
+        group.update(
+            content_preview=getattr(latest, "content_preview", ""),
+            content_title=getattr(latest, "content_title", ""),
+            content_rating=getattr(latest, "content_rating", None),
+            content_author=getattr(latest, "content_author", ""),
+            created_at=group["first_flagged_at"],
+            first_flag_id=getattr(latest, "id", None),
+            flags=[
+                {
+                    "flagger": flag.flagger.username,
+                    "reason": flag.reason,
+                    "explanation": flag.explanation,
+                    "created_at": flag.created_at,
+                    "flag_id": flag.id,
+                }
+                for flag in flags
+            ],
+        )
+    return groups
+
+
 @login_required
 def admin_only_view_new_listings(request):
     if not request.user.is_superuser:
@@ -27,52 +85,27 @@ def admin_only_view_new_listings(request):
     service_repo = ServiceRepository()
     pending_services = service_repo.get_pending_approval_services()
 
-    # First, get all pending flags
-    flags = Flag.objects.filter(status="PENDING").select_related("flagger")
-
-    # Create a dictionary to group flags by content
-    grouped_flags = {}
-    for flag in flags:
-        content_key = f"{flag.content_type}:{flag.object_id}"
-        if content_key not in grouped_flags:
-            grouped_flags[content_key] = {
-                "content_type": flag.content_type,
-                "object_id": flag.object_id,
-                "content_preview": flag.content_preview,
-                "content_title": flag.content_title,
-                "content_rating": flag.content_rating,
-                "content_author": flag.content_author,
-                "created_at": flag.created_at,  # First flag date
-                "flags": [],
-                "flag_count": 0,
-                "first_flag_id": flag.id,
-            }
-
-        # Add this flag's information
-        grouped_flags[content_key]["flags"].append(
-            {
-                "flagger": flag.flagger.username,
-                "reason": flag.reason,
-                "explanation": flag.explanation,
-                "created_at": flag.created_at,
-                "flag_id": flag.id,
-            }
+    # Group, count and order pending flags in the database, one row per
+    # flagged piece of content
+    groups = (
+        Flag.objects.filter(status="PENDING")
+        .values("content_type", "object_id")
+        .annotate(
+            flag_count=Count("id"),
+            first_flagged_at=Min("created_at"),
+            last_flagged_at=Max("created_at"),
         )
-        grouped_flags[content_key]["flag_count"] += 1
-
-    # Convert the dictionary to a list and sort by number of flags (most flags first)
-    grouped_flags_list = sorted(
-        grouped_flags.values(),
-        key=lambda x: (x["flag_count"], x["created_at"]),
-        reverse=True,
+        .order_by("-flag_count", "-last_flagged_at", "content_type", "object_id")
     )
+    flags = Paginator(groups, FLAG_GROUPS_PER_PAGE).get_page(request.GET.get("page"))
+    flags.object_list = _flag_group_details(flags.object_list)
 
     return render(
         request,
         "admin_only.html",
         {
             "pending_services": pending_services,
-            "flags": grouped_flags_list,
+            "flags": flags,
         },
     )
 
@@ -87,7 +120,7 @@ def admin_update_listing(request, service_id):
 
         # Only allow "approve" or "reject" as valid status values
         if new_status not in ["approve", "reject"]:
-            print(request, "Invalid status value.")
+            messages.error(request, "Invalid status value.")
             return redirect("admin_only_view_new_listings")
 
         service_repo = ServiceRepository()
@@ -101,10 +134,100 @@ def admin_update_listing(request, service_id):
                 ),
             )
         except Exception as e:
-            print(f"Exception occurred: {e}")
+            log.error(f"Listing update failed for {service_id}: {e}")
+            messages.error(request, f"Service {service_id} was not updated.")
 
         # Redirect to the listings page to see updated statuses
         return redirect("admin_only_view_new_listings")
 
     # If the request is not POST, redirect back to the listings page
     return redirect("admin_only_view_new_listings")
+
+
+@login_required
+def admin_bulk_update_listings(request):
+    if not request.user.is_superuser:
+        return render(request, "403.html", status=403)
+
+    if request.method == "POST":
+        new_status = request.POST.get("status")
+        if new_status not in ["approve", "reject"]:
+            log.warning(f"Invalid bulk listing status: {new_status}")
+            messages.error(request, "Invalid status value.")
+            return redirect("admin_only_view_new_listings")
+
+        service_ids = []
+        invalid = []
+        for service_id in request.POST.getlist("service_ids"):
+            try:
+                service_ids.append(uuid.UUID(service_id))
+            except ValueError:
+                invalid.append(service_id)
+        if invalid:
+            log.warning(f"Invalid service ids in bulk update: {invalid}")
+            messages.error(request, f"Skipped {len(invalid)} invalid service ids.")
+        if not service_ids:
+            return redirect("admin_only_view_new_listings")
+
+        service_repo = ServiceRepository()
+        try:
+            updated = service_repo.update_service_statuses(
+                service_ids,
+                (
+                    ServiceStatus.APPROVED.value
+                    if new_status == "approve"
+                    else ServiceStatus.REJECTED.value
+                ),
+            )
+        except Exception as e:
+            log.error(f"Bulk listing update failed: {e}")
+            updated = []
+
+        verb = "Approved" if new_status == "approve" else "Rejected"
+        if updated:
+            messages.success(request, f"{verb} {len(updated)} services.")
+        # Missing services and failed batches are left out of updated
+        not_updated = sorted(set(map(str, service_ids)) - set(updated))
+        if not_updated:
+            messages.error(
+                request,
+                f"{len(not_updated)} services were not updated: "
+                + ", ".join(not_updated),
+            )
+
+    return redirect("admin_only_view_new_listings")
+
+
+@login_required
+def admin_request_costs(request):
+    if not request.user.is_superuser:
+        return render(request, "403.html", status=403)
+
+    return render(
+        request,
+        "request_costs.html",
+        {
+            "summary": recent_request_costs.summary(),
+            "request_count": len(recent_request_costs.entries()),
+        },
+    )
+
+
+@login_required
+def admin_platform_analytics(request):
+    if not request.user.is_superuser:
+        return render(request, "403.html", status=403)
+
+    try:
+        days = int(request.GET.get("days", DEFAULT_WINDOW))
+    except ValueError:
+        days = DEFAULT_WINDOW
+    if days not in WINDOWS:
+        days = DEFAULT_WINDOW
+
+    # Reads only the daily rollups that `manage.py build_rollups` writes
+    return render(
+        request,
+        "platform_analytics.html",
+        {"days": days, "windows": WINDOWS, "summary": platform_summary(days)},
+    )
@@ -0,0 +1,100 @@
+"""
+Read-through cache for single services (ServiceRepository.get_service).
+
+Two levels: a per-process LRU of recently read services, and, when
+SERVICE_CACHE_SHARED is set, the Django cache so web processes share their
+reads. Services that do not exist are cached too, for a shorter time, so a
+stale link does not cost a DynamoDB read on every hit.
+
+Every write through ServiceRepository (and the rating update in
+HomeRepository) invalidates the service in both levels. Other processes keep
+their local copy until it expires, so SERVICE_CACHE_TTL bounds how stale a
+read can be; that is why the cache is off unless SERVICE_CACHE_SHARED is set.
+Paths that read a service to save it back call get_service(use_cache=False).
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+MISSING = "missing"
+
+
+def _key(service_id):
+    return f"services:service:{service_id}"
+
+
+class ServiceCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # service id -> (expires_at, service)
+
+    @property
+    def enabled(self):
+        return settings.SERVICE_CACHE_TTL > 0
+
+    def get(self, service_id):
+        """
+        The cached service, MISSING for a cached miss, or None when the
+        service has to be read from DynamoDB. Returns a copy: callers edit
+        and save the services they get.
+        """
+        if not self.enabled:
+            return None
+        service_id = str(service_id)
+        with self._lock:
+            entry = self._entries.get(service_id)
+            if entry is not None:
+                expires_at, service = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(service_id)
+                    return copy.deepcopy(service)
+                del self._entries[service_id]
+        if settings.SERVICE_CACHE_SHARED:
+            service = cache.get(_key(service_id))
+            if service is not None:
+                self._store_local(service_id, service)
+                return copy.deepcopy(service)
+        return None
+
+    def set(self, service_id, service):
+        """Cache a service read from DynamoDB; None caches the miss."""
+        if not self.enabled:
+            return
+        service_id = str(service_id)
+        service = MISSING if service is None else copy.deepcopy(service)
+        self._store_local(service_id, service)
+        if settings.SERVICE_CACHE_SHARED:
+            cache.set(_key(service_id), service, self._ttl(service))
+
+    def invalidate(self, *service_ids):
+        service_ids = [str(service_id) for service_id in service_ids]
+        with self._lock:
+            for service_id in service_ids:
+                self._entries.pop(service_id, None)
+        if settings.SERVICE_CACHE_SHARED:
+            cache.delete_many([_key(service_id) for service_id in service_ids])
+
+    def clear(self):
+        """Drop the local entries; shared entries expire on their own."""
+        with self._lock:
+            self._entries.clear()
+
+    def _ttl(self, service):
+        if service == MISSING:
+            return settings.SERVICE_CACHE_MISSING_TTL
+        return settings.SERVICE_CACHE_TTL
+
+    def _store_local(self, service_id, service):
+        with self._lock:
+            self._entries[service_id] = (time.monotonic() + self._ttl(service), service)
+            self._entries.move_to_end(service_id)
+            while len(self._entries) > settings.SERVICE_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+
+service_cache = ServiceCache()
@@ -16,6 +16,13 @@ class ServiceForm(forms.Form):
         ("Food Pantry", "Food Pantry"),
         ("Restroom", "Restroom"),
     ]
+    # The category codes services are stored under
+    CATEGORY_TRANSLATION = {
+        "Mental Health Center": "MENTAL",
+        "Homeless Shelter": "SHELTER",
+        "Food Pantry": "FOOD",
+        "Restroom": "RESTROOM",
+    }
 
     name = forms.CharField(max_length=255)
     address = forms.CharField(widget=forms.Textarea)
@@ -66,13 +73,7 @@ class ServiceForm(forms.Form):
                 )
 
         # Translate category to backend value
-        category_translation = {
-            "Mental Health Center": "MENTAL",
-            "Homeless Shelter": "SHELTER",
-            "Food Pantry": "FOOD",
-            "Restroom": "RESTROOM",
-        }
-        cleaned_data["category"] = category_translation[cleaned_data["category"]]
+        cleaned_data["category"] = self.CATEGORY_TRANSLATION[cleaned_data["category"]]
         if "announcement" in cleaned_data:
             announcement = cleaned_data["announcement"]
             if announcement:
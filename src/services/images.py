@@ -0,0 +1,27 @@
+import uuid
+
+import boto3
+from django.conf import settings
+
+
+def image_url(s3_key):
+    return f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
+
+
+def upload_image(image, prefix):
+    """
+    Upload an image to S3 under prefix/ and return the URL it is served from.
+
+    The upload runs in the request so a failure can be reported on the form;
+    botocore's ClientError is left to the caller.
+    """
+    image_extension = image.name.split(".")[-1]
+    s3_key = f"{prefix}/{uuid.uuid4()}.{image_extension}"
+    s3_client = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
+    s3_client.upload_fileobj(
+        image,
+        settings.AWS_STORAGE_BUCKET_NAME,
+        s3_key,
+        ExtraArgs={"ContentType": image.content_type},
+    )
+    return image_url(s3_key)
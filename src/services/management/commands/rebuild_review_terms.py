@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from home.repositories import HomeRepository
+from services.terms import rebuild_review_terms
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the review word cloud terms from every review. Run after "
+        "changing REVIEW_TERMS_STOPWORDS or REVIEW_TERMS_BIGRAMS, or to seed "
+        "the counts for existing reviews."
+    )
+
+    def handle(self, *args, **options):
+        terms = rebuild_review_terms(HomeRepository().scan_review_messages())
+        self.stdout.write(f"Counted {terms} service terms")
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.1 on 2026-10-19 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="ReviewTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("service_id", models.CharField(max_length=64)),
+                ("term", models.CharField(max_length=100)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("service_id", "term"), name="services_reviewterm_unique"
+                    )
+                ],
+            },
+        ),
+    ]
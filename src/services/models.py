@@ -1,16 +1,33 @@
-# from django.db import models
-
 import uuid
 
-# Create your models here.
 from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Iterable, List
+
+from django.db import models
 
 from public_service_finder.utils.enums.service_status import ServiceStatus
 
 
-@dataclass
+@lru_cache(maxsize=32)
+def _service_status(value: str) -> str:
+    """The ServiceStatus value of a stored status, parsed once per distinct value"""
+    # Some items were written with str(ServiceStatus.X)
+    if value.startswith("ServiceStatus."):
+        value = value.split(".")[1]
+    return ServiceStatus(value).value
+
+
+def _decimal(value) -> Decimal:
+    # boto3 already returns numbers as Decimal
+    return value if type(value) is Decimal else Decimal(str(value))
+
+
+# slots: no per-instance __dict__, so thousands of DTOs (catalog cache,
+# analytics) take less memory and attribute access is faster. Not frozen, as
+# frozen dataclasses are slower to construct.
+@dataclass(slots=True)
 class ServiceDTO:
     """Data Transfer Object for Service"""
 
@@ -33,20 +50,19 @@ class ServiceDTO:
     @classmethod
     def from_dynamodb_item(cls, item: Dict[str, Any]) -> "ServiceDTO":
         """Create ServiceDTO from DynamoDB item"""
-        service_status = item.get("ServiceStatus", "PENDING_APPROVAL")
-        if service_status.startswith("ServiceStatus."):
-            service_status = service_status.split(".")[1]
         return cls(
             id=item["Id"],
             name=item["Name"],
             address=item["Address"],
-            latitude=Decimal(str(item["Lat"])),
-            longitude=Decimal(str(item["Log"])),
+            latitude=_decimal(item["Lat"]),
+            longitude=_decimal(item["Log"]),
             ratings=item["Ratings"],
             description=item["Description"],
             category=item["Category"],
             provider_id=item["ProviderId"],
-            service_status=ServiceStatus(service_status).value,
+            service_status=_service_status(
+                item.get("ServiceStatus", "PENDING_APPROVAL")
+            ),
             service_created_timestamp=item.get("CreatedTimestamp", "NONE"),
             service_approved_timestamp=item.get("ApprovedTimestamp", "NONE"),
             is_active=item.get("IsActive", True),
@@ -54,6 +70,12 @@ class ServiceDTO:
             image_url=item.get("ImageURL", ""),  # Add this line
         )
 
+    @classmethod
+    def from_dynamodb_items(cls, items: Iterable[Dict[str, Any]]) -> List["ServiceDTO"]:
+        """Create ServiceDTOs from many DynamoDB items"""
+        from_item = cls.from_dynamodb_item
+        return [from_item(item) for item in items]
+
     def to_dynamodb_item(self) -> Dict[str, Any]:
         """Convert to DynamoDB item format"""
         return {
@@ -75,7 +97,7 @@ class ServiceDTO:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class ReviewDTO:
     """Data Transfer Object for Review"""
 
@@ -104,6 +126,12 @@ class ReviewDTO:
             responded_at=review_data.get("RespondedAt", ""),
         )
 
+    @classmethod
+    def from_dynamodb_items(cls, items: Iterable[Dict[str, Any]]) -> List["ReviewDTO"]:
+        """Create ReviewDTOs from many DynamoDB items"""
+        from_item = cls.from_dynamodb_item
+        return [from_item(item) for item in items]
+
     def to_dynamodb_item(self) -> Dict[str, Any]:
         """Convert to DynamoDB review data format"""
         item = {
@@ -120,3 +148,21 @@ class ReviewDTO:
         if self.responded_at:
             item["RespondedAt"] = self.responded_at
         return item
+
+
+class ReviewTerm(models.Model):
+    """How often a term occurs in a service's reviews (see services/terms.py)"""
+
+    service_id = models.CharField(max_length=64)
+    term = models.CharField(max_length=100)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["service_id", "term"], name="services_reviewterm_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.term} ({self.count}) for service {self.service_id}"
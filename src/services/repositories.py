@@ -7,6 +7,7 @@ from django.utils import timezone
 from boto3.dynamodb.conditions import Key
 from typing import List
 
+from .cache import MISSING, service_cache
 from .models import ServiceDTO, ReviewDTO
 
 log = logging.getLogger(__name__)
@@ -24,6 +25,7 @@ class ServiceRepository:
         try:
             item = service_dto.to_dynamodb_item()
             self.table.put_item(Item=item)
+            service_cache.invalidate(item["Id"])
             log.info(f"Persisted service: {item} to DynamoDB")
             return service_dto
         except ClientError as e:
@@ -36,23 +38,36 @@ class ServiceRepository:
                 FilterExpression="ProviderId = :pid",
                 ExpressionAttributeValues={":pid": str(provider_id)},
             )
-            services = [
-                ServiceDTO.from_dynamodb_item(item)
-                for item in response.get("Items", [])
-            ]
+            services = ServiceDTO.from_dynamodb_items(response.get("Items", []))
             log.debug(f"Fetched {len(services)} services for provider {provider_id}")
             return services
         except ClientError as e:
             log.error(f"Error fetching services: {e.response['Error']['Message']}")
             return []
 
-    def get_service(self, service_id: str) -> ServiceDTO | None:
+    def get_service(self, service_id: str, use_cache=True) -> ServiceDTO | None:
+        """
+        Retrieve a service by ID through service_cache. Missing services are
+        cached as well; errors are not.
+
+        Read-modify-write paths pass use_cache=False: the service is then read
+        with a strongly consistent read, so a status or rating changed by
+        another process is not written back from a stale copy.
+        """
+        if use_cache:
+            cached = service_cache.get(service_id)
+            if cached is not None:
+                return None if cached == MISSING else cached
         try:
-            response = self.table.get_item(Key={"Id": service_id})
+            response = self.table.get_item(
+                Key={"Id": service_id}, ConsistentRead=not use_cache
+            )
             item = response.get("Item")
             if item:
                 log.debug(f"Fetched service {service_id}")
-            return ServiceDTO.from_dynamodb_item(item) if item else None
+            service = ServiceDTO.from_dynamodb_item(item) if item else None
+            service_cache.set(service_id, service)
+            return service
         except ClientError as e:
             log.error(
                 f"Error fetching service {service_id}: {e.response['Error']['Message']}"
@@ -64,10 +79,7 @@ class ServiceRepository:
             response = self.table.scan(
                 FilterExpression=Attr("ServiceStatus").eq("PENDING_APPROVAL")
             )
-            return [
-                ServiceDTO.from_dynamodb_item(item)
-                for item in response.get("Items", [])
-            ]
+            return ServiceDTO.from_dynamodb_items(response.get("Items", []))
         except ClientError as e:
             log.error(
                 f"Error fetching pending approval services: {e.response['Error']['Message']}"
@@ -78,6 +90,7 @@ class ServiceRepository:
         try:
             item = service_dto.to_dynamodb_item()
             response = self.table.put_item(Item=item)
+            service_cache.invalidate(item["Id"])
             return service_dto if response else None
         except ClientError as e:
             log.error(f"Error updating service: {e.response['Error']['Message']}")
@@ -86,6 +99,7 @@ class ServiceRepository:
     def delete_service(self, service_id: str) -> bool:
         try:
             self.table.delete_item(Key={"Id": service_id})
+            service_cache.invalidate(service_id)
             return True
         except ClientError as e:
             log.error(
@@ -103,6 +117,7 @@ class ServiceRepository:
                 ConditionExpression="attribute_exists(Id)",
                 ReturnValues="UPDATED_NEW",
             )
+            service_cache.invalidate(service_id_str)
             print("response:", response)
 
             log.info(
@@ -123,6 +138,63 @@ class ServiceRepository:
             )
             return False
 
+    def update_service_statuses(self, service_ids, new_status: str) -> List[str]:
+        """
+        Set the status of many services, one TransactWriteItems call per 100
+        services (the DynamoDB limit). Services that no longer exist are left
+        out and the rest of their batch is retried. Returns the ids that were
+        updated.
+        """
+        client = self.dynamodb.meta.client
+        ids = list(dict.fromkeys(str(service_id) for service_id in service_ids))
+        updated = []
+        for i in range(0, len(ids), 100):
+            pending = ids[i : i + 100]
+            while pending:
+                try:
+                    client.transact_write_items(
+                        TransactItems=[
+                            {
+                                "Update": {
+                                    "TableName": self.table.name,
+                                    "Key": {"Id": service_id},
+                                    "UpdateExpression": "SET ServiceStatus = :new_status",
+                                    "ExpressionAttributeValues": {
+                                        ":new_status": new_status
+                                    },
+                                    "ConditionExpression": "attribute_exists(Id)",
+                                }
+                            }
+                            for service_id in pending
+                        ]
+                    )
+                except ClientError as e:
+                    reasons = e.response.get("CancellationReasons", [])
+                    missing = {
+                        service_id
+                        for service_id, reason in zip(pending, reasons)
+                        if reason.get("Code") == "ConditionalCheckFailed"
+                    }
+                    if not missing:
+                        log.error(
+                            f"Error updating service statuses: {e.response['Error']['Message']}"
+                        )
+                        break
+                    log.error(f"Service IDs {sorted(missing)} do not exist.")
+                    pending = [
+                        service_id
+                        for service_id in pending
+                        if service_id not in missing
+                    ]
+                    continue
+                updated.extend(pending)
+                break
+
+        service_cache.invalidate(*updated)
+
+        log.info(f"Updated ServiceStatus for {len(updated)} services to {new_status}")
+        return updated
+
 
 class ReviewRepository:
     def __init__(self):
@@ -144,6 +216,24 @@ class ReviewRepository:
             )
             return None
 
+    def get_reviews_by_ids(self, review_ids) -> dict[str, ReviewDTO]:
+        """Retrieve many reviews by ID, keyed by ID. Missing reviews are left out."""
+        keys = [{"ReviewId": review_id} for review_id in dict.fromkeys(review_ids)]
+        reviews = {}
+        try:
+            # DynamoDB batch_get_item limit is 100 items per batch
+            for i in range(0, len(keys), 100):
+                request = {self.table.name: {"Keys": keys[i : i + 100]}}
+                while request:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get("Responses", {}).get(self.table.name, []):
+                        review = ReviewDTO.from_dynamodb_item(item)
+                        reviews[review.review_id] = review
+                    request = response.get("UnprocessedKeys")
+        except ClientError as e:
+            log.error(f"Error fetching reviews: {e.response['Error']['Message']}")
+        return reviews
+
     def respond_to_review(self, review_id: str, response_text: str) -> bool:
         """Update a review's responseText field."""
         try:
@@ -178,7 +268,7 @@ class ReviewRepository:
                 KeyConditionExpression=Key("ServiceId").eq(service_id),
             )
             items = response.get("Items", [])
-            return [ReviewDTO.from_dynamodb_item(item) for item in items]
+            return ReviewDTO.from_dynamodb_items(items)
         except ClientError as e:
             log.error(
                 f"Error fetching reviews for service {service_id}: {e.response['Error']['Message']}"
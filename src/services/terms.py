@@ -0,0 +1,117 @@
+"""
+Per-service term counts behind the review word cloud.
+
+Each review's message is split into terms: lowercased words longer than two
+characters that aren't in REVIEW_TERMS_STOPWORDS, plus the pairs of adjacent
+kept words when REVIEW_TERMS_BIGRAMS is set. ReviewTerm keeps, per service,
+how often each term occurs across its reviews. Review writes apply the
+difference between the old and new message (update_review_terms), so the
+word cloud sums at most the providers' vocabularies instead of re-reading
+every review.
+
+Changing the stopwords or the bigram setting only affects reviews written
+afterwards; `manage.py rebuild_review_terms` recounts everything.
+"""
+
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import ReviewTerm
+
+BATCH_SIZE = 500
+
+_WORD = re.compile(r"\w+")
+
+
+def review_terms(message):
+    """Counter of the terms in a review message."""
+    stopwords = set(settings.REVIEW_TERMS_STOPWORDS)
+    max_length = ReviewTerm._meta.get_field("term").max_length
+    # Dropped words stay in the list as None so bigrams don't span them
+    words = [
+        word if 2 < len(word) <= max_length and word not in stopwords else None
+        for word in _WORD.findall((message or "").lower())
+    ]
+    terms = Counter(word for word in words if word)
+    if settings.REVIEW_TERMS_BIGRAMS:
+        terms.update(
+            f"{first} {second}"
+            for first, second in zip(words, words[1:])
+            if first and second and len(first) + len(second) < max_length
+        )
+    return terms
+
+
+def update_review_terms(changes):
+    """
+    Apply review changes to the term counts. changes is an iterable of
+    (service_id, old_message, new_message); old_message is empty for a new
+    review and new_message for a deleted one.
+    """
+    deltas = Counter()
+    for service_id, old_message, new_message in changes:
+        service_id = str(service_id)
+        for term, count in review_terms(new_message).items():
+            deltas[(service_id, term)] += count
+        for term, count in review_terms(old_message).items():
+            deltas[(service_id, term)] -= count
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    # Terms grouped by service and delta, so each group is one UPDATE
+    groups = defaultdict(list)
+    for (service_id, term), delta in deltas.items():
+        groups[(service_id, delta)].append(term)
+
+    with transaction.atomic():
+        ReviewTerm.objects.bulk_create(
+            [
+                ReviewTerm(service_id=service_id, term=term, count=0)
+                for (service_id, term), delta in deltas.items()
+                if delta > 0
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        for (service_id, delta), terms in groups.items():
+            ReviewTerm.objects.filter(service_id=service_id, term__in=terms).update(
+                count=F("count") + delta
+            )
+        for service_id in {service_id for service_id, _ in groups}:
+            ReviewTerm.objects.filter(service_id=service_id, count__lte=0).delete()
+
+
+def rebuild_review_terms(reviews):
+    """Replace all term counts with those of reviews (DynamoDB review items)."""
+    counts = Counter()
+    for review in reviews:
+        service_id = str(review["ServiceId"])
+        for term, count in review_terms(review.get("RatingMessage")).items():
+            counts[(service_id, term)] += count
+
+    with transaction.atomic():
+        ReviewTerm.objects.all().delete()
+        ReviewTerm.objects.bulk_create(
+            (
+                ReviewTerm(service_id=service_id, term=term, count=count)
+                for (service_id, term), count in counts.items()
+            ),
+            batch_size=BATCH_SIZE,
+        )
+    return len(counts)
+
+
+def top_terms(service_ids, limit=50):
+    """The limit most frequent terms across services, as (term, count) pairs."""
+    return list(
+        ReviewTerm.objects.filter(service_id__in=[str(s) for s in service_ids])
+        .values("term")
+        .annotate(total=Sum("count"))
+        .order_by("-total", "term")
+        .values_list("term", "total")[:limit]
+    )
@@ -1,15 +1,21 @@
 # from django.test import TestCase
+import copy
+import pickle
 import uuid
+from datetime import timedelta
 from decimal import Decimal
 from accounts.models import CustomUser
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from public_service_finder.utils.enums.service_status import ServiceStatus
 from botocore.exceptions import ClientError
 from .forms import ServiceForm, DescriptionFormSet, ReviewResponseForm
-from .models import ServiceDTO, ReviewDTO
+from .models import ServiceDTO, ReviewDTO, ReviewTerm
+from .cache import service_cache
 from .repositories import ReviewRepository, ServiceRepository
+from .terms import rebuild_review_terms, review_terms, top_terms, update_review_terms
 
 from unittest.mock import patch, MagicMock
 
@@ -846,6 +852,39 @@ class ServiceAnalyticsViewsTest(TestCase):
         mock_get_services.assert_called_once_with(self.service_provider.id)
         mock_get_bookmarks.assert_called_once_with([self.sample_service_id])
 
+    @patch("services.views.home_repo.get_bookmarks_for_services")
+    @patch("services.views.service_repo.get_services_by_provider")
+    def test_bookmarks_over_time_view_weekly_window(
+        self, mock_get_services, mock_get_bookmarks
+    ):
+        self.login_as_provider()
+        mock_get_services.return_value = [self.sample_service]
+        today = timezone.now().date()
+        mock_get_bookmarks.return_value = [
+            {"timestamp": (today - timedelta(days=days)).isoformat()}
+            for days in (0, 6, 7, 89, 90)
+        ]
+
+        response = self.client.get(
+            reverse("services:bookmarks_over_time"),
+            {"days": 90, "granularity": "week"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(len(data["dates"]), 13)
+        self.assertEqual(data["dates"][-1], (today - timedelta(days=6)).isoformat())
+        self.assertEqual(data["counts"][-2:], [1, 2])
+        self.assertEqual(data["counts"][0], 1)
+        self.assertEqual(sum(data["counts"]), 4)
+
+    def test_bookmarks_over_time_view_invalid_window(self):
+        self.login_as_provider()
+        response = self.client.get(
+            reverse("services:bookmarks_over_time"), {"days": "forever"}
+        )
+        self.assertEqual(response.status_code, 400)
+
     def test_bookmarks_over_time_view_as_regular_user(self):
         self.login_as_regular()
         response = self.client.get(reverse("services:bookmarks_over_time"))
@@ -1057,29 +1096,35 @@ class ServiceAnalyticsViewsTest(TestCase):
         self.assertTrue(response.url.startswith("/accounts/login/"))
 
     # 10. Test review_word_cloud view
-    @patch("services.views.home_repo.get_reviews_for_services")
     @patch("services.views.service_repo.get_services_by_provider")
-    def test_review_word_cloud_view_as_provider(
-        self, mock_get_services, mock_get_reviews
-    ):
+    def test_review_word_cloud_view_as_provider(self, mock_get_services):
         self.login_as_provider()
         mock_get_services.return_value = [self.sample_service]
-        mock_get_reviews.return_value = [
-            {"RatingMessage": "Great service and friendly staff."},
-            {"RatingMessage": "Excellent support and helpful."},
-            {"RatingMessage": "Good experience overall."},
-        ]
+        update_review_terms(
+            [
+                (self.sample_service_id, "", "Great service and friendly staff."),
+                (self.sample_service_id, "", "Excellent service and helpful."),
+                ("other-service", "", "Terrible service."),
+            ]
+        )
 
         response = self.client.get(reverse("services:review_word_cloud"))
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response["Content-Type"], "application/json")
         data = response.json()
-        self.assertIn("words", data)
-        self.assertIsInstance(data["words"], list)
-        self.assertTrue(len(data["words"]) <= 50)
+        self.assertEqual(
+            data["words"],
+            [
+                {"text": "service", "size": 2},
+                {"text": "excellent", "size": 1},
+                {"text": "friendly", "size": 1},
+                {"text": "great", "size": 1},
+                {"text": "helpful", "size": 1},
+                {"text": "staff", "size": 1},
+            ],
+        )
         mock_get_services.assert_called_once_with(self.service_provider.id)
-        mock_get_reviews.assert_called_once_with([self.sample_service_id])
 
     def test_review_word_cloud_view_as_regular_user(self):
         self.login_as_regular()
@@ -1288,6 +1333,74 @@ class DTOModelTests(TestCase):
         service_dto = ServiceDTO.from_dynamodb_item(item)
         self.assertEqual(service_dto.service_status, ServiceStatus.APPROVED.value)
 
+    def test_service_dtos_from_dynamodb_items(self):
+        items = [
+            {
+                "Id": f"service-{n}",
+                "Name": "Test Service",
+                "Address": "123 Test St",
+                "Lat": Decimal("40.7128"),
+                "Log": "-74.0060",
+                "Ratings": Decimal("4.5"),
+                "Description": {"hours": "9-5"},
+                "Category": "MENTAL",
+                "ProviderId": "provider123",
+                "ServiceStatus": status,
+                "CreatedTimestamp": "2022-01-01T12:00:00Z",
+                "ApprovedTimestamp": "2022-01-02T12:00:00Z",
+                "IsActive": True,
+            }
+            for n, status in enumerate(["ServiceStatus.APPROVED", "REJECTED"])
+        ]
+
+        services = ServiceDTO.from_dynamodb_items(items)
+
+        self.assertEqual(services, [ServiceDTO.from_dynamodb_item(i) for i in items])
+        self.assertEqual(
+            [service.service_status for service in services], ["APPROVED", "REJECTED"]
+        )
+        self.assertIs(services[0].latitude, items[0]["Lat"])
+        self.assertEqual(services[0].longitude, Decimal("-74.0060"))
+        self.assertFalse(hasattr(services[0], "__dict__"))
+        # ServiceCache copies and (when shared) pickles them
+        self.assertEqual(copy.deepcopy(services[0]), services[0])
+        self.assertEqual(pickle.loads(pickle.dumps(services[0])), services[0])
+
+    def test_service_dto_rejects_unknown_status(self):
+        item = {
+            "Id": "service-1",
+            "Name": "Test Service",
+            "Address": "123 Test St",
+            "Lat": "40.7128",
+            "Log": "-74.0060",
+            "Ratings": "4.5",
+            "Description": {},
+            "Category": "MENTAL",
+            "ProviderId": "provider123",
+            "ServiceStatus": "ServiceStatus.UNKNOWN",
+        }
+        with self.assertRaises(ValueError):
+            ServiceDTO.from_dynamodb_items([item])
+
+    def test_review_dtos_from_dynamodb_items(self):
+        items = [
+            {
+                "ReviewId": "review-1",
+                "ServiceId": "service-1",
+                "UserId": "1",
+                "Username": "testuser",
+                "RatingStars": Decimal("4"),
+                "RatingMessage": "Good",
+                "Timestamp": "2024-01-01T00:00:00",
+            }
+        ]
+
+        reviews = ReviewDTO.from_dynamodb_items(items)
+
+        self.assertEqual(reviews, [ReviewDTO.from_dynamodb_item(items[0])])
+        self.assertEqual(reviews[0].rating_stars, 4)
+        self.assertFalse(hasattr(reviews[0], "__dict__"))
+
     def test_service_dto_to_dynamodb_item_with_existing_id(self):
         service_id = str(uuid.uuid4())
         service_dto = ServiceDTO(
@@ -1719,6 +1832,45 @@ class ReviewRepositoryMoreTests(TestCase):
         self.assertEqual(reviews[1].rating_message, "Excellent")
         self.mock_table.query.assert_called_once()
 
+    def test_get_reviews_by_ids_batches_and_retries_unprocessed(self):
+        self.mock_table.name = "reviews"
+        batch_get_item = self.mock_boto_resource.return_value.batch_get_item
+
+        def item(review_id):
+            return {
+                "ReviewId": review_id,
+                "ServiceId": "service123",
+                "UserId": "user123",
+                "Username": "reviewer",
+                "RatingStars": "4",
+                "RatingMessage": "Good",
+                "Timestamp": "2022-02-01T12:00:00Z",
+            }
+
+        review_ids = [f"r{i}" for i in range(150)]
+        batch_get_item.side_effect = [
+            {
+                "Responses": {"reviews": [item(r) for r in review_ids[:99]]},
+                "UnprocessedKeys": {"reviews": {"Keys": [{"ReviewId": "r99"}]}},
+            },
+            {"Responses": {"reviews": [item("r99")]}},
+            {"Responses": {"reviews": [item(r) for r in review_ids[100:]]}},
+        ]
+
+        reviews = self.review_repo.get_reviews_by_ids(review_ids)
+
+        self.assertEqual(set(reviews), set(review_ids))
+        self.assertEqual(reviews["r99"].rating_message, "Good")
+        self.assertEqual(batch_get_item.call_count, 3)
+        self.assertEqual(
+            len(
+                batch_get_item.call_args_list[0].kwargs["RequestItems"]["reviews"][
+                    "Keys"
+                ]
+            ),
+            100,
+        )
+
     def test_get_reviews_for_service_client_error(self):
         error_response = {
             "Error": {"Code": "InternalServerError", "Message": "Something went wrong."}
@@ -1727,3 +1879,214 @@ class ReviewRepositoryMoreTests(TestCase):
         reviews = self.review_repo.get_reviews_for_service("service123")
         self.assertEqual(len(reviews), 0)
         self.mock_table.query.assert_called_once()
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(SERVICE_CACHE_TTL=30)
+class ServiceCacheTest(TestCase):
+    def setUp(self):
+        self.repo = ServiceRepository()
+        self.repo.dynamodb = MagicMock()
+        self.repo.table = MagicMock()
+        self.item = ServiceDTO(
+            id="service-1",
+            name="Cached Pantry",
+            address="1 Main St",
+            latitude=Decimal("40.7"),
+            longitude=Decimal("-74.0"),
+            ratings=Decimal("4"),
+            description={"hours": "9-5"},
+            category="Food Pantry",
+            provider_id="1",
+            service_status=ServiceStatus.APPROVED.value,
+            service_created_timestamp="2024-01-01T00:00:00Z",
+            service_approved_timestamp="2024-01-02T00:00:00Z",
+            is_active=True,
+        ).to_dynamodb_item()
+        self.repo.table.get_item.return_value = {"Item": self.item}
+        self.addCleanup(service_cache.clear)
+
+    def test_repeated_reads_hit_dynamodb_once(self):
+        first = self.repo.get_service("service-1")
+        second = self.repo.get_service("service-1")
+
+        self.assertEqual(first, second)
+        self.repo.table.get_item.assert_called_once()
+
+    def test_callers_get_copies(self):
+        self.repo.get_service("service-1").description["hours"] = "closed"
+
+        self.assertEqual(self.repo.get_service("service-1").description["hours"], "9-5")
+
+    def test_missing_services_are_cached(self):
+        self.repo.table.get_item.return_value = {}
+
+        self.assertIsNone(self.repo.get_service("gone"))
+        self.assertIsNone(self.repo.get_service("gone"))
+        self.repo.table.get_item.assert_called_once()
+
+    def test_errors_are_not_cached(self):
+        self.repo.table.get_item.side_effect = [
+            ClientError({"Error": {"Code": "500", "Message": "Boom"}}, "GetItem"),
+            {"Item": self.item},
+        ]
+
+        self.assertIsNone(self.repo.get_service("service-1"))
+        self.assertEqual(self.repo.get_service("service-1").name, "Cached Pantry")
+
+    def test_writes_invalidate_the_service(self):
+        service = ServiceDTO.from_dynamodb_item(self.item)
+        writes = [
+            lambda: self.repo.update_service(service),
+            lambda: self.repo.update_service_status("service-1", "REJECTED"),
+            lambda: self.repo.update_service_statuses(["service-1"], "APPROVED"),
+            lambda: self.repo.delete_service("service-1"),
+        ]
+        for write in writes:
+            self.repo.get_service("service-1")
+            reads = self.repo.table.get_item.call_count
+            write()
+            self.repo.get_service("service-1")
+            self.assertEqual(self.repo.table.get_item.call_count, reads + 1)
+
+    def test_creating_a_service_clears_its_cached_miss(self):
+        self.repo.table.get_item.return_value = {}
+        self.assertIsNone(self.repo.get_service("service-1"))
+
+        self.repo.create_service(ServiceDTO.from_dynamodb_item(self.item))
+        self.repo.table.get_item.return_value = {"Item": self.item}
+
+        self.assertEqual(self.repo.get_service("service-1").name, "Cached Pantry")
+
+    def test_read_modify_write_bypasses_the_cache(self):
+        self.repo.get_service("service-1")
+        # Approved in another process, whose invalidation never reached us
+        self.repo.table.get_item.return_value = {
+            "Item": dict(self.item, ServiceStatus="APPROVED")
+        }
+
+        service = self.repo.get_service("service-1", use_cache=False)
+
+        self.assertEqual(service.service_status, "APPROVED")
+        self.repo.table.get_item.assert_called_with(
+            Key={"Id": "service-1"}, ConsistentRead=True
+        )
+        # The fresh copy replaces the stale one
+        self.assertEqual(self.repo.get_service("service-1").service_status, "APPROVED")
+        self.assertEqual(self.repo.table.get_item.call_count, 2)
+
+    @override_settings(SERVICE_CACHE_SIZE=2)
+    def test_least_recently_used_services_are_evicted(self):
+        for service_id in ["a", "b", "a", "c", "a", "b"]:
+            self.repo.get_service(service_id)
+
+        # "b" was evicted by "c"; "a" stayed because it was read again
+        self.assertEqual(self.repo.table.get_item.call_count, 4)
+
+    @override_settings(SERVICE_CACHE_SHARED=True, CACHES=LOCMEM_CACHE)
+    def test_shared_cache_serves_other_processes(self):
+        self.repo.get_service("service-1")
+        service_cache.clear()  # another process has an empty local cache
+
+        self.assertEqual(self.repo.get_service("service-1").name, "Cached Pantry")
+        self.repo.table.get_item.assert_called_once()
+
+        self.repo.update_service_status("service-1", "REJECTED")
+        service_cache.clear()
+        self.repo.get_service("service-1")
+        self.assertEqual(self.repo.table.get_item.call_count, 2)
+
+    @override_settings(SERVICE_CACHE_TTL=0)
+    def test_disabled_cache_always_reads_dynamodb(self):
+        self.repo.get_service("service-1")
+        self.repo.get_service("service-1")
+
+        self.assertEqual(self.repo.table.get_item.call_count, 2)
+
+
+class ReviewTermsTest(TestCase):
+    def test_review_terms_skip_stopwords_and_short_words(self):
+        self.assertEqual(
+            review_terms("The staff is great, great and OK!"),
+            {"staff": 1, "great": 2},
+        )
+        self.assertEqual(review_terms(None), {})
+
+    @override_settings(REVIEW_TERMS_BIGRAMS=True)
+    def test_bigrams_do_not_span_dropped_words(self):
+        self.assertEqual(
+            review_terms("friendly staff and quick help"),
+            {
+                "friendly": 1,
+                "staff": 1,
+                "quick": 1,
+                "help": 1,
+                "friendly staff": 1,
+                "quick help": 1,
+            },
+        )
+
+    def test_updates_apply_message_changes(self):
+        update_review_terms(
+            [("s1", "", "great staff"), ("s1", "", "great food"), ("s2", "", "slow")]
+        )
+        update_review_terms([("s1", "great food", "cold food"), ("s2", "slow", "")])
+
+        self.assertEqual(
+            set(ReviewTerm.objects.values_list("service_id", "term", "count")),
+            {
+                ("s1", "great", 1),
+                ("s1", "staff", 1),
+                ("s1", "cold", 1),
+                ("s1", "food", 1),
+            },
+        )
+
+    def test_rebuild_matches_incremental_counts(self):
+        reviews = [
+            {"ServiceId": "s1", "RatingMessage": "great staff"},
+            {"ServiceId": "s1", "RatingMessage": "great food"},
+            {"ServiceId": "s2", "RatingMessage": "slow"},
+        ]
+        update_review_terms(
+            (review["ServiceId"], "", review["RatingMessage"]) for review in reviews
+        )
+        incremental = set(ReviewTerm.objects.values_list("service_id", "term", "count"))
+        ReviewTerm.objects.create(service_id="s3", term="stale", count=4)
+
+        self.assertEqual(rebuild_review_terms(reviews), 4)
+        self.assertEqual(
+            set(ReviewTerm.objects.values_list("service_id", "term", "count")),
+            incremental,
+        )
+
+    def test_top_terms_sum_across_services(self):
+        update_review_terms(
+            [("s1", "", "great staff"), ("s2", "", "great food"), ("s3", "", "slow")]
+        )
+
+        self.assertEqual(top_terms(["s1", "s2"], limit=2), [("great", 2), ("food", 1)])
+        self.assertEqual(top_terms([]), [])
+
+
+class ImageUploadTest(TestCase):
+    @patch("services.images.boto3.client")
+    def test_upload_image_returns_url_of_uploaded_key(self, mock_client):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from .images import upload_image
+
+        image = SimpleUploadedFile("photo.png", b"image-bytes", "image/png")
+        url = upload_image(image, "images")
+
+        self.assertRegex(url, r"^https://.+/images/[0-9a-f-]{36}\.png$")
+        upload = mock_client.return_value.upload_fileobj
+        upload.assert_called_once()
+        fileobj, _, s3_key = upload.call_args.args
+        self.assertIs(fileobj, image)
+        self.assertTrue(url.endswith(s3_key))
+        self.assertEqual(
+            upload.call_args.kwargs["ExtraArgs"], {"ContentType": "image/png"}
+        )
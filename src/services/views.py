@@ -1,6 +1,6 @@
 import uuid
 from decimal import Decimal
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.http import (
@@ -9,20 +9,22 @@ from django.http import (
     HttpResponse,
     HttpResponseNotAllowed,
 )
+from botocore.exceptions import ClientError
 from django.shortcuts import render, redirect
 from django.utils import timezone as timezone2  # Ensure this is imported
 from forum.models import Notification
+from forum.notifications import dispatch_fan_out
 from home.repositories import HomeRepository
-from public_service_finder import settings
+from home.review_pages import invalidate_review_pages
+from moderation.status import flag_statuses
 from public_service_finder.utils.enums.service_status import ServiceStatus
+from public_service_finder.utils.timeseries import TimeBuckets
 from .forms import ServiceForm, DescriptionFormSet, ReviewResponseForm
 from .models import ServiceDTO
 from .repositories import ServiceRepository, ReviewRepository
-from collections import Counter
-import re
+from .images import upload_image
+from .terms import top_terms
 from accounts.models import CustomUser
-import boto3
-from botocore.exceptions import ClientError
 
 service_repo = ServiceRepository()
 review_repo = ReviewRepository()
@@ -81,22 +83,8 @@ def service_create(request):
             # Handle image upload
             image_url = ""
             if image:
-                # Generate a unique filename
-                image_extension = image.name.split(".")[-1]
-                unique_filename = f"{uuid.uuid4()}.{image_extension}"
-                s3_key = f"service-provider-images/{unique_filename}"
-
-                # Upload to S3
-                s3_client = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
                 try:
-                    s3_client.upload_fileobj(
-                        image,
-                        settings.AWS_STORAGE_BUCKET_NAME,
-                        s3_key,
-                        ExtraArgs={"ContentType": image.content_type},
-                    )
-                    # Construct the image URL
-                    image_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
+                    image_url = upload_image(image, "service-provider-images")
                 except ClientError as e:
                     print(f"Failed to upload image to S3: {e}")
                     form.add_error("image", "Failed to upload image. Please try again.")
@@ -207,22 +195,8 @@ def service_edit(request, service_id):
             if remove_image:
                 image_url = ""
             if image:
-                # Generate a unique filename
-                image_extension = image.name.split(".")[-1]
-                unique_filename = f"{uuid.uuid4()}.{image_extension}"
-                s3_key = f"service-provider-images/{unique_filename}"
-
-                # Upload to S3
-                s3_client = boto3.client("s3", region_name=settings.AWS_S3_REGION_NAME)
                 try:
-                    s3_client.upload_fileobj(
-                        image,
-                        settings.AWS_STORAGE_BUCKET_NAME,
-                        s3_key,
-                        ExtraArgs={"ContentType": image.content_type},
-                    )
-                    # Construct the image URL
-                    image_url = f"https://{settings.AWS_STORAGE_BUCKET_NAME}.s3.{settings.AWS_S3_REGION_NAME}.amazonaws.com/{s3_key}"
+                    image_url = upload_image(image, "service-provider-images")
                 except ClientError as e:
                     print(f"Failed to upload image to S3: {e}")
                     form.add_error("image", "Failed to upload image. Please try again.")
@@ -280,20 +254,13 @@ def service_edit(request, service_id):
                 # Get all bookmarks for this service
                 bookmarks = home_repo.get_bookmarks_for_service(service_id)
 
-                # Create notifications for each user who bookmarked the service
-                for bookmark in bookmarks:
-                    try:
-                        user = CustomUser.objects.get(id=bookmark["UserId"])
-                        Notification.objects.create(
-                            recipient=user,
-                            sender=request.user,
-                            post=None,
-                            comment=None,
-                            message=f"New announcement from {service.name}: {new_announcement[:50]}{'...' if len(new_announcement) > 50 else ''}",
-                            notification_type="announcement",
-                        )
-                    except CustomUser.DoesNotExist:
-                        continue
+                # Notify every user who bookmarked the service
+                dispatch_fan_out(
+                    [bookmark["UserId"] for bookmark in bookmarks],
+                    sender=request.user,
+                    message=f"New announcement from {service.name}: {new_announcement[:50]}{'...' if len(new_announcement) > 50 else ''}",
+                    notification_type="announcement",
+                )
 
             if service_repo.update_service(updated_service):
                 return redirect("services:list")
@@ -357,6 +324,13 @@ def service_details(request, service_id):
         "is_active": service.is_active,
         "reviews": reviews,
         "announcement": service.announcement,
+        "flag_statuses": (
+            flag_statuses(
+                request.user, [("REVIEW", review["ReviewId"]) for review in reviews]
+            )
+            if request.user.is_authenticated
+            else {}
+        ),
     }
 
     return JsonResponse(data)
@@ -382,7 +356,8 @@ def verify_service(request, service_id):
         raise Http404("Invalid service ID")
     if request.user.user_type != "service_provider":
         raise PermissionDenied
-    service = service_repo.get_service(service_id)
+    # Callers save the service back, so it must not come from the cache
+    service = service_repo.get_service(service_id, use_cache=False)
     if not service or service.provider_id != str(request.user.id):
         raise PermissionDenied
     return service
@@ -410,7 +385,7 @@ def respond_to_review(request, service_id, review_id):
         )
 
     # Fetch the service and review data
-    service = service_repo.get_service(service_id)
+    service = service_repo.get_service(service_id, use_cache=False)
     if not service:
         raise Http404("Service does not exist")
 
@@ -431,6 +406,7 @@ def respond_to_review(request, service_id, review_id):
             # Attempt to update the review response in DynamoDB
             success = review_repo.respond_to_review(review_id, response_text)
             if success:
+                invalidate_review_pages(service_id)
                 reviewer_id = (
                     review.user_id
                 )  # Assuming this is how you store the reviewer's ID
@@ -492,25 +468,20 @@ def bookmarks_over_time(request):
     if request.user.user_type != "service_provider":
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
+    try:
+        buckets = TimeBuckets.from_request(request, timezone2.now().date())
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
     services = service_repo.get_services_by_provider(request.user.id)
     service_ids = [service.id for service in services]
 
     bookmarks = home_repo.get_bookmarks_for_services(service_ids)
 
-    # Process bookmarks to get counts over the last 30 days
-    today = timezone2.now().date()
-    dates = [today - timedelta(days=i) for i in range(29, -1, -1)]
-    date_strs = [date.isoformat() for date in dates]
-    bookmarks_over_time = {date_str: 0 for date_str in date_strs}
-
-    for bookmark in bookmarks:
-        timestamp = datetime.fromisoformat(bookmark["timestamp"]).date().isoformat()
-        if timestamp in bookmarks_over_time:
-            bookmarks_over_time[timestamp] += 1
-
+    # Bookmark counts per day (or week) over the last 30 (7, 90) days
     data = {
-        "dates": date_strs,
-        "counts": [bookmarks_over_time[date_str] for date_str in date_strs],
+        "dates": buckets.labels,
+        "counts": buckets.counts([bookmark["timestamp"] for bookmark in bookmarks]),
     }
     return JsonResponse(data)
 
@@ -520,25 +491,20 @@ def reviews_over_time(request):
     if request.user.user_type != "service_provider":
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
+    try:
+        buckets = TimeBuckets.from_request(request, timezone2.now().date())
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
     services = service_repo.get_services_by_provider(request.user.id)
     service_ids = [service.id for service in services]
 
     reviews = home_repo.get_reviews_for_services(service_ids)
 
-    # Process reviews to get counts over the last 30 days
-    today = timezone2.now().date()
-    dates = [today - timedelta(days=i) for i in range(29, -1, -1)]
-    date_strs = [date.isoformat() for date in dates]
-    reviews_over_time = {date_str: 0 for date_str in date_strs}
-
-    for review in reviews:
-        timestamp = datetime.fromisoformat(review["Timestamp"]).date().isoformat()
-        if timestamp in reviews_over_time:
-            reviews_over_time[timestamp] += 1
-
+    # Review counts per day (or week) over the last 30 (7, 90) days
     data = {
-        "dates": date_strs,
-        "counts": [reviews_over_time[date_str] for date_str in date_strs],
+        "dates": buckets.labels,
+        "counts": buckets.counts([review["Timestamp"] for review in reviews]),
     }
 
     return JsonResponse(data)
@@ -549,36 +515,26 @@ def average_rating_over_time(request):
     if request.user.user_type != "service_provider":
         return JsonResponse({"error": "Unauthorized"}, status=403)
 
+    try:
+        buckets = TimeBuckets.from_request(request, timezone2.now().date())
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
     services = service_repo.get_services_by_provider(request.user.id)
     service_ids = [service.id for service in services]
 
     reviews = home_repo.get_reviews_for_services(service_ids)
 
-    # Process reviews to get average rating over the last 30 days
-    today = timezone2.now().date()
-    dates = [today - timedelta(days=i) for i in range(29, -1, -1)]
-    date_strs = [date.isoformat() for date in dates]
-    rating_over_time = {
-        date_str: {"total_rating": 0, "count": 0} for date_str in date_strs
+    # Average rating per day (or week) over the last 30 (7, 90) days; None
+    # where there were no reviews
+    data = {
+        "dates": buckets.labels,
+        "avg_ratings": buckets.means(
+            [review["Timestamp"] for review in reviews],
+            [int(review["RatingStars"]) for review in reviews],
+        ),
     }
 
-    for review in reviews:
-        timestamp = datetime.fromisoformat(review["Timestamp"]).date().isoformat()
-        if timestamp in rating_over_time:
-            rating_over_time[timestamp]["total_rating"] += int(review["RatingStars"])
-            rating_over_time[timestamp]["count"] += 1
-
-    avg_ratings = []
-    for date_str in date_strs:
-        data_point = rating_over_time[date_str]
-        if data_point["count"] > 0:
-            avg_rating = data_point["total_rating"] / data_point["count"]
-        else:
-            avg_rating = None  # Use None to represent missing data
-        avg_ratings.append(avg_rating)
-
-    data = {"dates": date_strs, "avg_ratings": avg_ratings}
-
     return JsonResponse(data)
 
 
@@ -662,33 +618,8 @@ def review_word_cloud(request):
     services = service_repo.get_services_by_provider(request.user.id)
     service_ids = [service.id for service in services]
 
-    reviews = home_repo.get_reviews_for_services(service_ids)
-
-    # Combine all review texts
-    text = " ".join(review["RatingMessage"] for review in reviews)
-
-    # Simple text processing
-    words = re.findall(r"\w+", text.lower())
-    stopwords = {
-        "the",
-        "and",
-        "is",
-        "in",
-        "it",
-        "of",
-        "to",
-        "a",
-        "i",
-        "for",
-        "this",
-        "that",
-        "with",
-    }
-    words = [word for word in words if word not in stopwords and len(word) > 2]
-
-    # Count word frequencies
-    word_counts = Counter(words)
-    most_common = word_counts.most_common(50)
+    # Term counts are kept up to date on every review write (services/terms.py)
+    most_common = top_terms(service_ids, 50)
 
     # Prepare data
     data = [{"text": word, "size": count} for word, count in most_common]
@@ -1,68 +1,99 @@
-async function checkFlagStatus(contentType, objectId) {
+const DEFAULT_FLAG_STATUS = {
+    userHasFlagged: false,
+    hasPendingFlags: false,
+    pendingFlagsCount: 0
+};
+
+// Statuses rendered into the page by the server, keyed by "<type>:<id>"
+function preloadedFlagStatuses() {
+    const element = document.getElementById('flag-statuses');
+    return element ? JSON.parse(element.textContent) : {};
+}
+
+// Look up the statuses of many items in a single request
+async function fetchFlagStatuses(items) {
+    if (items.length === 0) return {};
     try {
-        const response = await fetch(`/moderation/check_flag_status/${contentType}/${objectId}/`);
+        const response = await fetch('/moderation/flag_statuses/', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCsrfToken(),
+            },
+            body: JSON.stringify({
+                items: items.map(([contentType, objectId]) => ({
+                    content_type: contentType,
+                    object_id: objectId
+                }))
+            })
+        });
         if (!response.ok) throw new Error('Failed to check flag status');
         const data = await response.json();
-
-        // Return the full data object so we can use all the information
-        return {
-            userHasFlagged: data.userHasFlagged,
-            hasPendingFlags: data.hasPendingFlags,
-            pendingFlagsCount: data.pendingFlagsCount
-        };
+        return data.statuses;
     } catch (error) {
         console.error('Error checking flag status:', error);
-        // Return a safe default state if there's an error
-        return {
-            userHasFlagged: false,
-            hasPendingFlags: false,
-            pendingFlagsCount: 0
-        };
+        // Fall back to the safe default state for every item
+        return {};
+    }
+}
+
+function getCsrfToken() {
+    const cookies = document.cookie.split('; ');
+    for (const cookie of cookies) {
+        const [name, value] = cookie.split('=');
+        if (name === 'csrftoken') return value;
     }
+    return '';
 }
 
-function createFlagIcon(contentType, objectId, container) {
-    checkFlagStatus(contentType, objectId).then(status => {
-        container.innerHTML = ''; // Clear existing content
+function createFlagIcon(contentType, objectId, container, status = DEFAULT_FLAG_STATUS) {
+    container.innerHTML = ''; // Clear existing content
 
-        if (status.userHasFlagged) {
-            // Show clock icon only to users who have flagged the content
-            const reviewIcon = document.createElement('i');
-            reviewIcon.classList.add('fas', 'fa-clock', 'text-yellow-500');
-            reviewIcon.title = "You have reported this content - under review";
-            container.appendChild(reviewIcon);
-        } else {
-            // Show flag icon to users who haven't flagged yet
-            const flagIcon = document.createElement('i');
-            flagIcon.classList.add('fas', 'fa-flag', 'text-gray-400', 'hover:text-red-500', 'cursor-pointer');
-            flagIcon.title = "Report this content";
+    if (status.userHasFlagged) {
+        // Show clock icon only to users who have flagged the content
+        const reviewIcon = document.createElement('i');
+        reviewIcon.classList.add('fas', 'fa-clock', 'text-yellow-500');
+        reviewIcon.title = "You have reported this content - under review";
+        container.appendChild(reviewIcon);
+    } else {
+        // Show flag icon to users who haven't flagged yet
+        const flagIcon = document.createElement('i');
+        flagIcon.classList.add('fas', 'fa-flag', 'text-gray-400', 'hover:text-red-500', 'cursor-pointer');
+        flagIcon.title = "Report this content";
 
-            // Only add click handler if the user hasn't flagged yet
-            flagIcon.onclick = () => openFlagModal(contentType, objectId);
-            container.appendChild(flagIcon);
-        }
+        // Only add click handler if the user hasn't flagged yet
+        flagIcon.onclick = () => openFlagModal(contentType, objectId);
+        container.appendChild(flagIcon);
+    }
 
-        // Optionally, for admin users, we could show additional information
-        // This would require passing the user's admin status to the frontend
-        if (window.isAdminUser && status.hasPendingFlags) {
-            const flagCount = document.createElement('span');
-            flagCount.classList.add('text-xs', 'text-yellow-500', 'ml-1');
-            flagCount.title = "Number of pending flags";
-            flagCount.textContent = status.pendingFlagsCount;
-            container.appendChild(flagCount);
-        }
-    });
+    // Optionally, for admin users, we could show additional information
+    // This would require passing the user's admin status to the frontend
+    if (window.isAdminUser && status.hasPendingFlags) {
+        const flagCount = document.createElement('span');
+        flagCount.classList.add('text-xs', 'text-yellow-500', 'ml-1');
+        flagCount.title = "Number of pending flags";
+        flagCount.textContent = status.pendingFlagsCount;
+        container.appendChild(flagCount);
+    }
 }
 
-function updateFlagIconsForForumContent() {
-    // Update flag icons for posts
-    document.querySelectorAll('[data-flag-container]').forEach(container => {
+async function updateFlagIconsForForumContent() {
+    const containers = Array.from(document.querySelectorAll('[data-flag-container]'));
+    const statuses = preloadedFlagStatuses();
+
+    // Anything the page didn't come with is fetched in one request
+    const missing = containers
+        .map(container => [container.dataset.contentType, container.dataset.objectId])
+        .filter(([contentType, objectId]) => !(`${contentType}:${objectId}` in statuses));
+    Object.assign(statuses, await fetchFlagStatuses(missing));
+
+    containers.forEach(container => {
         const contentType = container.dataset.contentType;
         const objectId = container.dataset.objectId;
-        createFlagIcon(contentType, objectId, container);
+        createFlagIcon(contentType, objectId, container, statuses[`${contentType}:${objectId}`]);
     });
 }
 
 document.addEventListener('DOMContentLoaded', () => {
     updateFlagIconsForForumContent();
-});
\ No newline at end of file
+});
@@ -54,20 +54,62 @@ document.addEventListener('click', (e) => {
 
 
 if (notificationsButton) {
+    function setNotificationCount(count) {
+        const countElement = document.getElementById('notificationCount');
+        if (countElement) {
+            countElement.textContent = count;
+            countElement.style.display = count > 0 ? 'flex' : 'none';
+        }
+    }
+
     function updateNotificationCount() {
         fetch('/forum/notifications/count/')
             .then(response => response.json())
-            .then(data => {
-                const countElement = document.getElementById('notificationCount');
-                if (countElement) {
-                    countElement.textContent = data.count;
-                    countElement.style.display = data.count > 0 ? 'flex' : 'none';
-                }
-            });
+            .then(data => setNotificationCount(data.count));
     }
 
-    // Update count every 30 seconds
-    setInterval(updateNotificationCount, 30000);
+    function prependNotification(data) {
+        const list = notificationsDropdown.querySelector('.max-h-96');
+        if (!list) return;
+        const placeholder = list.querySelector('.text-center');
+        if (placeholder) placeholder.remove();
+
+        const item = document.createElement('div');
+        item.className = 'p-4 border-b border-gray-700 hover:bg-gray-700 bg-gray-900';
+        const message = document.createElement('p');
+        message.className = 'text-sm';
+        message.textContent = data.message;
+        const time = document.createElement('p');
+        time.className = 'text-xs text-gray-500 mt-1';
+        time.textContent = 'just now';
+        item.append(message, time);
+        list.prepend(item);
+    }
+
+    let pollTimer = null;
+    function startPolling() {
+        // Update count every 30 seconds
+        if (!pollTimer) pollTimer = setInterval(updateNotificationCount, 30000);
+    }
+
+    const streamUrl = notificationsButton.dataset.streamUrl;
+    if (streamUrl && window.EventSource) {
+        const source = new EventSource(streamUrl);
+        source.addEventListener('count', (e) => {
+            setNotificationCount(JSON.parse(e.data).unread_count);
+        });
+        source.addEventListener('notification', (e) => {
+            const data = JSON.parse(e.data);
+            setNotificationCount(data.unread_count);
+            prependNotification(data);
+        });
+        source.addEventListener('error', () => {
+            // EventSource reconnects by itself unless the server refused the stream
+            if (source.readyState === EventSource.CLOSED) startPolling();
+        });
+    } else {
+        startPolling();
+    }
 }
 
 document.addEventListener('DOMContentLoaded', () => {
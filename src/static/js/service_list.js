@@ -106,8 +106,10 @@ document.addEventListener('DOMContentLoaded', function () {
                                 `}
                             </div>
                         `;
-                        checkFlagStatus('REVIEW', review.ReviewId);
-
+                    });
+                    // Flag statuses come with the service details
+                    data.reviews.forEach(review => {
+                        showFlagStatus(review.ReviewId, data.flag_statuses[`REVIEW:${review.ReviewId}`]);
                     });
                 } else {
                     reviewsContainer.innerHTML += '<p class="text-gray-400">No reviews yet.</p>';
@@ -157,36 +159,30 @@ document.addEventListener('DOMContentLoaded', function () {
     });
 });
 
-async function checkFlagStatus(contentType, objectId) {
-    try {
-        const response = await fetch(`/moderation/check_flag_status/${contentType}/${objectId}/`);
-        const data = await response.json();
-
-        const container = document.querySelector(`.flag-status-container[data-review-id="${objectId}"]`);
-        if (!container) return;
+function showFlagStatus(objectId, data) {
+    if (!data) return;
+    const container = document.querySelector(`.flag-status-container[data-review-id="${objectId}"]`);
+    if (!container) return;
 
-        if (data.hasPendingFlags) {
-            // Replace the flag button with a pending icon
-            container.innerHTML = `
-                <div class="text-yellow-500" title="This review has been reported and is pending moderation">
-                    <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5" fill="none" viewBox="0 0 24 24" stroke="currentColor">
-                        <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" 
-                              d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" />
-                    </svg>
-                </div>
-            `;
-        } else if (data.userHasFlagged) {
-            // Show flagged state
-            const flagButton = container.querySelector('.flag-button');
-            if (flagButton) {
-                flagButton.classList.add('text-red-400');
-                flagButton.classList.remove('text-gray-400');
-                flagButton.title = 'You have reported this review';
-                flagButton.disabled = true;
-            }
+    if (data.hasPendingFlags) {
+        // Replace the flag button with a pending icon
+        container.innerHTML = `
+            <div class="text-yellow-500" title="This review has been reported and is pending moderation">
+                <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5" fill="none" viewBox="0 0 24 24" stroke="currentColor">
+                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" 
+                          d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" />
+                </svg>
+            </div>
+        `;
+    } else if (data.userHasFlagged) {
+        // Show flagged state
+        const flagButton = container.querySelector('.flag-button');
+        if (flagButton) {
+            flagButton.classList.add('text-red-400');
+            flagButton.classList.remove('text-gray-400');
+            flagButton.title = 'You have reported this review';
+            flagButton.disabled = true;
         }
-    } catch (error) {
-        console.error('Error checking flag status:', error);
     }
 }
 
@@ -0,0 +1,89 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+log = logging.getLogger(__name__)
+
+_backends = {}
+
+
+def run_task(definition, kwargs):
+    """Run a task once. Returns (succeeded, error message, duration in seconds)."""
+    start = time.monotonic()
+    try:
+        definition.func(**kwargs)
+        return True, "", time.monotonic() - start
+    except Exception as e:
+        log.error(f"Task {definition.name} failed: {e}")
+        return False, f"{type(e).__name__}: {e}", time.monotonic() - start
+
+
+class DatabaseBackend:
+    """Persists jobs in the tasks_job table; `manage.py run_tasks` executes them."""
+
+    def enqueue(self, definition, kwargs, delay=None):
+        from .models import Job
+
+        job = Job.objects.create(
+            name=definition.name,
+            payload=kwargs,
+            max_attempts=definition.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay or 0),
+        )
+        metrics.record(definition.name, "enqueued")
+        return job
+
+
+class InProcessBackend:
+    """
+    Keeps jobs in memory and runs them in the calling process.
+
+    With TASKS_EAGER the job runs (with retries, but without waiting between
+    attempts) as soon as it is enqueued; otherwise jobs accumulate until
+    run_pending() is called, which lets tests decide when side effects happen.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def enqueue(self, definition, kwargs, delay=None):
+        metrics.record(definition.name, "enqueued")
+        if getattr(settings, "TASKS_EAGER", False):
+            self._run(definition, kwargs)
+        else:
+            self.pending.append((definition, kwargs))
+
+    def run_pending(self):
+        ran = 0
+        while self.pending:
+            definition, kwargs = self.pending.pop(0)
+            self._run(definition, kwargs)
+            ran += 1
+        return ran
+
+    def clear(self):
+        self.pending = []
+
+    def _run(self, definition, kwargs):
+        for attempt in range(1, definition.max_attempts + 1):
+            succeeded, error, duration = run_task(definition, kwargs)
+            if succeeded:
+                metrics.record(definition.name, "succeeded", duration)
+                return True
+            if attempt < definition.max_attempts:
+                metrics.record(definition.name, "retried", duration)
+        metrics.record(definition.name, "failed", duration)
+        return False
+
+
+def get_backend():
+    path = settings.TASKS_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
@@ -0,0 +1,65 @@
+import json
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.metrics import queue_stats
+from tasks.worker import Worker
+
+
+def _run_worker(batch_size, poll_interval, burst):
+    Worker(batch_size=batch_size, poll_interval=poll_interval).run(burst=burst)
+
+
+class Command(BaseCommand):
+    help = "Run background task workers against the database job queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes", type=int, default=1, help="Number of worker processes"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=10, help="Jobs claimed per poll"
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print job counts per task and status, then exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_stats(), indent=2, default=str))
+            return
+
+        worker_args = (
+            options["batch_size"],
+            options["poll_interval"],
+            options["burst"],
+        )
+        if options["processes"] <= 1:
+            _run_worker(*worker_args)
+            return
+
+        # Children must not inherit the parent's database connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=_run_worker, args=worker_args)
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
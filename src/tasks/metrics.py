@@ -0,0 +1,62 @@
+import logging
+import threading
+from collections import defaultdict
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_counters = defaultdict(lambda: defaultdict(int))
+_durations = defaultdict(float)
+
+
+def record(task_name, event, duration=None):
+    """
+    Count a task lifecycle event (enqueued, succeeded, retried, failed) for
+    this process. Successful and failed runs also accumulate their duration.
+    """
+    with _lock:
+        _counters[task_name][event] += 1
+        if duration is not None:
+            _durations[task_name] += duration
+    if duration is not None:
+        log.info(f"task={task_name} event={event} duration_ms={duration * 1000:.1f}")
+    else:
+        log.info(f"task={task_name} event={event}")
+
+
+def snapshot():
+    """Per-task counters plus the mean run time (in ms) for this process."""
+    with _lock:
+        stats = {}
+        for task_name, counters in _counters.items():
+            runs = counters.get("succeeded", 0) + counters.get("failed", 0)
+            runs += counters.get("retried", 0)
+            stats[task_name] = dict(counters)
+            stats[task_name]["mean_duration_ms"] = (
+                round(_durations[task_name] / runs * 1000, 1) if runs else None
+            )
+        return stats
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _durations.clear()
+
+
+def queue_stats():
+    """Job counts per task and status across all workers, from the database."""
+    from django.db.models import Avg, Count
+
+    from .models import Job
+
+    stats = defaultdict(dict)
+    rows = Job.objects.values("name", "status").annotate(
+        count=Count("id"), mean_duration_ms=Avg("duration_ms")
+    )
+    for row in rows:
+        stats[row["name"]][row["status"]] = {
+            "count": row["count"],
+            "mean_duration_ms": row["mean_duration_ms"],
+        }
+    return dict(stats)
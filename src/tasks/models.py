@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A unit of background work waiting for (or processed by) a task worker."""
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("SUCCEEDED", "Succeeded"),
+        ("FAILED", "Failed"),
+    ]
+
+    name = models.CharField(max_length=100, help_text="Registered task name")
+    payload = models.JSONField(default=dict, help_text="Keyword arguments")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_at = models.DateTimeField(
+        default=timezone.now, help_text="Earliest time the job may run"
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["run_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="tasks_job_status_run_at"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
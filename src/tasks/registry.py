@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from typing import Callable
+
+_registry = {}
+
+
+@dataclass
+class TaskDefinition:
+    """A function that can be run by a task worker."""
+
+    name: str
+    func: Callable
+    max_attempts: int = 3
+    retry_delay: int = 30  # seconds, doubled after every failed attempt
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, **kwargs):
+        """Queue the task on the configured backend. Arguments must be JSON-serializable."""
+        from .backends import get_backend
+
+        return get_backend().enqueue(self, kwargs)
+
+
+def task(name=None, max_attempts=3, retry_delay=30):
+    """
+    Register a function as a background task.
+
+        @task(max_attempts=5)
+        def update_service_rating(service_id, rating):
+            ...
+
+        update_service_rating.enqueue(service_id=..., rating=...)
+    """
+
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        definition = TaskDefinition(
+            name=task_name,
+            func=func,
+            max_attempts=max_attempts,
+            retry_delay=retry_delay,
+        )
+        _registry[task_name] = definition
+        return definition
+
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"No task registered with name '{name}'")
@@ -0,0 +1,161 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import metrics
+from .backends import DatabaseBackend, InProcessBackend, get_backend
+from .models import Job
+from .registry import get_task, task
+from .worker import Worker
+
+calls = []
+
+
+@task(name="tests.record", max_attempts=3, retry_delay=10)
+def record_call(value):
+    calls.append(value)
+
+
+@task(name="tests.explode", max_attempts=2)
+def explode():
+    calls.append("boom")
+    raise RuntimeError("boom")
+
+
+class TaskRegistryTest(TestCase):
+    def test_task_is_registered_under_its_name(self):
+        self.assertIs(get_task("tests.record"), record_call)
+        self.assertEqual(record_call.max_attempts, 3)
+
+    def test_default_name_uses_module_and_function(self):
+        self.assertIsNotNone(get_task("home.tasks.update_service_rating"))
+
+    def test_unknown_task_raises_lookup_error(self):
+        with self.assertRaises(LookupError):
+            get_task("tests.missing")
+
+    def test_task_can_still_be_called_directly(self):
+        calls.clear()
+        record_call(value=1)
+        self.assertEqual(calls, [1])
+
+
+class InProcessBackendTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        metrics.reset()
+        self.backend = InProcessBackend()
+
+    def test_jobs_wait_for_run_pending(self):
+        self.backend.enqueue(record_call, {"value": "a"})
+        self.backend.enqueue(record_call, {"value": "b"})
+        self.assertEqual(calls, [])
+
+        self.assertEqual(self.backend.run_pending(), 2)
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual(self.backend.run_pending(), 0)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_immediately(self):
+        self.backend.enqueue(record_call, {"value": "now"})
+        self.assertEqual(calls, ["now"])
+        self.assertEqual(self.backend.pending, [])
+
+    def test_failing_task_is_retried_then_marked_failed(self):
+        self.backend.enqueue(explode, {})
+        self.backend.run_pending()
+
+        self.assertEqual(calls, ["boom", "boom"])
+        stats = metrics.snapshot()["tests.explode"]
+        self.assertEqual(stats["enqueued"], 1)
+        self.assertEqual(stats["retried"], 1)
+        self.assertEqual(stats["failed"], 1)
+
+    def test_test_settings_use_in_process_backend(self):
+        self.assertIsInstance(get_backend(), InProcessBackend)
+
+
+@override_settings(TASKS_BACKEND="tasks.backends.DatabaseBackend")
+class DatabaseQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(worker_id="test-worker")
+
+    def test_enqueue_persists_job(self):
+        record_call.enqueue(value=42)
+
+        job = Job.objects.get()
+        self.assertEqual(job.name, "tests.record")
+        self.assertEqual(job.payload, {"value": 42})
+        self.assertEqual(job.status, "PENDING")
+        self.assertEqual(job.max_attempts, 3)
+        self.assertEqual(calls, [])
+
+    def test_worker_runs_due_jobs(self):
+        record_call.enqueue(value=1)
+        record_call.enqueue(value=2)
+
+        self.assertEqual(self.worker.run_once(), 2)
+        self.assertEqual(calls, [1, 2])
+        for job in Job.objects.all():
+            self.assertEqual(job.status, "SUCCEEDED")
+            self.assertEqual(job.attempts, 1)
+            self.assertIsNotNone(job.finished_at)
+
+    def test_worker_skips_jobs_scheduled_in_the_future(self):
+        DatabaseBackend().enqueue(record_call, {"value": 1}, delay=60)
+        self.assertEqual(self.worker.run_once(), 0)
+        self.assertEqual(calls, [])
+
+    def test_failed_job_is_rescheduled_with_backoff(self):
+        record_call.enqueue(value=1)
+        with patch.object(record_call, "func", side_effect=ValueError("nope")):
+            self.worker.run_once()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, "PENDING")
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("nope", job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+
+    def test_job_fails_after_max_attempts(self):
+        explode.enqueue()
+        self.worker.run_once()
+        Job.objects.update(run_at=timezone.now())
+        self.worker.run_once()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_unknown_task_fails_without_running(self):
+        Job.objects.create(name="tests.missing", payload={})
+        self.worker.run_once()
+        self.assertEqual(Job.objects.get().status, "FAILED")
+
+    @override_settings(TASKS_LOCK_TIMEOUT=60)
+    def test_abandoned_running_job_is_reclaimed(self):
+        Job.objects.create(
+            name="tests.record",
+            payload={"value": "again"},
+            status="RUNNING",
+            attempts=1,
+            locked_by="dead-worker",
+            locked_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.worker.run_once()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, "SUCCEEDED")
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(calls, ["again"])
+
+    def test_run_tasks_command_burst(self):
+        record_call.enqueue(value="cmd")
+        call_command("run_tasks", "--burst")
+        self.assertEqual(calls, ["cmd"])
+        self.assertEqual(Job.objects.get().status, "SUCCEEDED")
@@ -0,0 +1,103 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .backends import run_task
+from .models import Job
+from .registry import get_task
+
+log = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Polls the tasks_job table and runs due jobs.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+    worker processes can share the queue. A job left RUNNING by a worker that
+    died is picked up again once TASKS_LOCK_TIMEOUT has passed.
+    """
+
+    def __init__(self, worker_id=None, batch_size=10, poll_interval=1.0):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def claim(self):
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+        with transaction.atomic():
+            ids = list(
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status="PENDING", run_at__lte=now)
+                    | Q(status="RUNNING", locked_at__lt=stale)
+                )
+                .order_by("run_at", "id")
+                .values_list("id", flat=True)[: self.batch_size]
+            )
+            Job.objects.filter(id__in=ids).update(
+                status="RUNNING",
+                locked_by=self.worker_id,
+                locked_at=now,
+                attempts=F("attempts") + 1,
+            )
+        return list(Job.objects.filter(id__in=ids).order_by("run_at", "id"))
+
+    def execute(self, job):
+        try:
+            definition = get_task(job.name)
+        except LookupError as e:
+            job.status = "FAILED"
+            job.last_error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "last_error", "finished_at"])
+            metrics.record(job.name, "failed")
+            return
+
+        succeeded, error, duration = run_task(definition, job.payload)
+        job.duration_ms = int(duration * 1000)
+        job.locked_by = ""
+        job.locked_at = None
+        if succeeded:
+            job.status = "SUCCEEDED"
+            job.finished_at = timezone.now()
+            metrics.record(job.name, "succeeded", duration)
+        elif job.attempts < job.max_attempts:
+            job.status = "PENDING"
+            job.last_error = error
+            backoff = definition.retry_delay * 2 ** (job.attempts - 1)
+            job.run_at = timezone.now() + timedelta(seconds=backoff)
+            metrics.record(job.name, "retried", duration)
+        else:
+            job.status = "FAILED"
+            job.last_error = error
+            job.finished_at = timezone.now()
+            metrics.record(job.name, "failed", duration)
+        job.save()
+
+    def run_once(self):
+        """Claim and run one batch. Returns the number of jobs processed."""
+        jobs = self.claim()
+        for job in jobs:
+            self.execute(job)
+        return len(jobs)
+
+    def run(self, burst=False):
+        """Process jobs until interrupted (or until the queue is empty, with burst)."""
+        log.info(f"Task worker {self.worker_id} started")
+        while True:
+            close_old_connections()
+            processed = self.run_once()
+            if not processed:
+                if burst:
+                    return
+                time.sleep(self.poll_interval)